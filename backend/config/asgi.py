@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+# Keep the RAG encoder and vector store resident, so the first question doesn't pay the setup cost.
+if settings.RAG_PRELOAD_ENGINE:
+    from core.rag.engine import get_retrieval_engine
+    get_retrieval_engine().warm_up()
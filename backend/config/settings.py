@@ -25,6 +25,16 @@ YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 HF_TOKEN = os.getenv("HF_TOKEN")
 
+# YouTube Data API (overridable so tests can point it at a local fake server) and the Seahawks press
+# conference playlist that the periodic sync ingests.
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_PLAYLIST_ID = os.getenv("YOUTUBE_PLAYLIST_ID", "PLtY4N4jspn1KKnRp1TjSNZey21leiTMjj")
+
+# Known press conference speakers (coaches, executives, players) matched in video titles before
+# falling back to spaCy NER.
+SPEAKER_GAZETTEER_PATH = os.getenv("SPEAKER_GAZETTEER_PATH",
+                                   str(BASE_DIR / "core" / "processing" / "data" / "speakers.json"))
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -60,6 +70,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.QueryStatsMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -146,5 +157,176 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# The video pipeline is a chain of stage tasks, each routed to a queue that matches its workload, so
+# that downloads and LLM calls for one video overlap the transcription of another. Run one worker per
+# queue and size each pool separately, e.g.:
+#   celery -A config worker -Q io -c 8 -n io@%h        (YouTube downloads)
+#   celery -A config worker -Q cpu -c 4 -n cpu@%h      (enhancement, WhisperX, embeddings; ~1 per core pair)
+#   celery -A config worker -Q api -c 8 -n api@%h      (YouTube Data API, Groq, Google TTS)
+# All stages share the tmp/ directory under BASE_DIR for audio hand-offs.
+CELERY_IO_QUEUE = "io"
+CELERY_CPU_QUEUE = "cpu"
+CELERY_API_QUEUE = "api"
+CELERY_TASK_ROUTES = {
+    "core.tasks.process_video_pipeline": {"queue": CELERY_IO_QUEUE},
+    "core.tasks.fetch_video_metadata": {"queue": CELERY_API_QUEUE},
+    "core.tasks.download_video_audio": {"queue": CELERY_IO_QUEUE},
+    "core.tasks.enhance_video_audio": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.transcribe_video_audio": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.transcribe_video_incremental": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.refine_video_transcript": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.prefetch_summary_window": {"queue": CELERY_API_QUEUE},
+    "core.tasks.summarize_video": {"queue": CELERY_API_QUEUE},
+    "core.tasks.index_video": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.develop_rag_embeddings": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.transcription_models_status": {"queue": CELERY_CPU_QUEUE},
+    "core.tasks.build_daily_digest": {"queue": CELERY_API_QUEUE},
+    "core.tasks.sync_playlist": {"queue": CELERY_API_QUEUE},
+}
+
+# Long CPU-bound tasks: don't let a busy worker reserve stages that an idle one could start right away.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+
+# With late acks, Redis hands an unacknowledged task to another worker once the visibility timeout
+# (one hour by default) runs out, so it must outlast the longest stage's worst case (transcribing or
+# refining a long press conference on a busy worker) or that stage is run twice.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT_SECONDS", str(12 * 3600))),
+}
+
+# Loading the WhisperX models on worker start can take well over a minute, which is far beyond
+# Celery's default four-second window for a child process to report in.
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = 180
+
+# Celery beat (celery -A config beat) polls the press conference playlist and ingests new uploads.
+YOUTUBE_SYNC_INTERVAL_SECONDS = int(os.getenv("YOUTUBE_SYNC_INTERVAL_SECONDS", str(15 * 60)))
+CELERY_BEAT_SCHEDULE = {
+    "sync-press-conference-playlist": {"task": "core.tasks.sync_playlist",
+                                       "schedule": YOUTUBE_SYNC_INTERVAL_SECONDS},
+}
+
+# WhisperX model registry: warm the ASR/alignment/diarization models as soon as a worker process
+# starts, and start evicting them (least recently used first) once free memory drops below the floor.
+WHISPERX_WARM_ON_WORKER_INIT = os.getenv("WHISPERX_WARM_ON_WORKER_INIT", "true").lower() == "true"
+WHISPERX_MIN_AVAILABLE_MB = int(os.getenv("WHISPERX_MIN_AVAILABLE_MB", "1024"))
+
+# Default transcription profile ('fast', 'balanced' or 'full'; see core/processing/transcribe.py) for
+# videos submitted without one.
+TRANSCRIPTION_PROFILE = os.getenv("TRANSCRIPTION_PROFILE", "full")
+
+# Audio pipeline: videos longer than AUDIO_CHUNKED_MIN_SECONDS are transcribed in AUDIO_CHUNK_SECONDS
+# blocks so memory stays bounded for multi-hour streams.
+AUDIO_CHUNKED_MIN_SECONDS = int(os.getenv("AUDIO_CHUNKED_MIN_SECONDS", str(90 * 60)))
+AUDIO_CHUNK_SECONDS = int(os.getenv("AUDIO_CHUNK_SECONDS", str(10 * 60)))
+
+# Incremental transcription: new (non-upgrade) videos are transcribed window by window as the enhanced
+# audio comes out of FFmpeg, each window cut at a pause between INCREMENTAL_WINDOW_MIN_SECONDS and
+# INCREMENTAL_WINDOW_MAX_SECONDS and committed to the stored transcript as soon as it is transcribed.
+# Alignment and diarization follow as a refinement stage over the committed windows.
+TRANSCRIPTION_INCREMENTAL = os.getenv("TRANSCRIPTION_INCREMENTAL", "true").lower() == "true"
+INCREMENTAL_WINDOW_MIN_SECONDS = float(os.getenv("INCREMENTAL_WINDOW_MIN_SECONDS", "20"))
+INCREMENTAL_WINDOW_MAX_SECONDS = float(os.getenv("INCREMENTAL_WINDOW_MAX_SECONDS", "45"))
+
+# Content-addressed cache for pipeline artifacts (downloaded audio, enhanced audio, transcripts and
+# summaries), keyed by YouTube video ID plus a hash of each stage's configuration. Least recently used
+# artifacts are evicted once the directory grows past ARTIFACT_CACHE_MAX_BYTES.
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", str(BASE_DIR / "artifact_cache"))
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+
+# Number of parallel FFmpeg shards used to enhance a (non-chunked) video; 1 keeps the single pass.
+AUDIO_ENHANCE_SHARDS = int(os.getenv("AUDIO_ENHANCE_SHARDS", "1"))
+
+# Dead-air trimming: a voice-activity pass over the downloaded audio finds the speech (frames
+# AUDIO_VAD_MARGIN_DB above the noise floor), and silences of AUDIO_VAD_MIN_SILENCE_SECONDS or more are
+# cut, keeping AUDIO_VAD_PADDING_SECONDS on either side, before enhancement and transcription. Transcript
+# timestamps are mapped back onto the video timeline.
+AUDIO_TRIM_DEAD_AIR = os.getenv("AUDIO_TRIM_DEAD_AIR", "true").lower() == "true"
+AUDIO_VAD_MIN_SILENCE_SECONDS = float(os.getenv("AUDIO_VAD_MIN_SILENCE_SECONDS", "3.0"))
+AUDIO_VAD_PADDING_SECONDS = float(os.getenv("AUDIO_VAD_PADDING_SECONDS", "0.5"))
+AUDIO_VAD_MARGIN_DB = float(os.getenv("AUDIO_VAD_MARGIN_DB", "10.0"))
+
+# Video summaries: transcripts estimated above the threshold are summarized map-reduce style, in
+# windows of SUMMARY_WINDOW_TOKENS (split on Whisper segment boundaries), SUMMARY_MAP_CONCURRENCY at a time.
+SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS", "8000"))
+SUMMARY_WINDOW_TOKENS = int(os.getenv("SUMMARY_WINDOW_TOKENS", "3000"))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+# Groq client: pooled connections, a token-bucket limiter shared by every process through Redis (set
+# these to the account's limits), and jittered exponential backoff on 429/5xx responses. The base URL
+# can point at any OpenAI-compatible server (e.g. the benchmark suite's local stand-in).
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "512"))
+LLM_RATE_LIMIT_REDIS_URL = os.getenv("LLM_RATE_LIMIT_REDIS_URL", CELERY_BROKER_URL)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "60.0"))
+
+# LLM response cache, keyed by model + prompt version + normalized prompt hash. Backends are consulted
+# in order ("memory" is a per-process LRU, "redis" is shared through the Celery broker's Redis).
+LLM_CACHE_BACKENDS = [b for b in os.getenv("LLM_CACHE_BACKENDS", "memory,redis").split(",") if b]
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_REDIS_URL = os.getenv("LLM_CACHE_REDIS_URL", CELERY_BROKER_URL)
+# Invalidation bumps a generation counter in the last (shared) backend, which is part of every key;
+# each process re-reads the counters at most this often, so other processes' in-memory entries for an
+# invalidated prompt go unused within that many seconds.
+LLM_CACHE_GENERATION_REFRESH_SECONDS = float(os.getenv("LLM_CACHE_GENERATION_REFRESH_SECONDS", "5"))
+
+# Load the RAG encoder and open the Chroma collection when the web process starts (rather than
+# lazily on the first question).
+RAG_PRELOAD_ENGINE = os.getenv("RAG_PRELOAD_ENGINE", "true").lower() == "true"
+
+# Semantic answer cache: questions at least this cosine-similar to a recently answered one reuse its
+# answer and sources. Cleared automatically whenever a new video is indexed.
+RAG_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("RAG_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+RAG_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("RAG_SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+
+# Digest TTS: synthesize the script sentence by sentence, TTS_MAX_PARALLEL requests at a time.
+TTS_CHUNKED = os.getenv("TTS_CHUNKED", "true").lower() == "true"
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", "4"))
+
+# Synthesized sentences are cached on disk per (text, voice, encoding), evicting the least recently
+# used audio past TTS_CACHE_MAX_BYTES. It is kept apart from ARTIFACT_CACHE_DIR, whose eviction walks its
+# whole tree and would otherwise count (and delete) the TTS audio against the pipeline's budget.
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", str(BASE_DIR / "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 ** 2)))
+
+# Shared cache for serialized API responses (see core/cache/responses.py), invalidated on model saves.
+HTTP_CACHE_REDIS_URL = os.getenv("HTTP_CACHE_REDIS_URL", CELERY_BROKER_URL)
+HTTP_CACHE_ALIAS = "responses"
+HTTP_CACHE_TTL_SECONDS = int(os.getenv("HTTP_CACHE_TTL_SECONDS", str(24 * 3600)))
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    HTTP_CACHE_ALIAS: {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": HTTP_CACHE_REDIS_URL,
+                       "KEY_PREFIX": "seahawks"},
+}
+
+# SQL instrumentation (core/instrumentation.py): log the queries/rows/bytes behind every API request and
+# Celery task, and report a request's totals in an X-DB-Stats response header.
+DB_STATS_LOG = os.getenv("DB_STATS_LOG", "true").lower() == "true"
+DB_STATS_HEADER = os.getenv("DB_STATS_HEADER", str(DEBUG)).lower() == "true"
+
+# Job progress (core/progress.py): stages publish progress events through Redis pub/sub (at most one
+# per PROGRESS_MIN_INTERVAL_SECONDS while a stage reports fine-grained progress), and each video's latest
+# event is kept for PROGRESS_SNAPSHOT_TTL_SECONDS to serve the status endpoint. Event streams send a
+# keep-alive comment every PROGRESS_HEARTBEAT_SECONDS.
+PROGRESS_REDIS_URL = os.getenv("PROGRESS_REDIS_URL", CELERY_BROKER_URL)
+PROGRESS_MIN_INTERVAL_SECONDS = float(os.getenv("PROGRESS_MIN_INTERVAL_SECONDS", "1.0"))
+PROGRESS_SNAPSHOT_TTL_SECONDS = int(os.getenv("PROGRESS_SNAPSHOT_TTL_SECONDS", str(7 * 24 * 3600)))
+PROGRESS_HEARTBEAT_SECONDS = float(os.getenv("PROGRESS_HEARTBEAT_SECONDS", "15"))
+
+# Pipeline timing records (core/metrics.py): the /api/metrics endpoint reports all-time histograms per
+# stage, plus p50/p95 over the last PIPELINE_METRICS_WINDOW_HOURS.
+PIPELINE_METRICS_WINDOW_HOURS = int(os.getenv("PIPELINE_METRICS_WINDOW_HOURS", "24"))
+
+# Pipeline benchmark suite (python manage.py bench_pipeline): one JSON result file per run, named after
+# the commit, so runs can be compared across commits with --compare.
+BENCHMARK_RESULTS_DIR = os.getenv("BENCHMARK_RESULTS_DIR", str(BASE_DIR / "benchmark_results"))
+
 # Allow all origins for now (to be changed eventually).
 CORS_ORIGIN_ALLOW_ALL = True
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Keep the RAG encoder and vector store resident, so the first question doesn't pay the setup cost.
+if settings.RAG_PRELOAD_ENGINE:
+    from core.rag.engine import get_retrieval_engine
+    get_retrieval_engine().warm_up()
@@ -2,6 +2,7 @@ from ninja import NinjaAPI
 from .routers.videos import videos_router
 from .routers.rag import rag_router
 from .routers.digest import digest_router
+from .routers.metrics import metrics_router
 
 # Define the main entrypoint for the entire backend API (central 'switchboard').
 api = NinjaAPI()
@@ -10,3 +11,4 @@ api = NinjaAPI()
 api.add_router("/videos", videos_router)
 api.add_router("/rag", rag_router)
 api.add_router("/digests", digest_router)
+api.add_router("/metrics", metrics_router)
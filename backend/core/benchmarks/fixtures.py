@@ -0,0 +1,127 @@
+import numpy as np
+
+# Deterministic synthetic press conference audio for the benchmark suite. The signal is not
+# intelligible speech, but it has the properties the pipeline cares about: voiced turns with a pitch
+# contour, formants and syllable-rate amplitude modulation, a continuous room/crowd noise floor, and
+# short, much quieter "reporter" questions between the coach's answers (the case speechnorm exists for).
+SAMPLE_RATE = 16000
+
+COACH_LINES = [
+    "We played complementary football today and the defense set the tone early.",
+    "The offensive line gave Sam time all afternoon and he made the right reads.",
+    "We'll know more about his hamstring after the MRI tomorrow morning.",
+    "Special teams flipped the field twice, that was a huge part of the win.",
+    "Third down is where we have to be better, we left points out there.",
+    "Jaxon is a special player, he just keeps making plays after the catch.",
+    "The run game found a rhythm in the second half once we stayed patient.",
+    "Credit to their coaching staff, they had a great plan against our pressure.",
+]
+
+REPORTER_LINES = [
+    "Coach, what's the latest on the injury report?",
+    "How do you evaluate the pass rush this week?",
+    "What changed at halftime?",
+    "Can you talk about the red zone struggles?",
+]
+
+def _voice(n: int, rng: np.random.Generator, pitch_hz: float, formants: tuple,
+           syllables_per_second: float, sample_rate: int) -> np.ndarray:
+    """
+    A speech-like voiced signal: a harmonic series on a wandering pitch contour, shaped by formant
+    peaks and gated by a syllabic envelope with short pauses between phrases.
+    """
+
+    duration = n / sample_rate
+    t = np.arange(n) / sample_rate
+
+    # Slow pitch drift (intonation) plus a little vibrato-like jitter.
+    contour = pitch_hz * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(0.2, 0.5) * t + rng.uniform(0, 2 * np.pi))
+                          + 0.01 * np.sin(2 * np.pi * 5.5 * t))
+    phase = 2 * np.pi * np.cumsum(contour) / sample_rate
+
+    signal = np.zeros(n)
+    for harmonic in range(1, 16):
+        frequency = harmonic * pitch_hz
+        if frequency > sample_rate / 2 - 500:
+            break
+        # Harmonics near a formant are emphasized, everything else rolls off with frequency.
+        gain = sum(np.exp(-((frequency - f) / 150.0) ** 2) for f in formants) + 0.3 / harmonic
+        signal += gain * np.sin(harmonic * phase)
+
+    # Syllables: raised-cosine bursts at a jittered rate, with a pause every few words.
+    envelope = np.zeros(n)
+    position = 0.0
+    while position < duration:
+        length = rng.uniform(0.6, 1.4) / syllables_per_second
+        start, end = int(position * sample_rate), min(n, int((position + length) * sample_rate))
+        if end > start:
+            envelope[start:end] = np.hanning(end - start) * rng.uniform(0.6, 1.0)
+        position += length
+        if rng.random() < 0.12:
+            position += rng.uniform(0.2, 0.6)
+
+    signal *= envelope
+    peak = np.max(np.abs(signal))
+    return signal / peak if peak else signal
+
+def _crowd_noise(n: int, rng: np.random.Generator, sample_rate: int) -> np.ndarray:
+    """
+    Pink-ish noise (white noise with a 1/f spectrum) plus a low murmur of overlapping voices.
+    """
+
+    spectrum = np.fft.rfft(rng.standard_normal(n))
+    frequencies = np.fft.rfftfreq(n, 1 / sample_rate)
+    spectrum[1:] /= np.sqrt(frequencies[1:])
+    spectrum[0] = 0
+    pink = np.fft.irfft(spectrum, n)
+    pink /= np.max(np.abs(pink)) or 1.0
+
+    murmur = np.zeros(n)
+    for _ in range(3):
+        murmur += _voice(n, rng, rng.uniform(100, 220), (rng.uniform(400, 800), rng.uniform(1100, 1900)),
+                         rng.uniform(3, 5), sample_rate)
+    return 0.7 * pink + 0.3 * murmur / 3
+
+def synth_press_conference(duration_seconds: float = 300.0, sample_rate: int = SAMPLE_RATE, seed: int = 0):
+    """
+    Generates a press conference: the coach answering at full level, interrupted every 20-40 seconds by
+    a reporter question at roughly -20 dB, over a constant crowd noise floor. Returns the float32 waveform
+    and the ground-truth script as WhisperX-shaped segments ({start, end, speaker, text}).
+    The same arguments always produce the same audio.
+    """
+
+    rng = np.random.default_rng(seed)
+    n = int(duration_seconds * sample_rate)
+    audio = np.zeros(n)
+    segments = []
+
+    position, line = 0.5, 0
+    while position < duration_seconds - 1.0:
+        # One answer from the coach...
+        answer = min(rng.uniform(20, 40), duration_seconds - position - 0.5)
+        start, length = int(position * sample_rate), int(answer * sample_rate)
+        audio[start:start + length] += 0.5 * _voice(length, rng, 115.0, (700, 1220, 2600), 4.5, sample_rate)
+        segments.append({"start": round(position, 3), "end": round(position + answer, 3), "speaker": "SPEAKER_00",
+                         "text": " ".join(COACH_LINES[(line + i) % len(COACH_LINES)] for i in range(3))})
+        position += answer + rng.uniform(0.3, 0.8)
+        line += 3
+
+        # ...then a short, quiet question from an off-mic reporter.
+        question = rng.uniform(3, 6)
+        if position + question > duration_seconds - 0.5:
+            break
+        start, length = int(position * sample_rate), int(question * sample_rate)
+        audio[start:start + length] += 0.05 * _voice(length, rng, 190.0, (850, 1700, 2900), 5.0, sample_rate)
+        segments.append({"start": round(position, 3), "end": round(position + question, 3),
+                         "speaker": "SPEAKER_01", "text": REPORTER_LINES[len(segments) // 2 % len(REPORTER_LINES)]})
+        position += question + rng.uniform(0.3, 0.8)
+
+    audio += 0.02 * _crowd_noise(n, rng, sample_rate)
+    return np.clip(audio, -1.0, 1.0).astype(np.float32), segments
+
+def script_text(segments: list[dict]) -> str:
+    """
+    The fixture's transcript as one string (what Transcript.full_text would hold).
+    """
+
+    return " ".join(segment["text"] for segment in segments)
@@ -0,0 +1,66 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import json
+import time
+
+class LocalLLMStandIn:
+    """
+    A local OpenAI-compatible /chat/completions endpoint, so the summarization stage can be benchmarked
+    without network calls or API quota. Answers are canned (valid JSON when the request asks for a
+    json_object) and 'latency_seconds' simulates the model's generation time.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API (the client pools connections).
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                payload = json.dumps(standin.complete(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def complete(self, request: dict) -> dict:
+        self.requests += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps({
+                "title": "Seahawks Lean on Defense in Statement Win",
+                "one_sentence_summary": "The coach credited the defense and the line after a complete team win.",
+                "key_bullet_points": ["The defense set the tone early.", "The line kept the quarterback clean.",
+                                      "A hamstring injury will be evaluated with an MRI."],
+            })
+        else:
+            content = "- The defense set the tone early.\n- Third down execution needs to improve."
+
+        prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", [])) // 4
+        return {
+            "id": f"chatcmpl-standin-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "standin"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4},
+        }
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
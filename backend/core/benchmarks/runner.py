@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+import subprocess
+import threading
+import resource
+import time
+import sys
+
+# psutil gives the current RSS, so a stage's own peak can be sampled; without it we fall back to the
+# process-lifetime high-water mark from getrusage, which never goes down between stages.
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def _lifetime_peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class _RSSSampler:
+    """
+    Samples the process RSS on a background thread and keeps the maximum.
+    """
+
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._process = psutil.Process()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+
+class StageResult:
+    """
+    Measurements for one stage: wall-clock seconds, real-time factor (seconds of processing per second
+    of audio; below 1 is faster than real time), throughput and peak RSS.
+    """
+
+    def __init__(self, stage: str, seconds: float, audio_seconds: float, items: int, item_name: str,
+                 peak_rss_mb: float):
+        self.stage = stage
+        self.seconds = seconds
+        self.audio_seconds = audio_seconds
+        self.items = items
+        self.item_name = item_name
+        self.peak_rss_mb = peak_rss_mb
+
+    @property
+    def rtf(self) -> float:
+        return self.seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {"seconds": round(self.seconds, 4), "rtf": round(self.rtf, 5),
+                "throughput": round(self.throughput, 3), "throughput_unit": f"{self.item_name}/s",
+                "items": self.items, "peak_rss_mb": round(self.peak_rss_mb, 1)}
+
+    def __str__(self):
+        return (f"{self.stage:>10}: {self.seconds:8.2f}s  RTF {self.rtf:7.4f}  "
+                f"{self.throughput:9.2f} {self.item_name}/s  peak RSS {self.peak_rss_mb:8.1f} MB")
+
+@contextmanager
+def _peak_rss():
+    """
+    Yields a callable that returns the peak RSS (in MB) reached inside the block, once the block ends.
+    """
+
+    if psutil is None:
+        yield _lifetime_peak_rss_mb
+        return
+    with _RSSSampler() as sampler:
+        yield lambda: sampler.peak_bytes / (1024 * 1024)
+
+def measure(stage: str, fn, audio_seconds: float, items: int = None, item_name: str = "audio-s"):
+    """
+    Runs fn() once and returns (its result, StageResult). Throughput is 'items' per second, or seconds
+    of audio per second if 'items' isn't given.
+    """
+
+    with _peak_rss() as peak_rss_mb:
+        started = time.perf_counter()
+        value = fn()
+        seconds = time.perf_counter() - started
+    return value, StageResult(stage, seconds, audio_seconds, audio_seconds if items is None else items,
+                              item_name, peak_rss_mb())
+
+def git_commit() -> str:
+    """
+    The commit being benchmarked (with a '-dirty' suffix for uncommitted changes), or None outside git.
+    """
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[tuple]:
+    """
+    Compares two result files stage by stage. Returns (stage, metric, baseline, current, ratio, regressed)
+    rows for seconds and peak RSS; a ratio above 1 + tolerance counts as a regression.
+    """
+
+    rows = []
+    for stage, result in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before is None:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if not before[metric]:
+                continue
+            ratio = result[metric] / before[metric]
+            rows.append((stage, metric, before[metric], result[metric], ratio, ratio > 1 + tolerance))
+    return rows
@@ -0,0 +1,164 @@
+from django.conf import settings
+import threading
+import hashlib
+import shutil
+import errno
+import gzip
+import json
+import time
+import os
+import uuid
+
+def config_hash(config: dict) -> str:
+    """
+    Stable short hash of a stage configuration (key order doesn't matter).
+    """
+
+    encoded = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+class ArtifactCache:
+    """
+    A content-addressed, size-bounded store for pipeline artifacts on local disk. Artifacts live at
+    '<root>/<namespace>/<key>'; a file's mtime doubles as its last-access time, and the least recently
+    used files are evicted once the store grows past 'max_bytes'. Every write is a rename into place,
+    so concurrent workers never observe half-written artifacts.
+
+    Finding the least recently used files takes a walk of the whole tree, so writes only keep a running
+    total and the tree is walked when that total passes 'max_bytes' (eviction then frees down to
+    'low_water' of it), or once 'rescan_seconds' have passed, to catch up with other processes' writes.
+    """
+
+    def __init__(self, root: str, max_bytes: int, low_water: float = 0.9, rescan_seconds: float = 60.0):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.rescan_seconds = rescan_seconds
+        self._lock = threading.Lock()
+        self._size = None  # Unknown until the first walk.
+        self._scanned_at = 0.0
+
+    def key(self, subject: str, config: dict) -> str:
+        """
+        Builds a cache key from the subject (e.g. a YouTube video ID) plus a hash of the configuration.
+        """
+
+        return f"{subject}-{config_hash(config)}"
+
+    def _path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.root, namespace, key)
+
+    def get_path(self, namespace: str, key: str):
+        """
+        Returns the path of a cached artifact (marking it as recently used), or None on a miss.
+        """
+
+        path = self._path(namespace, key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return os.path.exists(self._path(namespace, key))
+
+    def put_file(self, namespace: str, key: str, source_path: str) -> str:
+        """
+        Moves a finished file into the cache and returns its new path.
+        """
+
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(source_path, path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # The scratch file is on another filesystem (e.g. the cache is a mounted volume): copy it next
+            # to its destination first, so that the final rename is still atomic.
+            staging_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            shutil.move(source_path, staging_path)
+            os.replace(staging_path, path)
+        self._written(os.path.getsize(path))
+        return path
+
+    def _written(self, size: int):
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            due = (self._size is None or self._size > self.max_bytes
+                   or time.monotonic() - self._scanned_at > self.rescan_seconds)
+        if due:
+            self.evict()
+
+    def put_bytes(self, namespace: str, key: str, data: bytes) -> str:
+        """
+        Stores raw bytes under the given key and returns the artifact path.
+        """
+
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(data)
+        return self.put_file(namespace, key, tmp_path)
+
+    def get_bytes(self, namespace: str, key: str):
+        path = self.get_path(namespace, key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def put_json(self, namespace: str, key: str, value) -> str:
+        return self.put_bytes(namespace, key, gzip.compress(json.dumps(value).encode()))
+
+    def get_json(self, namespace: str, key: str):
+        data = self.get_bytes(namespace, key)
+        return None if data is None else json.loads(gzip.decompress(data))
+
+    def evict(self):
+        """
+        Walks the cache and, if it has grown past 'max_bytes', deletes least-recently-used artifacts until
+        it is back down to 'low_water' of that.
+        """
+
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * self.low_water:
+                    break
+                try:
+                    os.remove(path)
+                    print(f"Artifact Cache: Evicted {path}.")
+                except FileNotFoundError:
+                    pass  # Another worker got there first.
+                total -= size
+
+        with self._lock:
+            self._size, self._scanned_at = total, time.monotonic()
+
+_ARTIFACT_CACHE = None
+
+def get_artifact_cache() -> ArtifactCache:
+    """
+    Returns the process-wide artifact cache configured in settings.
+    """
+
+    global _ARTIFACT_CACHE
+    if _ARTIFACT_CACHE is None:
+        _ARTIFACT_CACHE = ArtifactCache(settings.ARTIFACT_CACHE_DIR, settings.ARTIFACT_CACHE_MAX_BYTES)
+    return _ARTIFACT_CACHE
@@ -0,0 +1,103 @@
+from django.core.cache import caches
+from django.conf import settings
+from django.http import HttpResponse
+from pydantic import TypeAdapter
+from functools import wraps
+import hashlib
+import uuid
+
+# Every cached read endpoint depends on one or more 'scopes' (e.g. "video:12", or "videos" for the
+# listing). Each scope has a version token in the shared cache which model saves replace, so an ETag (and
+# a cached body) is valid exactly as long as the versions it was built from. Checking a request therefore
+# costs a couple of cache reads and no database query.
+VERSION_PREFIX = "http:version:"
+BODY_PREFIX = "http:body:"
+
+def _cache():
+    return caches[settings.HTTP_CACHE_ALIAS]
+
+def _get_versions(scopes: list[str]) -> list[str]:
+    """
+    Returns the current version token of each scope, creating one for scopes that have none yet.
+    """
+
+    cache = _cache()
+    keys = [VERSION_PREFIX + scope for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # add() keeps a token another process created in the meantime.
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+def bump_version(scope: str, token: str = None):
+    """
+    Invalidates every cached response that depends on 'scope'.
+    """
+
+    try:
+        _cache().set(VERSION_PREFIX + scope, token or uuid.uuid4().hex, timeout=None)
+    except Exception as e:
+        print(f"HTTP Cache: Failed to invalidate '{scope}': {e}.")
+
+def invalidate_video(video, token: str = None):
+    """
+    Invalidates a video's cached responses (and the listing). Pass the instance to version the ETag by
+    its updated_at/status, or just the ID after a queryset update() (which skips save signals).
+    """
+
+    video_id = getattr(video, "id", video)
+    if token is None and hasattr(video, "updated_at"):
+        token = f"{video.updated_at.isoformat()}:{video.status}"
+    bump_version(f"video:{video_id}", token)
+    bump_version("videos")
+
+def invalidate_digest(digest):
+    digest_id = getattr(digest, "id", digest)
+    bump_version(f"digest:{digest_id}")
+    bump_version("digests")
+
+def _etag_matches(header: str, etag: str) -> bool:
+    return any(candidate.strip() in (etag, f"W/{etag}", "*") for candidate in header.split(","))
+
+def cached_response(schema, scopes: list[str]):
+    """
+    Caches a (GET) view's serialized body in the shared cache and answers conditional requests. 'schema'
+    is the view's response type (used to serialize what the view returns) and 'scopes' are the versioned
+    scopes it depends on, formatted with the view's keyword arguments (e.g. "video:{video_id}").
+    """
+
+    adapter = TypeAdapter(schema)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                versions = _get_versions([scope.format(**kwargs) for scope in scopes])
+            except Exception as e:
+                print(f"HTTP Cache: Cache unavailable ({e}); serving uncached.")
+                return view(request, *args, **kwargs)
+
+            path = request.get_full_path()
+            etag = '"' + hashlib.sha256("|".join([path, *versions]).encode()).hexdigest()[:32] + '"'
+
+            if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+                response = HttpResponse(status=304)
+            else:
+                body_key = BODY_PREFIX + hashlib.sha256(path.encode()).hexdigest()
+                entry = _cache().get(body_key)
+                if entry is not None and entry[0] == etag:
+                    body = entry[1]
+                else:
+                    result = view(request, *args, **kwargs)
+                    body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+                    _cache().set(body_key, (etag, body), timeout=settings.HTTP_CACHE_TTL_SECONDS)
+                response = HttpResponse(body, content_type="application/json")
+
+            # Let browsers keep the body but revalidate it on every poll.
+            response["ETag"] = etag
+            response["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,177 @@
+from django.db import connection
+from django.db.backends.signals import connection_created
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+# Counts the SQL queries, rows and (approximate) bytes fetched while a block of code runs: an API
+# request (see QueryStatsMiddleware), a Celery task (see the task_prerun/task_postrun handlers in
+# tasks.py) or a test that declares a query budget (see query_budget).
+
+class QueryStats:
+    """
+    Totals for one tracked block. Trackers nest: a query counts towards every active tracker.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {"queries": self.queries, "rows": self.rows, "bytes": self.bytes,
+                "ms": round(self.seconds * 1000, 1)}
+
+    def __str__(self):
+        return f"{self.queries} queries, {self.rows} rows, {self.bytes} bytes in {self.seconds * 1000:.1f}ms"
+
+# The active trackers. A context variable rather than a thread-local, so that a tracker started in
+# async code (e.g. around a streaming view) also sees the queries its sync_to_async calls run on a worker
+# thread: asgiref carries the context over.
+_ACTIVE = ContextVar("query_stats", default=None)
+
+def _active() -> list:
+    active = _ACTIVE.get()
+    if active is None:
+        active = []
+        _ACTIVE.set(active)
+    return active
+
+def _row_bytes(row) -> int:
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+class _CountingCursor:
+    """
+    Wraps the cursor the backend hands out (keeping its own wrapper, e.g. PostgreSQL's logging of COPY
+    statements under DEBUG) and counts the rows fetched through it (the ORM reads results through these
+    methods).
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+    def _count(self, rows):
+        size = sum(_row_bytes(row) for row in rows)
+        for stats in _active():
+            stats.rows += len(rows)
+            stats.bytes += size
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count([row])
+            yield row
+
+def _count_query(execute, sql, params, many, context):
+    active = _active()
+    if not active:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for stats in active:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+def _install(conn):
+    """
+    Makes the connection count its queries and hand out counting cursors (once per connection object).
+    Both only count while a tracker is active.
+    """
+
+    if getattr(conn, "_query_stats_installed", False):
+        return
+    make_cursor, make_debug_cursor = conn.make_cursor, conn.make_debug_cursor
+    conn.make_cursor = lambda cursor: _CountingCursor(make_cursor(cursor))
+    conn.make_debug_cursor = lambda cursor: _CountingCursor(make_debug_cursor(cursor))
+    conn.execute_wrappers.append(_count_query)
+    conn._query_stats_installed = True
+
+def _install_on_connect(sender, connection, **kwargs):
+    _install(connection)
+
+# Connections are per thread, and e.g. the worker threads behind sync_to_async open their own.
+connection_created.connect(_install_on_connect)
+
+class QueryTracker:
+    """
+    Tracks queries between start() and stop(), or for the duration of a 'with' block; both return the
+    QueryStats that fills in as queries run. (The Celery task signals start and stop in separate callbacks.)
+    """
+
+    def __init__(self):
+        self.stats = QueryStats()
+
+    def start(self) -> QueryStats:
+        _install(connection)  # In case this thread's connection was opened before this module was imported.
+        _active().append(self.stats)
+        return self.stats
+
+    def stop(self) -> QueryStats:
+        active = _active()
+        if self.stats in active:
+            active.remove(self.stats)
+        return self.stats
+
+    def __enter__(self) -> QueryStats:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@contextmanager
+def query_budget(max_queries: int, max_rows: int = None, max_bytes: int = None):
+    """
+    Fails (with QueryBudgetExceeded) if the block runs more queries, or fetches more rows/bytes, than
+    allowed. Works as a context manager or a test decorator:
+
+        @query_budget(2)
+        def test_list_digests(self): ...
+    """
+
+    with QueryTracker() as stats:
+        yield stats
+
+    limits = {"queries": max_queries, "rows": max_rows, "bytes": max_bytes}
+    exceeded = [f"{name} {getattr(stats, name)} > {limit}" for name, limit in limits.items()
+                if limit is not None and getattr(stats, name) > limit]
+    if exceeded:
+        raise QueryBudgetExceeded(f"Query budget exceeded: {', '.join(exceeded)}.")
@@ -0,0 +1,228 @@
+from collections import OrderedDict
+from django.conf import settings
+import threading
+import hashlib
+import json
+import time
+import redis
+
+def normalize_prompt(messages: list[dict], **options) -> str:
+    """
+    Canonical form of a chat prompt: whitespace inside each message is collapsed (so re-indented
+    f-strings hash the same), and any request options that change the output are folded in.
+    """
+
+    normalized = [{"role": m["role"], "content": " ".join(m["content"].split())} for m in messages]
+    return json.dumps({"messages": normalized, "options": options}, sort_keys=True)
+
+def make_cache_key(model: str, prompt_name: str, prompt_version: int, messages: list[dict], **options) -> str:
+    """
+    Builds the cache key: prompt name and version (for explicit invalidation), model, and a hash of
+    the normalized prompt.
+    """
+
+    digest = hashlib.sha256(normalize_prompt(messages, **options).encode()).hexdigest()
+    return f"llm:{prompt_name}:v{prompt_version}:{model}:{digest}"
+
+# Counters kept in the shared backend, outside the "llm:<prompt name>:" key space that invalidation deletes.
+GENERATION_PREFIX = "llm-generation:"
+STATS_PREFIX = "llm-stats:"
+
+class MemoryBackend:
+    """
+    In-process LRU with per-entry expiry. Fast, but private to each process.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int = None):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def counters(self, names: list[str]) -> list[int]:
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def incr(self, name: str):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+class RedisBackend:
+    """
+    Shared cache in the Redis instance Celery already uses, so every web and worker process benefits.
+    Redis hiccups are treated as misses rather than failing the LLM call.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        try:
+            value = self._redis.get(key)
+        except redis.RedisError as e:
+            print(f"LLM Cache: Redis lookup failed ({e}); treating as a miss.")
+            return None
+        return None if value is None else value.decode()
+
+    def set(self, key: str, value: str, ttl: int = None):
+        try:
+            self._redis.set(key, value, ex=ttl)
+        except redis.RedisError as e:
+            print(f"LLM Cache: Redis write failed ({e}).")
+
+    def delete_prefix(self, prefix: str) -> int:
+        deleted = 0
+        for key in self._redis.scan_iter(match=f"{prefix}*", count=500):
+            deleted += self._redis.delete(key)
+        return deleted
+
+    def counters(self, names: list[str]):
+        try:
+            values = self._redis.mget(names)
+        except redis.RedisError as e:
+            print(f"LLM Cache: Redis counter lookup failed ({e}).")
+            return None
+        return [int(value or 0) for value in values]
+
+    def incr(self, name: str):
+        try:
+            self._redis.incr(name)
+        except redis.RedisError as e:
+            print(f"LLM Cache: Redis counter update failed ({e}).")
+
+class LLMResponseCache:
+    """
+    Looks responses up through a list of backends (fastest first), back-filling the faster ones on a
+    hit further down, and keeps hit/miss counters.
+
+    The last backend is the most widely shared one (Redis, in the default configuration) and also holds
+    a generation counter per prompt and per prompt version, folded into every key: invalidating bumps
+    the counters, so every process stops using its in-memory entries for that prompt, not only this
+    one. Hit/miss counts are kept there too, so they cover every process (see shared_stats).
+    """
+
+    def __init__(self, backends: list, ttl: int = None, generation_refresh: float = 0):
+        self.backends = backends
+        self.ttl = ttl
+        self.generation_refresh = generation_refresh
+        self._shared = backends[-1] if backends else MemoryBackend()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, **{f"{b.name}_hits": 0 for b in backends}}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.stats[counter] += 1
+
+    def _generation(self, key: str) -> str:
+        """
+        The generation of the prompt (and prompt version) that 'key' belongs to, re-read from the shared
+        backend at most every 'generation_refresh' seconds. If it can't be read, the last known one is used.
+        """
+
+        _, prompt_name, prompt_version = key.split(":")[:3]
+        with self._lock:
+            generation, read_at = self._generations.get((prompt_name, prompt_version), ("g0.0", None))
+        if read_at is not None and time.monotonic() - read_at < self.generation_refresh:
+            return generation
+
+        counters = self._shared.counters([f"{GENERATION_PREFIX}{prompt_name}",
+                                          f"{GENERATION_PREFIX}{prompt_name}:{prompt_version}"])
+        if counters is not None:
+            generation = "g{}.{}".format(*counters)
+            with self._lock:
+                self._generations[(prompt_name, prompt_version)] = (generation, time.monotonic())
+        return generation
+
+    def get(self, key: str):
+        key = f"{key}:{self._generation(key)}"
+        for index, backend in enumerate(self.backends):
+            value = backend.get(key)
+            if value is not None:
+                for faster in self.backends[:index]:
+                    faster.set(key, value, self.ttl)
+                self._count("hits")
+                self._count(f"{backend.name}_hits")
+                self._shared.incr(f"{STATS_PREFIX}{backend.name}_hits")
+                return value
+
+        self._count("misses")
+        self._shared.incr(f"{STATS_PREFIX}misses")
+        return None
+
+    def set(self, key: str, value: str):
+        key = f"{key}:{self._generation(key)}"
+        for backend in self.backends:
+            backend.set(key, value, self.ttl)
+
+    def invalidate(self, prompt_name: str, prompt_version: int = None) -> int:
+        """
+        Drops cached responses for a prompt (optionally only one of its versions). Other processes stop
+        serving them from memory once they next read the generation counters.
+        """
+
+        self._shared.incr(f"{GENERATION_PREFIX}{prompt_name}"
+                          + (f":v{prompt_version}" if prompt_version is not None else ""))
+        with self._lock:
+            self._generations.clear()
+
+        prefix = f"llm:{prompt_name}:" + (f"v{prompt_version}:" if prompt_version is not None else "")
+        return sum(backend.delete_prefix(prefix) for backend in self.backends)
+
+    def shared_stats(self) -> dict:
+        """
+        Hits per backend and misses, summed over every process sharing the last backend.
+        """
+
+        names = [f"{b.name}_hits" for b in self.backends] + ["misses"]
+        counters = self._shared.counters([f"{STATS_PREFIX}{name}" for name in names])
+        return dict(zip(names, counters)) if counters is not None else {}
+
+_BACKEND_FACTORIES = {
+    "memory": lambda: MemoryBackend(settings.LLM_CACHE_MEMORY_ENTRIES),
+    "redis": lambda: RedisBackend(settings.LLM_CACHE_REDIS_URL),
+}
+
+_LLM_CACHE = None
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Returns the process-wide response cache, built from the backends listed in settings.
+    """
+
+    global _LLM_CACHE
+    if _LLM_CACHE is None:
+        backends = [_BACKEND_FACTORIES[name]() for name in settings.LLM_CACHE_BACKENDS]
+        _LLM_CACHE = LLMResponseCache(backends, ttl=settings.LLM_CACHE_TTL_SECONDS,
+                                      generation_refresh=settings.LLM_CACHE_GENERATION_REFRESH_SECONDS)
+    return _LLM_CACHE
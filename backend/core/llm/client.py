@@ -0,0 +1,188 @@
+from django.conf import settings
+from weakref import WeakKeyDictionary
+import redis.asyncio as aioredis
+import threading
+import asyncio
+import random
+import httpx
+import openai
+import os
+
+from .cache import get_llm_cache, make_cache_key
+from .ratelimit import TokenBucketLimiter
+
+# A rough, tokenizer-free estimate that is close enough for budgeting Llama prompts.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+# Every LLM call in the app goes through this module: the response cache, the shared (Redis) rate
+# limiter and the retry policy apply to all of them. Async clients and Redis connections are bound to
+# the event loop that created them, so each loop gets its own pooled set.
+_LOOP_RESOURCES = WeakKeyDictionary()
+
+def _loop_resources() -> dict:
+    loop = asyncio.get_running_loop()
+    resources = _LOOP_RESOURCES.get(loop)
+    if resources is None:
+        http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=settings.LLM_MAX_CONNECTIONS,
+                                                            max_keepalive_connections=settings.LLM_MAX_CONNECTIONS),
+                                        timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS))
+        redis_client = aioredis.Redis.from_url(settings.LLM_RATE_LIMIT_REDIS_URL)
+        resources = {
+            # Retries are handled below (with the shared limiter in the loop), not inside the SDK.
+            "client": openai.AsyncOpenAI(api_key=settings.GROQ_API_KEY, base_url=settings.LLM_BASE_URL,
+                                         http_client=http_client, max_retries=0),
+            "limiter": TokenBucketLimiter(redis_client, settings.LLM_REQUESTS_PER_MINUTE,
+                                          settings.LLM_TOKENS_PER_MINUTE),
+        }
+        _LOOP_RESOURCES[loop] = resources
+    return resources
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """
+    Full-jitter exponential backoff, stretched to honour a Retry-After header when the API sends one.
+    """
+
+    delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def _requested_tokens(messages: list[dict]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages) + settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+async def _settle_usage(messages: list[dict], usage):
+    """
+    The limiter was debited with an estimate before the call; corrects it by the usage the API reported.
+    """
+
+    if usage is not None:
+        await _loop_resources()["limiter"].settle(_requested_tokens(messages), usage.total_tokens)
+
+async def _create_with_retries(model: str, messages: list[dict], stream: bool = False, **options):
+    """
+    Waits for rate-limit budget, then calls the API; 429s and 5xx responses are retried with jittered
+    backoff (each retry waits for budget again). Streams also report their usage (in the last chunk), for
+    the caller to settle once the stream ends.
+    """
+
+    resources = _loop_resources()
+    requested_tokens = _requested_tokens(messages)
+    if stream:
+        options["stream_options"] = {"include_usage": True}
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        await resources["limiter"].acquire(requested_tokens)
+        try:
+            response = await resources["client"].chat.completions.create(model=model, messages=messages,
+                                                                         stream=stream, **options)
+        except Exception as e:
+            if attempt == settings.LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = _retry_delay(attempt, e)
+            print(f"LLM Client: {type(e).__name__} on attempt {attempt + 1}; retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            continue
+
+        if not stream:
+            await _settle_usage(messages, response.usage)
+        return response
+
+async def achat_completion(messages: list[dict], model: str, prompt_name: str, prompt_version: int,
+                           response_format: dict = None, validate=None, use_cache: bool = True) -> str:
+    """
+    Runs a chat completion and returns the message content, serving byte-identical (after whitespace
+    normalization) prompts from the response cache. 'validate' can reject a response (by raising)
+    before it is cached, e.g. JSON that doesn't parse.
+    """
+
+    cache = get_llm_cache()
+    options = {"response_format": response_format} if response_format else {}
+    key = make_cache_key(model, prompt_name, prompt_version, messages, **options)
+
+    if use_cache:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            print(f"LLM Client: Cache hit for '{prompt_name}' (v{prompt_version}).")
+            return cached
+
+    response = await _create_with_retries(model, messages, **options)
+    content = response.choices[0].message.content
+
+    if validate is not None:
+        validate(content)
+    if use_cache:
+        await asyncio.to_thread(cache.set, key, content)
+    return content
+
+async def astream_chat_completion(messages: list[dict], model: str, prompt_name: str, prompt_version: int,
+                                  use_cache: bool = True):
+    """
+    Streaming variant of achat_completion: yields the answer text as it is generated. A cached response
+    is yielded in one piece; a freshly generated one is cached once the stream completes.
+    """
+
+    cache = get_llm_cache()
+    key = make_cache_key(model, prompt_name, prompt_version, messages)
+
+    if use_cache:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            print(f"LLM Client: Cache hit for '{prompt_name}' (v{prompt_version}).")
+            yield cached
+            return
+
+    stream = await _create_with_retries(model, messages, stream=True)
+    parts, usage = [], None
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            yield delta
+        usage = getattr(chunk, "usage", None) or usage
+    await _settle_usage(messages, usage)
+
+    if use_cache:
+        await asyncio.to_thread(cache.set, key, "".join(parts))
+
+# Synchronous callers (Celery tasks, WSGI views) share one background event loop per process, so the
+# pooled connections survive from one call to the next.
+_BACKGROUND_LOOP = None
+_BACKGROUND_LOOP_PID = None
+_BACKGROUND_LOOP_LOCK = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _BACKGROUND_LOOP, _BACKGROUND_LOOP_PID
+    with _BACKGROUND_LOOP_LOCK:
+        # A forked Celery child inherits the variable but not the thread, so check the PID too.
+        if _BACKGROUND_LOOP is None or _BACKGROUND_LOOP_PID != os.getpid():
+            _BACKGROUND_LOOP = asyncio.new_event_loop()
+            _BACKGROUND_LOOP_PID = os.getpid()
+            threading.Thread(target=_BACKGROUND_LOOP.run_forever, name="llm-client-loop", daemon=True).start()
+        return _BACKGROUND_LOOP
+
+def run_sync(coroutine):
+    """
+    Runs a coroutine on the background LLM loop and blocks until it finishes.
+    """
+
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
+
+def chat_completion(*args, **kwargs) -> str:
+    """
+    Blocking wrapper around achat_completion (same arguments).
+    """
+
+    return run_sync(achat_completion(*args, **kwargs))
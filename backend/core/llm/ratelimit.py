@@ -0,0 +1,94 @@
+import redis.asyncio as aioredis
+import asyncio
+
+# Two token buckets (requests/min and tokens/min) refilled continuously and debited atomically, so
+# every web and worker process shares the provider's limits. Redis' own clock is used so that hosts
+# with drifting clocks still agree. Returns 0 when the request may proceed, or the milliseconds to
+# wait before trying again.
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + tonumber(now_parts[2]) / 1000
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local need = math.min(tonumber(ARGV[3]), tpm)
+
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, level + (now - ts) * capacity / 60000)
+end
+
+local requests = refill(KEYS[1], rpm)
+local tokens = refill(KEYS[2], tpm)
+
+local wait = 0
+if requests < 1 then wait = math.max(wait, (1 - requests) * 60000 / rpm) end
+if tokens < need then wait = math.max(wait, (need - tokens) * 60000 / tpm) end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - need
+end
+
+redis.call('HSET', KEYS[1], 'level', tostring(requests), 'ts', tostring(now))
+redis.call('HSET', KEYS[2], 'level', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], 120000)
+redis.call('PEXPIRE', KEYS[2], 120000)
+return math.ceil(wait)
+"""
+
+# Corrects the tokens bucket once a call's actual usage is known: 'delta' (estimate minus actual) tokens
+# are refunded, or charged when negative. A bucket that has already expired is left alone.
+_SETTLE_SCRIPT = """
+local tpm = tonumber(ARGV[1])
+local delta = tonumber(ARGV[2])
+local level = tonumber(redis.call('HGET', KEYS[1], 'level'))
+if level == nil then return 0 end
+redis.call('HSET', KEYS[1], 'level', tostring(math.min(tpm, level + delta)))
+return 0
+"""
+
+class TokenBucketLimiter:
+    """
+    Distributed requests/min + tokens/min limiter backed by Redis. If Redis is unreachable the limiter
+    fails open (the retry policy still backs off on 429s).
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, requests_per_minute: int, tokens_per_minute: int,
+                 namespace: str = "llm:ratelimit"):
+        self.redis = redis_client
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.keys = [f"{namespace}:requests", f"{namespace}:tokens"]
+        self._script = redis_client.register_script(_ACQUIRE_SCRIPT)
+        self._settle_script = redis_client.register_script(_SETTLE_SCRIPT)
+
+    async def acquire(self, tokens: int):
+        """
+        Waits until both buckets can cover one request of roughly 'tokens' tokens, then debits them.
+        """
+
+        while True:
+            try:
+                wait_ms = await self._script(keys=self.keys, args=[self.requests_per_minute,
+                                                                   self.tokens_per_minute, tokens])
+            except aioredis.RedisError as e:
+                print(f"LLM Rate Limiter: Redis unavailable ({e}); proceeding without a shared limit.")
+                return
+            if not wait_ms:
+                return
+            await asyncio.sleep(int(wait_ms) / 1000)
+
+    async def settle(self, estimated_tokens: int, used_tokens: int):
+        """
+        Replaces the estimate acquire() debited with the tokens the call actually used, so the bucket
+        tracks the provider's own count.
+        """
+
+        delta = min(estimated_tokens, self.tokens_per_minute) - used_tokens
+        if not delta:
+            return
+        try:
+            await self._settle_script(keys=self.keys[1:], args=[self.tokens_per_minute, delta])
+        except aioredis.RedisError as e:
+            print(f"LLM Rate Limiter: Redis unavailable ({e}); could not settle {used_tokens} used tokens.")
@@ -1,22 +1,62 @@
 from django.conf import settings
-import openai
+from .client import achat_completion, chat_completion, estimate_tokens, run_sync
+import asyncio
 import json
 
-# Configure the OpenAI client with our custom Groq API key.
-client = openai.OpenAI(api_key=settings.GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
+# Bump the matching version whenever a prompt changes meaningfully, so cached outputs are regenerated.
+SUMMARY_MODEL = "llama-3.3-70b-versatile"
+SUMMARY_PROMPT_VERSION = 1
+MASTER_SUMMARY_PROMPT_VERSION = 1
+MAP_PROMPT_VERSION = 2
+REDUCE_PROMPT_VERSION = 1
 
-def generate_video_summary(transcript_text: str):
+def split_into_windows(segments: list[dict], max_tokens: int) -> list[str]:
+    """
+    Groups consecutive Whisper segments into windows of at most 'max_tokens' (estimated), never
+    splitting a segment. A single oversized segment becomes its own window.
+    """
+
+    windows, current, current_tokens = [], [], 0
+    for segment in segments:
+        text = segment.get("text", "").strip()
+        if not text:
+            continue
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > max_tokens:
+            windows.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+def generate_video_summary(transcript_text: str, segments: list[dict] = None):
     """
     Converts the Whisper transcript into a comprehensive summary, presented as a punchy one-liner,
-    3-5 bullet points, and a full-length paragraph.
+    3-5 bullet points, and a full-length paragraph. Transcripts longer than the configured threshold
+    (with segments available) are summarized map-reduce style instead of in a single prompt.
+    """
+
+    if segments and estimate_tokens(transcript_text) > settings.SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS:
+        return generate_video_summary_map_reduce(segments)
+    return _generate_single_shot_summary(transcript_text)
+
+def _generate_single_shot_summary(transcript_text: str):
+    """
+    Summarizes the entire transcript in one prompt.
     """
     
     try:
         # The system-user role combination here helps the AI model prioritize/remember the core components of
         # the summary task and digest the complex specifics of the user prompt.
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        content = chat_completion(
+            model=SUMMARY_MODEL,
+            prompt_name="video_summary",
+            prompt_version=SUMMARY_PROMPT_VERSION,
             response_format={"type": "json_object"},
+            validate=json.loads,  # Never cache a response that isn't valid JSON.
             messages=[
                 {"role": "system",
                  "content": "You are an experienced sports analyst. Your task is to generate a structured summary from "
@@ -40,12 +80,101 @@ def generate_video_summary(transcript_text: str):
             ]
         )
 
-        summary_dict = json.loads(response.choices[0].message.content)
+        summary_dict = json.loads(content)
         return summary_dict
 
     except Exception as e:
         print(f"LLM failed to generate summary: {e}!")
         return {"error": str(e)}
+
+async def _summarize_window(window_text: str, index: int, total: int, semaphore: asyncio.Semaphore):
+    """
+    Map step: condense one window of the transcript into dense notes. Returns None if it fails.
+    """
+
+    # The prompt leaves out the number of parts, so a window's notes don't depend on how long the rest of
+    # the transcript turns out to be (see summarize_window).
+    prompt = f"""You are an experienced sports analyst. Below is part {index + 1} of a Seattle Seahawks 
+    press conference transcript. Write concise notes covering every newsworthy point in this part: 
+    injuries, roster and lineup decisions, game plan, evaluations of players, and notable direct quotes 
+    (keep quotes verbatim). Use short bullet points and do not add anything that isn't in the text.
+
+    Transcript part: {window_text}"""
+
+    async with semaphore:
+        try:
+            return await achat_completion(model=SUMMARY_MODEL, prompt_name="summary_map",
+                                          prompt_version=MAP_PROMPT_VERSION,
+                                          messages=[{"role": "user", "content": prompt}])
+        except Exception as e:
+            print(f"LLM failed to summarize window {index + 1}/{total}: {e}!")
+            return None
+
+async def _summarize_windows(windows: list[str]) -> list:
+    semaphore = asyncio.Semaphore(settings.SUMMARY_MAP_CONCURRENCY)
+    return await asyncio.gather(*(_summarize_window(text, i, len(windows), semaphore)
+                                  for i, text in enumerate(windows)))
+
+def summarize_window(window_text: str, index: int):
+    """
+    Runs the map step for a single window ahead of time. Windows are closed as soon as a later segment
+    starts a new one, so an incrementally transcribed video can have its early windows summarized while
+    the rest is still being transcribed; the map-reduce summary then finds them in the LLM response cache.
+    """
+
+    async def run():
+        return await _summarize_window(window_text, index, index + 1, asyncio.Semaphore(1))
+
+    return run_sync(run())
+
+def generate_video_summary_map_reduce(segments: list[dict]):
+    """
+    Map-reduce summary for long transcripts: the segments are split into token-budgeted windows, each
+    window is condensed concurrently, and the partial notes are reduced into the usual 'title' /
+    'one_sentence_summary' / 'key_bullet_points' JSON. If any window fails (after the client's own
+    retries), so does the summary: a summary missing part of the press conference would be stored and
+    cached as if it were complete. Rerunning the stage only repeats the failed windows, as the others
+    come from the LLM response cache.
+    """
+
+    windows = split_into_windows(segments, settings.SUMMARY_WINDOW_TOKENS)
+    print(f"LLM Service (Groq): Map-reduce summary over {len(windows)} windows...")
+
+    partials = run_sync(_summarize_windows(windows))
+    failed = [i + 1 for i, notes in enumerate(partials) if not notes]
+    if failed:
+        return {"error": f"Transcript windows {failed} (of {len(windows)}) failed to summarize."}
+
+    combined_notes = "\n\n".join(f"PART {i + 1}:\n{notes}" for i, notes in enumerate(partials))
+    try:
+        content = chat_completion(
+            model=SUMMARY_MODEL,
+            prompt_name="summary_reduce",
+            prompt_version=REDUCE_PROMPT_VERSION,
+            response_format={"type": "json_object"},
+            validate=json.loads,
+            messages=[
+                {"role": "system",
+                 "content": "You are an experienced sports analyst. Your task is to generate a structured summary from "
+                 "notes taken on consecutive parts of a press conference. The output must be a valid JSON object."},
+                {"role": "user",
+                 "content": f"""Combine the following notes into a single summary of the whole press conference. 
+                 Return a JSON object with three keys: 'title' (a catchy, newspaper-style headline), 
+                 'one_sentence_summary' (a single, concise sentence), and 'key_bullet_points' (a list of 3-5 
+                 important string bullet points). The bullets must be information dense and cover the key quotes / 
+                 takeaways across all parts, not just the first one.
+
+                 Correctly escape any special characters inside the JSON strings, and DO NOT output any text or 
+                 markdown before or after the JSON object.
+
+                 Notes: {combined_notes}"""}
+            ]
+        )
+        return json.loads(content)
+
+    except Exception as e:
+        print(f"LLM failed to reduce summary: {e}!")
+        return {"error": str(e)}
     
 def generate_master_summary(summaries: list[str]) -> str:
     """
@@ -72,11 +201,12 @@ def generate_master_summary(summaries: list[str]) -> str:
     """
     
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        return chat_completion(
+            model=SUMMARY_MODEL,
+            prompt_name="master_summary",
+            prompt_version=MASTER_SUMMARY_PROMPT_VERSION,
             messages=[{"role": "user", "content": prompt}]
         )
-        return response.choices[0].message.content
     except Exception as e:
         print(f"!!! LLM Error in generate_master_summary (Groq): {e} !!!")
         raise
\ No newline at end of file
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+import numpy as np
+import time
+
+from ...processing.preprocess import enhance_audio_stream
+from ...processing.sharded_enhance import enhance_sharded
+
+class Command(BaseCommand):
+    """
+    Reports the wall-clock speedup of sharded enhancement against shard count, and checks that each
+    sharded output matches the single-pass output within a tolerance.
+
+    Usage: python manage.py bench_enhance path/to/presser.m4a --shards 2 4 8 --min-snr-db 20
+    """
+
+    help = "Benchmark sharded audio enhancement against the single-pass FFmpeg graph."
+
+    def add_arguments(self, parser):
+        parser.add_argument("audio_file", help="Any audio file FFmpeg can read.")
+        parser.add_argument("--shards", type=int, nargs="+", default=[2, 4, 8])
+        parser.add_argument("--min-snr-db", type=float, default=20.0,
+                            help="Minimum signal-to-difference ratio vs. single pass to count as a match.")
+
+    @staticmethod
+    def _snr_db(reference: np.ndarray, candidate: np.ndarray) -> float:
+        """
+        Signal-to-difference ratio (in dB) between two waveforms, over their common length.
+        """
+
+        length = min(len(reference), len(candidate))
+        reference, candidate = reference[:length], candidate[:length]
+        noise = np.sum((reference - candidate) ** 2)
+        if noise == 0:
+            return float("inf")
+        return 10 * np.log10(np.sum(reference ** 2) / noise)
+
+    def handle(self, *args, **options):
+        audio_file = options["audio_file"]
+
+        started = time.perf_counter()
+        reference = enhance_audio_stream(audio_file)
+        baseline = time.perf_counter() - started
+        self.stdout.write(f"single pass: {baseline:.2f}s ({len(reference) / 16000:.1f}s of audio)")
+
+        failures = 0
+        for shards in options["shards"]:
+            started = time.perf_counter()
+            sharded = enhance_sharded(audio_file, shards)
+            elapsed = time.perf_counter() - started
+
+            snr = self._snr_db(reference, sharded)
+            matches = snr >= options["min_snr_db"]
+            failures += not matches
+            self.stdout.write(f"{shards:>3} shards: {elapsed:.2f}s, speedup {baseline / elapsed:.2f}x, "
+                              f"SNR vs. single pass {snr:.1f} dB [{'OK' if matches else 'MISMATCH'}]")
+
+        if failures:
+            raise SystemExit(1)
@@ -0,0 +1,180 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from datetime import datetime, timezone
+import platform
+import tempfile
+import json
+import os
+
+from ...benchmarks.fixtures import REPORTER_LINES, synth_press_conference, script_text
+from ...benchmarks.llm_standin import LocalLLMStandIn
+from ...benchmarks.runner import compare, git_commit, measure
+from ...processing.transcribe import (TRANSCRIPTION_PROFILES, alignment_pass, asr_pass, diarization_pass,
+                                      get_profile, warm_up_models)
+
+STAGES = ["enhance", "transcribe", "align", "diarize", "summarize", "embed", "retrieve"]
+
+class Command(BaseCommand):
+    """
+    Runs every pipeline stage on a deterministic synthetic press conference and reports each stage's
+    real-time factor, peak RSS and throughput. Results are written as JSON (tagged with the commit) and
+    can be compared against an earlier run to catch regressions.
+
+    Usage: python manage.py bench_pipeline --duration 600 --profile fast --compare benchmark_results/abc1234.json
+    """
+
+    help = "Benchmark the processing pipeline end to end on synthetic press conference audio."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=300.0, help="Seconds of synthetic audio.")
+        parser.add_argument("--seed", type=int, default=0, help="Fixture seed (same seed, same audio).")
+        parser.add_argument("--profile", choices=list(TRANSCRIPTION_PROFILES), default=None,
+                            help="Transcription profile (the configured default if omitted).")
+        parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+        parser.add_argument("--llm-latency", type=float, default=0.0,
+                            help="Simulated seconds per completion from the local LLM stand-in.")
+        parser.add_argument("--output", default=None, help="Result file (default: BENCHMARK_RESULTS_DIR/<commit>.json).")
+        parser.add_argument("--compare", default=None, help="An earlier result file to compare against.")
+        parser.add_argument("--tolerance", type=float, default=0.15,
+                            help="Allowed slowdown (or RSS growth) per stage before it counts as a regression.")
+
+    def handle(self, *args, **options):
+        duration, stages = options["duration"], options["stages"]
+        profile_name = options["profile"] or settings.TRANSCRIPTION_PROFILE
+
+        audio, script = synth_press_conference(duration, seed=options["seed"])
+        self.stdout.write(f"Fixture: {duration:.0f}s of synthetic audio, {len(script)} turns (seed {options['seed']}).")
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+            self._audio_stages(audio, stages, profile_name, workdir, results)
+            self._text_stages(script, stages, options["llm_latency"], workdir, results, duration)
+
+        report = {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                        "cpus": os.cpu_count()},
+            "fixture": {"duration_seconds": duration, "seed": options["seed"], "turns": len(script)},
+            "profile": profile_name,
+            "stages": {stage: result.as_dict() for stage, result in results.items()},
+        }
+
+        output = options["output"] or os.path.join(settings.BENCHMARK_RESULTS_DIR,
+                                                   f"{report['commit'] or 'unversioned'}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {output}.")
+
+        if options["compare"]:
+            self._compare(options["compare"], report, options["tolerance"])
+
+    def _run(self, results: dict, stage: str, fn, audio_seconds: float, **kwargs):
+        value, result = measure(stage, fn, audio_seconds, **kwargs)
+        results[stage] = result
+        self.stdout.write(str(result))
+        return value
+
+    def _audio_stages(self, audio, stages: list[str], profile_name: str, workdir: str, results: dict):
+        """
+        Enhancement and the three WhisperX passes. Models are warmed first, so the numbers reflect a
+        worker's steady state rather than load time.
+        """
+
+        duration = len(audio) / 16000
+
+        if "enhance" in stages:
+            from ...processing.preprocess import audio_enhance
+            from ...processing.sharded_enhance import write_wav
+            import whisperx
+
+            raw_path, enhanced_path = os.path.join(workdir, "raw.wav"), os.path.join(workdir, "enhanced.wav")
+            write_wav(audio, raw_path)
+            self._run(results, "enhance", lambda: audio_enhance(raw_path, enhanced_path), duration)
+            audio = whisperx.load_audio(enhanced_path)
+
+        if not {"transcribe", "align", "diarize"} & set(stages):
+            return
+
+        profile = get_profile(profile_name)
+        warm_up_models(profile_name)
+
+        result = self._run(results, "transcribe", lambda: asr_pass(audio, profile), duration)
+        if "align" in stages and result["segments"]:
+            result.update(self._run(results, "align",
+                                    lambda: alignment_pass(result["segments"], audio, profile, result["language"]),
+                                    duration, items=len(result["segments"]), item_name="segments"))
+        if "diarize" in stages and profile["diarize"]:
+            self._run(results, "diarize", lambda: diarization_pass(result, audio, profile), duration)
+
+    def _text_stages(self, script: list[dict], stages: list[str], llm_latency: float, workdir: str, results: dict,
+                     duration: float):
+        """
+        Summarization (against the local LLM stand-in), embedding and retrieval, on the fixture's script
+        so that the text is the same whatever the ASR made of the synthetic audio.
+        """
+
+        text = script_text(script)
+
+        if "summarize" in stages:
+            from ...llm import cache as llm_cache
+            from ...llm.services import generate_video_summary
+
+            standin = LocalLLMStandIn(latency_seconds=llm_latency)
+            # No response cache (every run must reach the "model") and no meaningful rate limit. The LLM
+            # client is built on first use, so nothing may have called it before this point.
+            with override_settings(LLM_BASE_URL=standin.base_url, LLM_CACHE_BACKENDS=[], GROQ_API_KEY="standin",
+                                   LLM_REQUESTS_PER_MINUTE=10 ** 6, LLM_TOKENS_PER_MINUTE=10 ** 9):
+                llm_cache._LLM_CACHE = None
+                try:
+                    _, result = measure("summarize", lambda: generate_video_summary(text, script), duration)
+                    result.items, result.item_name = standin.requests, "requests"
+                    results["summarize"] = result
+                    self.stdout.write(str(result))
+                finally:
+                    llm_cache._LLM_CACHE = None
+                    standin.close()
+
+        if not {"embed", "retrieve"} & set(stages):
+            return
+
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        from langchain_community.vectorstores import Chroma
+        from ...rag.engine import get_retrieval_engine
+
+        # Same chunking as create_video_embeddings.
+        chunks = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200,
+                                                length_function=len).split_text(text)
+        encoder = get_retrieval_engine().encoder
+        encoder.embed_documents(chunks[:1])  # Warm-up.
+
+        self._run(results, "embed", lambda: encoder.embed_documents(chunks), duration,
+                            items=len(chunks), item_name="chunks")
+
+        if "retrieve" in stages:
+            # A throwaway collection, so the benchmark never touches the real index.
+            store = Chroma(collection_name="bench_pipeline", embedding_function=encoder,
+                           persist_directory=os.path.join(workdir, "chroma"))
+            store.add_texts(texts=chunks, metadatas=[{"video_id": 0} for _ in chunks])
+            questions = REPORTER_LINES * 5
+
+            def retrieve():
+                for question in questions:
+                    store.similarity_search_by_vector(encoder.embed_query(question), k=3)
+
+            self._run(results, "retrieve", retrieve, duration, items=len(questions), item_name="queries")
+
+    def _compare(self, baseline_path: str, report: dict, tolerance: float):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        self.stdout.write(f"\nCompared with {baseline.get('commit')} (tolerance {tolerance:.0%}):")
+        regressions = 0
+        for stage, metric, before, after, ratio, regressed in compare(baseline, report, tolerance):
+            regressions += regressed
+            self.stdout.write(f"{stage:>10} {metric:>12}: {before:10.3f} -> {after:10.3f} ({ratio:.2f}x)"
+                              f"{'  REGRESSION' if regressed else ''}")
+        if regressions:
+            raise SystemExit(1)
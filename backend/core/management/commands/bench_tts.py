@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+import tempfile
+import time
+import os
+
+from ...tts.services import LocalSynthesizer, produce_tts_audio
+
+SAMPLE_SCRIPT = (
+    "Welcome to the Seahawks Daily Digest. Head coach Mike Macdonald opened by updating the injury report. "
+    "The starting quarterback was a full participant in practice and is expected to play on Sunday. "
+    "Two starters on the offensive line remain limited with ankle injuries. "
+    "The defensive coordinator praised the pass rush, calling it the best stretch of the season so far. "
+    "Special teams will get extra work this week after two missed field goals. "
+    "That's the latest from the Seahawks sideline. Tune in next time for your daily digest."
+)
+
+class Command(BaseCommand):
+    """
+    Compares single-request and chunked TTS synthesis against the local stand-in synthesizer.
+
+    Usage: python manage.py bench_tts --latency 0.3 --seconds-per-char 0.004 --parallel 4
+    """
+
+    help = "Benchmark time-to-first-audio and total time for single-shot vs. chunked TTS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--latency", type=float, default=0.3, help="Simulated round-trip per request.")
+        parser.add_argument("--seconds-per-char", type=float, default=0.004, help="Simulated synthesis speed.")
+        parser.add_argument("--parallel", type=int, default=4)
+
+    def _run(self, synthesizer, chunked: bool, parallel: int):
+        first_chunk = {}
+        with tempfile.TemporaryDirectory() as tmp_dir, override_settings(TTS_CHUNKED=chunked,
+                                                                         TTS_MAX_PARALLEL=parallel):
+            output_path = os.path.join(tmp_dir, "digest.mp3")
+            started = time.perf_counter()
+            produce_tts_audio(SAMPLE_SCRIPT, output_path, synthesizer=synthesizer,
+                              on_first_chunk=lambda path: first_chunk.setdefault("at", time.perf_counter()),
+                              use_cache=False)
+            finished = time.perf_counter()
+        return first_chunk.get("at", finished) - started, finished - started
+
+    def handle(self, *args, **options):
+        synthesizer = LocalSynthesizer(latency_seconds=options["latency"],
+                                       seconds_per_char=options["seconds_per_char"])
+
+        for label, chunked in (("single request", False), ("chunked", True)):
+            first, total = self._run(synthesizer, chunked, options["parallel"])
+            self.stdout.write(f"{label:>14}: first audio after {first:.2f}s, complete after {total:.2f}s")
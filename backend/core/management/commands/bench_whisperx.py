@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from statistics import mean, median
+import time
+
+from ...processing import model_registry
+from ...processing.transcribe import TRANSCRIPTION_PROFILES, run_whisperx, warm_up_models
+
+class Command(BaseCommand):
+    """
+    Compares steady-state per-video WhisperX latency with and without the resident model registry.
+
+    Usage: python manage.py bench_whisperx path/to/enhanced.wav --runs 3 --profile fast
+    """
+
+    help = "Benchmark run_whisperx latency with cold model loads vs. the resident model registry."
+
+    def add_arguments(self, parser):
+        parser.add_argument("audio_file", help="A 16kHz mono WAV, as produced by audio_enhance.")
+        parser.add_argument("--runs", type=int, default=3, help="Videos to simulate per mode.")
+        parser.add_argument("--profile", choices=list(TRANSCRIPTION_PROFILES), default=None,
+                            help="Transcription profile (the configured default if omitted).")
+
+    def _time_runs(self, audio_file: str, runs: int, cold: bool, profile: str = None) -> list[float]:
+        """
+        Runs the transcription 'runs' times, optionally dropping every model between videos.
+        """
+
+        latencies = []
+        for _ in range(runs):
+            if cold:
+                model_registry.clear()
+            started = time.perf_counter()
+            run_whisperx(audio_file, profile_name=profile)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    def handle(self, *args, **options):
+        audio_file, runs, profile = options["audio_file"], options["runs"], options["profile"]
+
+        # Without the registry: every video loads ASR, alignment and diarization from scratch.
+        cold = self._time_runs(audio_file, runs, cold=True, profile=profile)
+
+        # With the registry: warm once (as a worker does on start), then reuse across videos.
+        model_registry.clear()
+        warm_up_models(profile)
+        warm = self._time_runs(audio_file, runs, cold=False, profile=profile)
+
+        for label, latencies in (("without registry", cold), ("with registry", warm)):
+            self.stdout.write(f"{label:>17}: mean {mean(latencies):.2f}s, median {median(latencies):.2f}s "
+                              f"over {runs} runs")
+        self.stdout.write(f"steady-state speedup: {mean(cold) / mean(warm):.2f}x")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from ...cache.responses import invalidate_video
+from ...models import Transcript, Video
+
+class Command(BaseCommand):
+    """
+    Moves transcripts stored as raw WhisperX JSON on Video.transcript_data (videos processed before the
+    compact Transcript table existed) into the compact representation, then clears the JSON column.
+
+    Usage: python manage.py compact_transcripts [--keep-json]
+    """
+
+    help = "Convert legacy JSON transcripts into compact Transcript rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-json", action="store_true", help="Leave Video.transcript_data in place.")
+
+    def handle(self, *args, **options):
+        video_ids = list(Video.objects.filter(transcript_data__isnull=False, transcript__isnull=True)
+                         .values_list("id", flat=True))
+        for video_id in video_ids:
+            # Load one blob at a time to keep memory flat on large archives.
+            transcript_data = Video.objects.values_list("transcript_data", flat=True).get(id=video_id)
+            transcript = Transcript.store(video_id, transcript_data)
+            if not options["keep_json"]:
+                Video.objects.filter(id=video_id).update(transcript_data=None)
+            invalidate_video(video_id)
+            self.stdout.write(f"Video {video_id}: {transcript.segment_count} segments, "
+                              f"{transcript.word_count} words, {len(transcript.data)} bytes.")
+
+        self.stdout.write(f"Compacted {len(video_ids)} transcripts.")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from ...cache.responses import bump_version
+from ...models import Video
+from ...processing.ner_utils import infer_people_from_titles
+
+class Command(BaseCommand):
+    """
+    Backfills Video.speaker from the video titles in one batch (gazetteer first, then spaCy's nlp.pipe
+    for the rest).
+
+    Usage: python manage.py infer_speakers [--all]
+    """
+
+    help = "Infer the speaker of every video without one (or of all videos with --all) from its title."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-infer speakers that are already set.")
+        parser.add_argument("--batch-size", type=int, default=256)
+
+    def handle(self, *args, **options):
+        videos = Video.objects.exclude(title="").only("id", "title", "speaker")
+        if not options["all"]:
+            videos = videos.filter(speaker__isnull=True)
+        videos = list(videos)
+
+        speakers = infer_people_from_titles([video.title for video in videos], batch_size=options["batch_size"])
+        changed = []
+        for video, speaker in zip(videos, speakers):
+            if speaker and speaker != video.speaker:
+                video.speaker = speaker
+                changed.append(video)
+
+        # bulk_update skips the save signals, so invalidate the cached listing directly.
+        Video.objects.bulk_update(changed, ["speaker"], batch_size=500)
+        for video in changed:
+            bump_version(f"video:{video.id}")
+        bump_version("videos")
+        self.stdout.write(f"Inferred speakers for {len(changed)} of {len(videos)} videos.")
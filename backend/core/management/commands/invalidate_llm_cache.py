@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ...llm.cache import get_llm_cache
+
+class Command(BaseCommand):
+    """
+    Drops cached LLM responses for a prompt, e.g. after editing it without bumping its version.
+
+    Usage: python manage.py invalidate_llm_cache video_summary --prompt-version 1
+    """
+
+    help = "Invalidate cached LLM responses by prompt name (and optionally prompt version)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("prompt_name", choices=["video_summary", "summary_map", "summary_reduce",
+                                                           "master_summary", "rag_answer"])
+        parser.add_argument("--prompt-version", type=int, default=None)
+
+    def handle(self, *args, **options):
+        deleted = get_llm_cache().invalidate(options["prompt_name"], options["prompt_version"])
+        self.stdout.write(f"Invalidated {deleted} cached responses.")
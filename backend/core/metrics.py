@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.db.models import Aggregate, Count, FloatField, Q, Sum
+from django.utils import timezone
+from contextlib import contextmanager
+from datetime import timedelta
+import time
+
+from .llm.cache import get_llm_cache
+from .models import PipelineRun, StageTiming
+
+# Pipeline timing records: every run of the video pipeline or of a digest build gets a PipelineRun, and
+# each of its stages a StageTiming (see record_stage). The /api/metrics endpoint aggregates them into
+# Prometheus histograms and recent p50/p95 gauges per stage.
+
+def start_run(kind: str, video_id: int = None, digest_id: int = None, job_id: str = "", profile: str = None) -> int:
+    """
+    Records the start of a run and returns its ID (carried along in the job dict as 'run_id').
+    """
+
+    return PipelineRun.objects.create(kind=kind, video_id=video_id, digest_id=digest_id, job_id=job_id,
+                                      profile=profile).id
+
+def finish_run(run_id: int, status: str, audio_seconds: float = None, error: Exception = None):
+    if run_id is None:
+        return
+    fields = {"status": status, "finished_at": timezone.now(), "error": str(error) if error else ""}
+    if audio_seconds is not None:
+        fields["audio_seconds"] = audio_seconds
+    PipelineRun.objects.filter(id=run_id).update(**fields)
+
+@contextmanager
+def record_stage(job: dict, stage: str, **fields):
+    """
+    Times the block as one stage of the job's run and saves a StageTiming when it ends. The block can
+    fill in what it learns on the yielded (unsaved) record: 'audio_seconds', 'bytes_processed', 'model',
+    or outcome='cached'. An exception marks the stage 'failed' and propagates.
+
+    The job dict's 'enqueued_at' (a Unix timestamp) gives the queue wait; it is reset when the block
+    ends, which is when the chain hands the job to the next stage.
+    """
+
+    timing = StageTiming(run_id=job.get("run_id"), stage=stage, profile=job.get("profile"),
+                         started_at=timezone.now(), **fields)
+    if job.get("enqueued_at"):
+        timing.queue_wait_seconds = max(0.0, time.time() - job["enqueued_at"])
+
+    started = time.perf_counter()
+    try:
+        yield timing
+    except Exception as e:
+        timing.outcome, timing.error = "failed", str(e)
+        raise
+    finally:
+        timing.duration_seconds = time.perf_counter() - started
+        timing.finished_at = timezone.now()
+        if timing.audio_seconds:
+            timing.rtf = timing.duration_seconds / timing.audio_seconds
+        if timing.run_id is not None:
+            timing.save()
+        job["enqueued_at"] = time.time()
+
+# Exposition.
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+QUEUE_WAIT_BUCKETS = (0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600)
+RTF_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4)
+QUANTILES = (0.5, 0.95)
+
+# (metric name, StageTiming field, buckets, help). Durations and RTFs of cached stages say nothing about
+# the stage's cost, so only 'ok' stages count towards them; every stage waited in its queue.
+HISTOGRAMS = [
+    ("pipeline_stage_duration_seconds", "duration_seconds", DURATION_BUCKETS,
+     "Wall-clock seconds per pipeline stage (stages that ran, not cache hits)."),
+    ("pipeline_stage_queue_wait_seconds", "queue_wait_seconds", QUEUE_WAIT_BUCKETS,
+     "Seconds a job waited in the queue before the stage started."),
+    ("pipeline_stage_rtf", "rtf", RTF_BUCKETS,
+     "Real-time factor (processing seconds per second of audio) of audio stages."),
+]
+
+def _only_ran(field: str) -> Q:
+    return Q() if field == "queue_wait_seconds" else Q(outcome="ok")
+
+class Percentile(Aggregate):
+    """
+    PostgreSQL's PERCENTILE_CONT(fraction) WITHIN GROUP (ORDER BY expression); NULLs are ignored.
+    """
+
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction: float, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+def _number(value) -> str:
+    return "NaN" if value is None else str(value)
+
+def render_prometheus() -> str:
+    """
+    Renders the stage timings in the Prometheus text exposition format: all-time histograms of stage
+    duration, queue wait and RTF; p50/p95 of the same over the last PIPELINE_METRICS_WINDOW_HOURS; and
+    counters of stage outcomes and runs. Four aggregate queries, however many rows there are. The LLM
+    response cache's hit/miss counters (shared by every process) are appended.
+    """
+
+    lines = []
+
+    # One grouped query for every bucket of every histogram (buckets are cumulative, hence 'lte').
+    aggregates = {}
+    for i, (_, field, buckets, _) in enumerate(HISTOGRAMS):
+        condition = _only_ran(field) & Q(**{f"{field}__isnull": False})
+        for j, bound in enumerate(buckets):
+            aggregates[f"h{i}_b{j}"] = Count("id", filter=condition & Q(**{f"{field}__lte": bound}))
+        aggregates[f"h{i}_count"] = Count("id", filter=condition)
+        aggregates[f"h{i}_sum"] = Sum(field, filter=condition)
+    rows = list(StageTiming.objects.values("stage").annotate(**aggregates).order_by("stage"))
+
+    for i, (name, _, buckets, help_text) in enumerate(HISTOGRAMS):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for row in rows:
+            if not row[f"h{i}_count"]:
+                continue
+            for j, bound in enumerate(buckets):
+                lines.append(f"{name}_bucket{_labels(stage=row['stage'], le=bound)} {row[f'h{i}_b{j}']}")
+            lines.append(f"{name}_bucket{_labels(stage=row['stage'], le='+Inf')} {row[f'h{i}_count']}")
+            lines.append(f"{name}_sum{_labels(stage=row['stage'])} {_number(row[f'h{i}_sum'])}")
+            lines.append(f"{name}_count{_labels(stage=row['stage'])} {row[f'h{i}_count']}")
+
+    # Recent percentiles, computed by PostgreSQL over the window.
+    since = timezone.now() - timedelta(hours=settings.PIPELINE_METRICS_WINDOW_HOURS)
+    percentiles = {f"h{i}_q{k}": Percentile(field, quantile, filter=_only_ran(field))
+                   for i, (_, field, _, _) in enumerate(HISTOGRAMS) for k, quantile in enumerate(QUANTILES)}
+    recent = list(StageTiming.objects.filter(started_at__gte=since).values("stage")
+                  .annotate(**percentiles).order_by("stage"))
+
+    for i, (name, _, _, _) in enumerate(HISTOGRAMS):
+        gauge = f"{name}_recent"
+        lines += [f"# HELP {gauge} Quantiles of {name} over the last {settings.PIPELINE_METRICS_WINDOW_HOURS}h.",
+                  f"# TYPE {gauge} gauge"]
+        for row in recent:
+            for k, quantile in enumerate(QUANTILES):
+                if row[f"h{i}_q{k}"] is not None:
+                    lines.append(f"{gauge}{_labels(stage=row['stage'], quantile=quantile)} "
+                                 f"{_number(row[f'h{i}_q{k}'])}")
+
+    lines += ["# HELP pipeline_stage_total Pipeline stages by outcome (ok, cached or failed).",
+              "# TYPE pipeline_stage_total counter"]
+    for row in StageTiming.objects.values("stage", "outcome").annotate(n=Count("id")).order_by("stage", "outcome"):
+        lines.append(f"pipeline_stage_total{_labels(stage=row['stage'], outcome=row['outcome'])} {row['n']}")
+
+    lines += ["# HELP pipeline_runs_total Pipeline runs by kind and status (PROCESSING runs are in flight).",
+              "# TYPE pipeline_runs_total counter"]
+    for row in PipelineRun.objects.values("kind", "status").annotate(n=Count("id")).order_by("kind", "status"):
+        lines.append(f"pipeline_runs_total{_labels(kind=row['kind'], status=row['status'])} {row['n']}")
+
+    lines += ["# HELP llm_cache_lookups_total LLM response cache lookups, by the backend that hit (or miss).",
+              "# TYPE llm_cache_lookups_total counter"]
+    for name, count in get_llm_cache().shared_stats().items():
+        result = "miss" if name == "misses" else name.removesuffix("_hits")
+        lines.append(f"llm_cache_lookups_total{_labels(result=result)} {count}")
+
+    return "\n".join(lines) + "\n"
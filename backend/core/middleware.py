@@ -0,0 +1,78 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import QueryTracker
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL queries, rows and bytes behind each API request, logs them and (when enabled) reports
+    them in an 'X-DB-Stats' response header for debugging. Runs natively under both WSGI and ASGI, so the
+    async streaming views (progress SSE) are not pushed through a sync thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        tracker = QueryTracker()
+        tracker.start()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            tracker.stop()
+            raise
+        return self._report(request, response, tracker)
+
+    async def __acall__(self, request):
+        if not request.path.startswith("/api/"):
+            return await self.get_response(request)
+
+        tracker = QueryTracker()
+        tracker.start()
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            tracker.stop()
+            raise
+        return self._report(request, response, tracker)
+
+    def _report(self, request, response, tracker):
+        if response.streaming:
+            # The body runs after the view returns, so the totals are only known (and logged) once it ends.
+            stream = self._astream if response.is_async else self._stream
+            response.streaming_content = stream(request, response, tracker, response.streaming_content)
+            return response
+
+        stats = tracker.stop()
+        self._log(request, response, stats)
+        if settings.DB_STATS_HEADER:
+            response["X-DB-Stats"] = "; ".join(f"{name}={value}" for name, value in stats.as_dict().items())
+        return response
+
+    def _stream(self, request, response, tracker, content):
+        try:
+            yield from content
+        finally:
+            self._log(request, response, tracker.stop())
+
+    async def _astream(self, request, response, tracker, content):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            self._log(request, response, tracker.stop())
+
+    def _log(self, request, response, stats):
+        if settings.DB_STATS_LOG:
+            print(f"DB Stats: {request.method} {request.path} ({response.status_code}): {stats}.")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_video_published_at_video_speaker_video_thumbnail_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailydigest",
+            name="fingerprint",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:02
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_dailydigest_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                django.db.models.expressions.OrderBy(
+                    models.F("published_at"), descending=True, nulls_last=True
+                ),
+                django.db.models.expressions.OrderBy(models.F("id"), descending=True),
+                name="video_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                models.F("status"),
+                django.db.models.expressions.OrderBy(
+                    models.F("published_at"), descending=True, nulls_last=True
+                ),
+                django.db.models.expressions.OrderBy(models.F("id"), descending=True),
+                include=("youtube_url", "title", "thumbnail_url", "speaker"),
+                name="video_status_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                models.F("speaker"),
+                django.db.models.expressions.OrderBy(
+                    models.F("published_at"), descending=True, nulls_last=True
+                ),
+                django.db.models.expressions.OrderBy(models.F("id"), descending=True),
+                name="video_speaker_published_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_transcript"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaylistSync",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("playlist_id", models.CharField(max_length=64, unique=True)),
+                ("etag", models.CharField(blank=True, max_length=128, null=True)),
+                ("last_synced_at", models.DateTimeField(blank=True, null=True)),
+                ("last_new_videos", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_playlistsync"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="transcription_profile",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_video_transcription_profile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PipelineRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("video", "Video"),
+                            ("upgrade", "Transcript upgrade"),
+                            ("digest", "Daily digest"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("job_id", models.CharField(blank=True, max_length=36)),
+                ("profile", models.CharField(blank=True, max_length=16, null=True)),
+                ("status", models.CharField(default="PROCESSING", max_length=20)),
+                ("error", models.TextField(blank=True)),
+                ("audio_seconds", models.FloatField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "digest",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="pipeline_runs",
+                        to="core.dailydigest",
+                    ),
+                ),
+                (
+                    "video",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="pipeline_runs",
+                        to="core.video",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StageTiming",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stage", models.CharField(max_length=32)),
+                ("outcome", models.CharField(default="ok", max_length=16)),
+                ("error", models.TextField(blank=True)),
+                ("model", models.CharField(blank=True, max_length=128)),
+                ("profile", models.CharField(blank=True, max_length=16, null=True)),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField()),
+                ("duration_seconds", models.FloatField()),
+                ("queue_wait_seconds", models.FloatField(blank=True, null=True)),
+                ("audio_seconds", models.FloatField(blank=True, null=True)),
+                ("rtf", models.FloatField(blank=True, null=True)),
+                ("bytes_processed", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stages",
+                        to="core.pipelinerun",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["started_at", "stage"], name="stagetiming_started_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_pipelinerun_stagetiming"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transcript",
+            name="committed_seconds",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transcript",
+            name="refinement",
+            field=models.CharField(
+                choices=[("asr", "ASR only"), ("final", "Aligned and diarized")], default="final", max_length=8
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_transcript_refinement"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="skipped_audio_fraction",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
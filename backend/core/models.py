@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import F
+
+from .processing.compact_transcript import CompactTranscript
 
 class Video(models.Model):
     """
@@ -22,7 +25,16 @@ class Video(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
 
-    # Flexible JSON fields to store the raw Whisper transcript and LLM-generated summaries.
+    # The transcription profile ('fast', 'balanced' or 'full') behind the current transcript, so a quick
+    # transcript can be spotted and upgraded later.
+    transcription_profile = models.CharField(max_length=16, blank=True, null=True)
+
+    # Share of the audio cut as dead air (pre-show, walk-ups, long silences) before enhancement and
+    # transcription; None for videos processed without trimming.
+    skipped_audio_fraction = models.FloatField(blank=True, null=True)
+
+    # Flexible JSON fields to store the LLM-generated summaries (and, for videos processed before the
+    # compact Transcript table existed, the raw Whisper transcript).
     transcript_data = models.JSONField(null=True, blank=True)
     summary_data = models.JSONField(null=True, blank=True)
 
@@ -30,10 +42,86 @@ class Video(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Back the video listing (newest first, optionally by status or speaker) with matching indexes. The
+    # listing columns are included so the common status-filtered page can be served by an index-only scan.
+    class Meta:
+        indexes = [
+            models.Index(F("published_at").desc(nulls_last=True), F("id").desc(), name="video_published_idx"),
+            models.Index(F("status"), F("published_at").desc(nulls_last=True), F("id").desc(),
+                         name="video_status_published_idx",
+                         include=["youtube_url", "title", "thumbnail_url", "speaker"]),
+            models.Index(F("speaker"), F("published_at").desc(nulls_last=True), F("id").desc(),
+                         name="video_speaker_published_idx"),
+        ]
+
     # Provides a readable to-string implementation for the Django admin.
     def __str__(self):
         return f"Title: {self.title} ({self.youtube_url})."
 
+class Transcript(models.Model):
+    """
+    Compact, columnar copy of a video's WhisperX transcript (see processing/compact_transcript.py), with
+    the commonly needed derived fields precomputed so most readers never decode the arrays.
+    """
+
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name='transcript')
+
+    # Compressed word/segment arrays and the speaker labels their indices refer to.
+    data = models.BinaryField()
+    speakers = models.JSONField(default=list)
+
+    # Derived fields.
+    full_text = models.TextField(blank=True)
+    duration = models.FloatField(default=0.0)
+    segment_count = models.PositiveIntegerField(default=0)
+    word_count = models.PositiveIntegerField(default=0)
+    speaker_talk_time = models.JSONField(default=dict)
+
+    # Incremental transcription commits the transcript window by window: 'asr' while windows are still
+    # being transcribed (segment text and times only, up to 'committed_seconds' of the video), then
+    # 'final' once alignment and diarization have refined it.
+    REFINEMENT_CHOICES = [('asr', 'ASR only'), ('final', 'Aligned and diarized')]
+    refinement = models.CharField(max_length=8, choices=REFINEMENT_CHOICES, default='final')
+    committed_seconds = models.FloatField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def load(self):
+        """
+        Decodes the arrays (once per instance).
+        """
+
+        if not hasattr(self, "_compact"):
+            self._compact = CompactTranscript.from_bytes(self.data, self.speakers)
+        return self._compact
+
+    @classmethod
+    def store(cls, video_id: int, whisperx_result: dict, refinement: str = 'final',
+              committed_seconds: float = None) -> "Transcript":
+        """
+        Creates or replaces the compact transcript of a video from a WhisperX result (or, for a partial
+        transcript, from the ASR segments committed so far).
+        """
+
+        compact = CompactTranscript.from_whisperx(whisperx_result)
+        transcript, _ = cls.objects.update_or_create(video_id=video_id, defaults={
+            "data": compact.to_bytes(),
+            "speakers": compact.speakers,
+            "full_text": compact.full_text,
+            "duration": compact.duration,
+            "segment_count": len(compact),
+            "word_count": compact.word_count,
+            "speaker_talk_time": compact.speaker_talk_time,
+            "refinement": refinement,
+            "committed_seconds": committed_seconds,
+        })
+        transcript._compact = compact
+        return transcript
+
+    def __str__(self):
+        return f"Transcript of video {self.video_id} ({self.segment_count} segments)."
+
 class DailyDigest(models.Model):
     """
     Captures a single, AI/TTS-generated audio digest compiled from a batch of videos.
@@ -47,6 +135,10 @@ class DailyDigest(models.Model):
     audio_url = models.CharField(max_length=512, blank=True, null=True)
     status = models.CharField(max_length=20, default='PENDING')
 
+    # Identifies the inputs of the digest (videos, their summaries and the voice), so that a digest
+    # with identical inputs can reuse an earlier digest's script and audio instead of regenerating them.
+    fingerprint = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+
     # This code creates a many-to-many relationship. A single Digest can be associated with many 
     # Videos, and a single Video could potentially be part of many Digests.
     videos = models.ManyToManyField(Video, related_name='digests')
@@ -54,4 +146,81 @@ class DailyDigest(models.Model):
     # Similar to the Video model, we include a string-form representation of the digest.
     def __str__(self):
         return f"Daily digest for {self.digest_date}."
-    
\ No newline at end of file
+    
+class PlaylistSync(models.Model):
+    """
+    Bookkeeping for the periodic playlist sync: the ETag of the playlist's first page (for conditional
+    requests) and when it last ran.
+    """
+
+    playlist_id = models.CharField(max_length=64, unique=True)
+    etag = models.CharField(max_length=128, blank=True, null=True)
+    last_synced_at = models.DateTimeField(blank=True, null=True)
+    last_new_videos = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sync state of playlist {self.playlist_id}."
+
+class PipelineRun(models.Model):
+    """
+    One run of the video pipeline (or of a video's transcript upgrade, or of a digest build), with a
+    StageTiming per stage it went through. Feeds the metrics endpoint (see core/metrics.py).
+    """
+
+    KIND_CHOICES = [
+        ('video', 'Video'),
+        ('upgrade', 'Transcript upgrade'),
+        ('digest', 'Daily digest'),
+    ]
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name='pipeline_runs')
+    digest = models.ForeignKey(DailyDigest, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='pipeline_runs')
+    job_id = models.CharField(max_length=36, blank=True)
+    profile = models.CharField(max_length=16, blank=True, null=True)
+
+    # Same states as Video.status, minus PENDING (a run exists once its work is dispatched).
+    status = models.CharField(max_length=20, default='PROCESSING')
+    error = models.TextField(blank=True)
+
+    # Seconds of (enhanced) audio the run processed, once known.
+    audio_seconds = models.FloatField(null=True, blank=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} run {self.id} ({self.status})."
+
+class StageTiming(models.Model):
+    """
+    Wall-clock timing of one pipeline stage, with what it processed and how it ended: 'ok', 'cached'
+    (its artifact was reused, so the timing says nothing about the stage's cost) or 'failed'.
+    """
+
+    run = models.ForeignKey(PipelineRun, on_delete=models.CASCADE, related_name='stages')
+    stage = models.CharField(max_length=32)
+    outcome = models.CharField(max_length=16, default='ok')
+    error = models.TextField(blank=True)
+
+    # The model behind the stage (Whisper size, LLM, embedding model...) and the transcription profile.
+    model = models.CharField(max_length=128, blank=True)
+    profile = models.CharField(max_length=16, blank=True, null=True)
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+
+    # Derived at write time, so the metrics endpoint can aggregate them directly. 'queue_wait_seconds' is
+    # the time between the previous stage handing the job on and this stage starting; 'rtf' (real-time
+    # factor) is only set for stages that know how much audio they processed.
+    duration_seconds = models.FloatField()
+    queue_wait_seconds = models.FloatField(null=True, blank=True)
+    audio_seconds = models.FloatField(null=True, blank=True)
+    rtf = models.FloatField(null=True, blank=True)
+    bytes_processed = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["started_at", "stage"], name="stagetiming_started_idx")]
+
+    def __str__(self):
+        return f"Stage '{self.stage}' of run {self.run_id}: {self.duration_seconds:.1f}s ({self.outcome})."
@@ -0,0 +1,157 @@
+import numpy as np
+import io
+
+# Columnar, compressed representation of a WhisperX transcript. Segments and words are stored as
+# parallel numpy arrays (times, scores, speaker indices) with their text concatenated into one string
+# and addressed by offsets, which is an order of magnitude smaller than the JSON result (character
+# alignments are dropped). Missing values are NaN for times/scores and -1 for speakers.
+FORMAT_VERSION = 1
+
+class CompactTranscript:
+    """
+    Array-backed transcript: build it with from_whisperx(), persist it with to_bytes() / from_bytes(),
+    and read it back a segment or a time range at a time.
+    """
+
+    def __init__(self, arrays: dict, speakers: list[str]):
+        self.arrays = arrays
+        self.speakers = speakers
+        self.segment_text = str(arrays["segment_text"])
+        self.word_text = str(arrays["word_text"])
+
+    @classmethod
+    def from_whisperx(cls, result: dict) -> "CompactTranscript":
+        segments = result.get("segments", [])
+        speakers = sorted({item["speaker"] for seg in segments for item in [seg, *seg.get("words", [])]
+                           if item.get("speaker")})
+        speaker_index = {speaker: i for i, speaker in enumerate(speakers)}
+
+        def number(value):
+            return np.nan if value is None else value
+
+        segment_texts = [seg.get("text", "").strip() for seg in segments]
+        words = [word for seg in segments for word in seg.get("words", [])]
+        word_texts = [word.get("word", "").strip() for word in words]
+
+        arrays = {
+            "format_version": np.array(FORMAT_VERSION, dtype=np.int16),
+            "segment_start": np.array([number(seg.get("start")) for seg in segments], dtype=np.float32),
+            "segment_end": np.array([number(seg.get("end")) for seg in segments], dtype=np.float32),
+            "segment_speaker": np.array([speaker_index.get(seg.get("speaker"), -1) for seg in segments],
+                                        dtype=np.int16),
+            "segment_text": np.array("".join(segment_texts)),
+            "segment_text_offsets": np.cumsum([0] + [len(text) for text in segment_texts], dtype=np.int64),
+            # Segment i owns words word_offsets[i]:word_offsets[i + 1].
+            "word_offsets": np.cumsum([0] + [len(seg.get("words", [])) for seg in segments], dtype=np.int64),
+            "word_start": np.array([number(word.get("start")) for word in words], dtype=np.float32),
+            "word_end": np.array([number(word.get("end")) for word in words], dtype=np.float32),
+            "word_score": np.array([number(word.get("score")) for word in words], dtype=np.float16),
+            "word_speaker": np.array([speaker_index.get(word.get("speaker"), -1) for word in words],
+                                     dtype=np.int16),
+            "word_text": np.array("".join(word_texts)),
+            "word_text_offsets": np.cumsum([0] + [len(text) for text in word_texts], dtype=np.int64),
+        }
+        return cls(arrays, speakers)
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **self.arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, speakers: list[str]) -> "CompactTranscript":
+        with np.load(io.BytesIO(bytes(data)), allow_pickle=False) as npz:
+            return cls({name: npz[name] for name in npz.files}, speakers)
+
+    # Derived fields, stored alongside the blob so that they can be read without decoding it.
+
+    def __len__(self) -> int:
+        return len(self.arrays["segment_start"])
+
+    @property
+    def full_text(self) -> str:
+        return " ".join(self.segment(i)["text"] for i in range(len(self)))
+
+    @property
+    def duration(self) -> float:
+        ends = self.arrays["segment_end"]
+        return float(np.nanmax(ends)) if len(ends) and not np.isnan(ends).all() else 0.0
+
+    @property
+    def word_count(self) -> int:
+        return len(self.arrays["word_start"])
+
+    @property
+    def speaker_talk_time(self) -> dict:
+        """
+        Seconds of speech per speaker, summed over segments.
+        """
+
+        lengths = np.nan_to_num(self.arrays["segment_end"] - self.arrays["segment_start"])
+        talk_time = np.bincount(self.arrays["segment_speaker"] + 1, weights=lengths,
+                                minlength=len(self.speakers) + 1)
+        times = {speaker: round(float(talk_time[i + 1]), 3) for i, speaker in enumerate(self.speakers)}
+        if talk_time[0]:
+            times["UNKNOWN"] = round(float(talk_time[0]), 3)
+        return times
+
+    # Segment access.
+
+    def _speaker(self, index: int):
+        return self.speakers[index] if index >= 0 else None
+
+    @staticmethod
+    def _time(value):
+        return None if np.isnan(value) else round(float(value), 3)
+
+    def segment(self, index: int, include_words: bool = False) -> dict:
+        """
+        Returns segment 'index' in the WhisperX shape ({start, end, text, speaker[, words]}), plus its index.
+        """
+
+        a = self.arrays
+        text_offsets = a["segment_text_offsets"]
+        segment = {
+            "index": index,
+            "start": self._time(a["segment_start"][index]),
+            "end": self._time(a["segment_end"][index]),
+            "text": self.segment_text[text_offsets[index]:text_offsets[index + 1]],
+            "speaker": self._speaker(a["segment_speaker"][index]),
+        }
+        if include_words:
+            segment["words"] = self.words(a["word_offsets"][index], a["word_offsets"][index + 1])
+        return segment
+
+    def words(self, first: int, last: int) -> list[dict]:
+        a = self.arrays
+        text_offsets = a["word_text_offsets"]
+        return [{
+            "word": self.word_text[text_offsets[i]:text_offsets[i + 1]],
+            "start": self._time(a["word_start"][i]),
+            "end": self._time(a["word_end"][i]),
+            "score": self._time(a["word_score"][i]),
+            "speaker": self._speaker(a["word_speaker"][i]),
+        } for i in range(first, last)]
+
+    def segments(self, include_words: bool = False) -> list[dict]:
+        return [self.segment(i, include_words) for i in range(len(self))]
+
+    def word_segments(self) -> list[dict]:
+        """
+        Every word in order: WhisperX's top-level 'word_segments'.
+        """
+
+        return self.words(0, self.word_count)
+
+    def segments_between(self, start: float, end: float, include_words: bool = False) -> list[dict]:
+        """
+        Returns the segments overlapping [start, end) seconds. Segments are in time order, so the range is
+        found by binary search rather than a scan.
+        """
+
+        # Running maxima keep the keys sorted even when a segment is missing a timestamp.
+        ends = np.nan_to_num(np.fmax.accumulate(self.arrays["segment_end"]))
+        starts = np.nan_to_num(np.fmax.accumulate(self.arrays["segment_start"]))
+        first = int(np.searchsorted(ends, start, side="right"))
+        last = int(np.searchsorted(starts, end, side="left"))
+        return [self.segment(i, include_words) for i in range(first, max(first, last))]
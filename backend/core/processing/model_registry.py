@@ -0,0 +1,144 @@
+from collections import OrderedDict
+from datetime import datetime
+from django.conf import settings
+import threading
+import whisperx
+import gc
+
+# psutil is only used to sample available memory; without it we simply never evict on pressure.
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Process-level registry of the WhisperX models (ASR, alignment and diarization). Entries are kept
+# in least-recently-used order so that, under memory pressure, the model that hasn't been touched
+# for the longest time is dropped first.
+_MODELS = OrderedDict()
+_LOCK = threading.RLock()
+_READY = threading.Event()
+
+def _available_memory_mb():
+    """
+    Returns the memory currently available to the process (in MB), or None if unknown.
+    """
+
+    if psutil is None:
+        return None
+    return psutil.virtual_memory().available / (1024 * 1024)
+
+def _under_memory_pressure() -> bool:
+    """
+    Checks whether the free memory on the box has dropped below the configured floor.
+    """
+
+    available_mb = _available_memory_mb()
+    return available_mb is not None and available_mb < settings.WHISPERX_MIN_AVAILABLE_MB
+
+def _evict_one():
+    """
+    Drops the least-recently-used model from the registry. Returns False if it was already empty.
+    """
+
+    if not _MODELS:
+        return False
+
+    key, _ = _MODELS.popitem(last=False)
+    _READY.clear()
+    gc.collect()
+    print(f"[{datetime.now()}] Model Registry: Evicted {key} to relieve memory pressure.")
+    return True
+
+def release_under_pressure():
+    """
+    Evicts models (oldest first) until the box is no longer under memory pressure.
+    """
+
+    with _LOCK:
+        while _under_memory_pressure() and _evict_one():
+            pass
+
+def _get_or_load(key: tuple, loader):
+    """
+    Returns the cached model for 'key', loading it with 'loader' on a miss.
+    """
+
+    with _LOCK:
+        if key in _MODELS:
+            _MODELS.move_to_end(key)
+            return _MODELS[key]
+
+        # Make room before pulling several GB of weights into memory.
+        release_under_pressure()
+
+        print(f"[{datetime.now()}] Model Registry: Loading {key}...")
+        model = loader()
+        _MODELS[key] = model
+        return model
+
+def get_asr_model(model_name: str, device: str, compute_type: str, language: str = "en"):
+    """
+    Returns a resident faster-whisper ASR model for the given configuration.
+    """
+
+    key = ("asr", model_name, device, compute_type, language)
+    return _get_or_load(key, lambda: whisperx.load_model(model_name, device, compute_type=compute_type,
+                                                         language=language))
+
+def get_align_model(language_code: str, device: str):
+    """
+    Returns a resident (alignment model, metadata) pair for the given language.
+    """
+
+    key = ("align", language_code, device)
+    return _get_or_load(key, lambda: whisperx.load_align_model(language_code=language_code, device=device))
+
+def get_diarize_model(device: str):
+    """
+    Returns a resident pyannote diarization pipeline.
+    """
+
+    key = ("diarize", device)
+    return _get_or_load(key, lambda: whisperx.diarize.DiarizationPipeline(use_auth_token=settings.HF_TOKEN,
+                                                                          device=device))
+
+def warm_up(model_name: str, device: str, compute_type: str, language: str = "en", diarize: bool = True):
+    """
+    Eagerly loads every model the default pipeline needs, then flags the registry as ready.
+    """
+
+    get_asr_model(model_name, device, compute_type, language)
+    get_align_model(language, device)
+    if diarize:
+        get_diarize_model(device)
+    _READY.set()
+    print(f"[{datetime.now()}] Model Registry: Warm-up complete ({len(_MODELS)} models resident).")
+
+def is_ready() -> bool:
+    """
+    Readiness check: True once warm-up has finished and nothing has been evicted since.
+    """
+
+    return _READY.is_set()
+
+def registry_status() -> dict:
+    """
+    Summarizes what is currently resident, for health checks and debugging.
+    """
+
+    with _LOCK:
+        return {
+            "ready": is_ready(),
+            "models": [list(key) for key in _MODELS],
+            "available_memory_mb": _available_memory_mb(),
+        }
+
+def clear():
+    """
+    Drops every resident model (e.g. for cold-start benchmarks or worker shutdown).
+    """
+
+    with _LOCK:
+        _MODELS.clear()
+        _READY.clear()
+        gc.collect()
@@ -1,8 +1,23 @@
+from collections import OrderedDict
+from django.conf import settings
 import spacy
+import json
+import re
 
 # Cache the spaCy model to keep it in memory and reduce latency on reaccesses.
 NLP_MODEL = None
 
+# Speaker inference only needs the entity recognizer. In the small English pipeline NER has its own
+# embedding layer, so the shared tok2vec and every other component can be switched off.
+UNUSED_PIPES = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+# Press conference speakers are a small, known set, so most titles are resolved by the gazetteer
+# (one precompiled regex over every name and alias) without touching spaCy. Results are memoized per title.
+GAZETTEER_PATTERN = None
+GAZETTEER_NAMES = {}
+MEMO_MAX_ENTRIES = 4096
+_MEMO = OrderedDict()
+
 def _load_spacy_model():
     """
     Loads the spaCy model into a global variable for reuse.
@@ -11,29 +26,94 @@ def _load_spacy_model():
     global NLP_MODEL
     if NLP_MODEL is None:
         print("NER Service: Loading spaCy model for the first time...")
-        NLP_MODEL = spacy.load("en_core_web_sm")
+        NLP_MODEL = spacy.load("en_core_web_sm", disable=UNUSED_PIPES)
         print("NER Service: spaCy model loaded successfully.")
 
+def _load_gazetteer():
+    """
+    Compiles the roster/staff gazetteer (settings.SPEAKER_GAZETTEER_PATH) into a single alternation,
+    longest names first so that e.g. "Kenneth Walker III" wins over "Kenneth Walker".
+    """
+
+    global GAZETTEER_PATTERN, GAZETTEER_NAMES
+    if GAZETTEER_PATTERN is None:
+        with open(settings.SPEAKER_GAZETTEER_PATH) as f:
+            entries = json.load(f)["speakers"]
+
+        GAZETTEER_NAMES = {alias.lower(): entry["name"] for entry in entries
+                           for alias in [entry["name"], *entry.get("aliases", [])]}
+        alternation = "|".join(re.escape(alias) for alias in sorted(GAZETTEER_NAMES, key=len, reverse=True))
+        GAZETTEER_PATTERN = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+        print(f"NER Service: Compiled speaker gazetteer with {len(GAZETTEER_NAMES)} names.")
+
+def match_gazetteer(text: str):
+    """
+    Returns the canonical name of the first known speaker mentioned in the text, or None.
+    """
+
+    _load_gazetteer()
+    match = GAZETTEER_PATTERN.search(text)
+    return GAZETTEER_NAMES[match.group(0).lower()] if match else None
+
+def _first_person(doc):
+    # NOTE: the .label_ tells us what kind of entity it is (e.g., PERSON, ORG, GPE).
+    return next((ent.text for ent in doc.ents if ent.label_ == "PERSON"), None)
+
+def _remember(text: str, speaker):
+    _MEMO[text] = speaker
+    _MEMO.move_to_end(text)
+    while len(_MEMO) > MEMO_MAX_ENTRIES:
+        _MEMO.popitem(last=False)
+    return speaker
+
 def infer_person_from_title(text: str):
     """
-    Uses spaCy's Named Entity Recognition to find the first person's name in a string.
+    Finds the speaker named in a video title: a known speaker from the gazetteer if there is one,
+    otherwise the first PERSON entity spaCy's Named Entity Recognition finds.
     Returns the name as a string, or None if no person is found.
     """
 
-    _load_spacy_model()
-
     if not text:
         return None
+    if text in _MEMO:
+        _MEMO.move_to_end(text)
+        return _MEMO[text]
+
+    speaker = match_gazetteer(text)
+    if speaker:
+        print(f"NER Service: Matched known speaker: '{speaker}'")
+        return _remember(text, speaker)
 
     # Process the text with the spaCy NER model, loaded above.
-    doc = NLP_MODEL(text)
+    _load_spacy_model()
+    speaker = _first_person(NLP_MODEL(text))
+    if speaker:
+        print(f"NER Service: Found PERSON entity: '{speaker}'")
+    else:
+        print("NER Service: No PERSON entity found in the text.")
+    return _remember(text, speaker)
+
+def infer_people_from_titles(texts: list[str], batch_size: int = 256) -> list:
+    """
+    Batch variant of infer_person_from_title for backfills: titles the gazetteer (or the memo) can't
+    resolve are deduplicated and streamed through spaCy with nlp.pipe. Returns one name (or None) per title.
+    """
+
+    results, pending = {}, []
+    for text in dict.fromkeys(t for t in texts if t):
+        if text in _MEMO:
+            results[text] = _MEMO[text]
+            continue
+        speaker = match_gazetteer(text)
+        if speaker:
+            results[text] = _remember(text, speaker)
+        else:
+            pending.append(text)
 
-    # Iterate through all the entities the model found.
-    for ent in doc.ents:
-        # NOTE: the .label_ tells us what kind of entity it is (e.g., PERSON, ORG, GPE).
-        if ent.label_ == "PERSON":
-            print(f"NER Service: Found PERSON entity: '{ent.text}'")
-            return ent.text
+    if pending:
+        _load_spacy_model()
+        print(f"NER Service: Running NER over {len(pending)} titles...")
+        for text, doc in zip(pending, NLP_MODEL.pipe(pending, batch_size=batch_size)):
+            results[text] = _remember(text, _first_person(doc))
 
-    print("NER Service: No PERSON entity found in the text.")
-    return None
+    return [results.get(text) if text else None for text in texts]
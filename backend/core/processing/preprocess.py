@@ -1,26 +1,32 @@
+import numpy as np
+import subprocess
+import threading
 import ffmpeg
 import os
 
-def audio_enhance(input_file: str, output_file: str, model_path: str = "sh.rnnn", denoise_mix: float = 0.9,
-                  speech_expansion: float = 25.0, safety_limit_db: float = -1.0):
+# Whisper consumes 16kHz mono audio; the streaming mode hands it over as raw float32 samples.
+SAMPLE_RATE = 16000
+
+# The default filter settings (mirrors the keyword defaults below). Anything cached downstream of the
+# enhancement stage is keyed on these, so a tweak here invalidates exactly the affected artifacts.
+ENHANCE_DEFAULTS = {"model_path": "sh.rnnn", "denoise_mix": 0.9, "speech_expansion": 25.0, "safety_limit_db": -1.0}
+
+def _resolve_model_path(model_path: str) -> str:
     """
-    Enhance raw audio by passing it through multiple intelligent filtration techniques.
+    Returns the absolute path to the RNNoise model, which lives next to this file by default.
     """
 
     # Get the absolute path to the core/processing directory.
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     # Append the absolute path directory prefix to the in-house model file.
-    model_path = os.path.join(script_dir, "sh.rnnn")
-    print(model_path)
+    return os.path.join(script_dir, model_path)
 
-    # Raise an exception if the RNN model isn't available in the prescribed path.
-    if not os.path.exists(model_path):
-        print(f"Model file not found: {model_path}!")
-        return
-
-    print("Running advanced speech enhancement pipeline...")
-    stream = ffmpeg.input(input_file).audio
+def _apply_enhancement_filters(stream, model_path: str, denoise_mix: float, speech_expansion: float,
+                               safety_limit_db: float):
+    """
+    Chains the RNNoise -> speechnorm -> alimiter filters onto an FFmpeg audio stream.
+    """
 
     # Stage 1: AI Denoiser & Distraction Removal
     # Purpose: Leverage the RNNoise noise suppression algorithm to distinguish human speech from
@@ -48,7 +54,7 @@ def audio_enhance(input_file: str, output_file: str, model_path: str = "sh.rnnn"
     #   - 'attack' resembles how fast the limiter cracks down on a loud sound.
     #   - 'release' controls how fast the limiter lets go after sound is quiet again.
     #   - Input/output levels are kept neutral.
-    stream = stream.filter(
+    return stream.filter(
         "alimiter",
         level_in="1",
         level_out="1",
@@ -57,6 +63,24 @@ def audio_enhance(input_file: str, output_file: str, model_path: str = "sh.rnnn"
         release="50",
     )
 
+def audio_enhance(input_file: str, output_file: str, model_path: str = "sh.rnnn", denoise_mix: float = 0.9,
+                  speech_expansion: float = 25.0, safety_limit_db: float = -1.0):
+    """
+    Enhance raw audio by passing it through multiple intelligent filtration techniques.
+    """
+
+    model_path = _resolve_model_path(model_path)
+    print(model_path)
+
+    # Raise an exception if the RNN model isn't available in the prescribed path.
+    if not os.path.exists(model_path):
+        print(f"Model file not found: {model_path}!")
+        return
+
+    print("Running advanced speech enhancement pipeline...")
+    stream = ffmpeg.input(input_file).audio
+    stream = _apply_enhancement_filters(stream, model_path, denoise_mix, speech_expansion, safety_limit_db)
+
     # Stage 4: Final Standardization for Whisper
     # WAV is an uncompressed audio format (for max quality); mono audio and 16Hz sample rate Whisper expects.
     print(f"Applying final standardization and saving to {output_file}...")
@@ -72,6 +96,129 @@ def audio_enhance(input_file: str, output_file: str, model_path: str = "sh.rnnn"
         print(e.stderr.decode())
         raise
 
+def _pump_stdin(process: subprocess.Popen, chunks):
+    """
+    Feeds downloaded bytes into FFmpeg's stdin from a background thread.
+    """
+
+    try:
+        for chunk in chunks:
+            process.stdin.write(chunk)
+    except (BrokenPipeError, ValueError):
+        # FFmpeg exited early (or the reader went away); its return code tells the rest of the story.
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+def _drain(pipe, sink: list):
+    """
+    Collects FFmpeg's stderr so that a chatty filter can never fill the pipe and stall the graph.
+    """
+
+    sink.append(pipe.read())
+
+def _iter_pcm(source, build_graph, input_options: dict = None, sample_rate: int = SAMPLE_RATE,
+              block_seconds: float = 30.0):
+    """
+    Runs an FFmpeg graph over a file path or an iterator of raw bytes and yields mono float32 PCM at
+    'sample_rate' in blocks of 'block_seconds'. 'build_graph' adds the filters between input and output.
+    """
+
+    from_pipe = not isinstance(source, str)
+    stream = ffmpeg.input("pipe:0" if from_pipe else source, **(input_options or {})).audio
+    stream = build_graph(stream).output("pipe:1", format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+    process = stream.global_args("-loglevel", "error").run_async(pipe_stdin=from_pipe, pipe_stdout=True,
+                                                                 pipe_stderr=True)
+
+    stderr = []
+    helpers = [threading.Thread(target=_drain, args=(process.stderr, stderr), daemon=True)]
+    if from_pipe:
+        helpers.append(threading.Thread(target=_pump_stdin, args=(process, source), daemon=True))
+    for helper in helpers:
+        helper.start()
+
+    block_bytes = int(block_seconds * sample_rate) * 4  # 4 bytes per float32 sample.
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.float32).copy()
+
+        process.wait()
+        for helper in helpers:
+            helper.join()
+        if process.returncode != 0:
+            error = ffmpeg.Error("ffmpeg", None, b"".join(stderr))
+            print("An error occurred during streaming preprocessing:")
+            print(error.stderr.decode())
+            raise error
+
+    finally:
+        # If the consumer stopped early (or something failed), don't leave FFmpeg running.
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+def iter_enhanced_audio(source, block_seconds: float = 30.0, input_options: dict = None,
+                        model_path: str = "sh.rnnn", denoise_mix: float = 0.9, speech_expansion: float = 25.0,
+                        safety_limit_db: float = -1.0):
+    """
+    Streaming counterpart of audio_enhance. Runs the same filter graph on either a file path or an
+    iterator of raw container bytes (e.g. straight from YouTube) and yields the 16kHz mono float32
+    samples in blocks of 'block_seconds', without any lossy intermediate or temporary files. Memory
+    stays bounded by a single block, no matter how long the video is.
+    """
+
+    model_path = _resolve_model_path(model_path)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}!")
+
+    def build_graph(stream):
+        return _apply_enhancement_filters(stream, model_path, denoise_mix, speech_expansion, safety_limit_db)
+
+    yield from _iter_pcm(source, build_graph, input_options, SAMPLE_RATE, block_seconds)
+
+def probe_duration(path: str):
+    """
+    Returns the duration of a media file in seconds, as its container reports it (None if unknown).
+    """
+
+    try:
+        return float(ffmpeg.probe(path)["format"]["duration"])
+    except (ffmpeg.Error, KeyError, ValueError):
+        return None
+
+def iter_decoded_audio(source, sample_rate: int = SAMPLE_RATE, input_options: dict = None,
+                       block_seconds: float = 30.0):
+    """
+    Decodes 'source' (a file path or an iterator of raw bytes) to mono float32 blocks, unfiltered.
+    """
+
+    yield from _iter_pcm(source, lambda stream: stream, input_options, sample_rate, block_seconds)
+
+def decode_audio(source, sample_rate: int = SAMPLE_RATE, input_options: dict = None) -> np.ndarray:
+    """
+    Decodes 'source' (a file path or an iterator of raw bytes) to a mono float32 waveform, unfiltered.
+    """
+
+    blocks = list(iter_decoded_audio(source, sample_rate, input_options))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+def enhance_audio_stream(source, **enhance_options) -> np.ndarray:
+    """
+    Enhances 'source' (a file path or an iterator of raw bytes) and returns the whole 16kHz float32
+    waveform in memory, in the same form whisperx.load_audio would have produced from a WAV file.
+    """
+
+    print("Running streaming speech enhancement pipeline...")
+    blocks = list(iter_enhanced_audio(source, **enhance_options))
+    print("Pipeline complete.")
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
 '''
 Sample Testing Code:
 
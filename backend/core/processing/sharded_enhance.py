@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import wave
+import os
+
+from .preprocess import SAMPLE_RATE, enhance_audio_stream, iter_decoded_audio
+
+# RNNoise runs natively at 48kHz, so shards are cut (and fed back to FFmpeg) at that rate. The
+# enhanced output still comes out at Whisper's 16kHz.
+SHARD_SAMPLE_RATE = 48000
+
+def _frame_energy(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """
+    Returns the RMS energy of consecutive, non-overlapping frames.
+    """
+
+    frame_count = len(samples) // frame_size
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+def find_split_points(samples: np.ndarray, shards: int, sample_rate: int = SHARD_SAMPLE_RATE,
+                      search_seconds: float = 5.0, frame_seconds: float = 0.02) -> list[float]:
+    """
+    Picks 'shards - 1' split times (in seconds), each snapped to the quietest frame within
+    'search_seconds' of an even split, so boundaries land in pauses rather than mid-word.
+    """
+
+    duration = len(samples) / sample_rate
+    frame_size = int(frame_seconds * sample_rate)
+    energy = _frame_energy(samples, frame_size)
+    splits = []
+
+    for index in range(1, shards):
+        target = duration * index / shards
+        lo = max(0, int((target - search_seconds) / frame_seconds))
+        hi = min(len(energy), int((target + search_seconds) / frame_seconds) + 1)
+        if hi <= lo:
+            splits.append(target)
+            continue
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        splits.append((quietest + 0.5) * frame_seconds)
+
+    return sorted(set(splits))
+
+def _enhance_shard(samples: np.ndarray, enhance_options: dict, block_seconds: float = 10.0) -> np.ndarray:
+    """
+    Enhances one shard by piping its raw 48kHz samples through the regular FFmpeg graph. The samples go
+    to FFmpeg a block at a time, so the shard itself is never copied whole.
+    """
+
+    input_options = {"format": "f32le", "ar": SHARD_SAMPLE_RATE, "ac": 1}
+    block_size = int(block_seconds * SHARD_SAMPLE_RATE)
+    blocks = (samples[i:i + block_size].tobytes() for i in range(0, len(samples), block_size))
+    return enhance_audio_stream(blocks, input_options=input_options, **enhance_options)
+
+def enhance_sharded(source, shards: int, crossfade_seconds: float = 0.5, preroll_seconds: float = 2.0,
+                    regions: list = None, **enhance_options) -> np.ndarray:
+    """
+    Sharded counterpart of preprocess.enhance_audio_stream. Splits the audio at low-energy points into
+    overlapping shards, enhances the shards concurrently and stitches them back together with linear
+    crossfades centred on each split point.
+
+    Each shard also starts 'preroll_seconds' early, so that speechnorm's adaptive gain has settled by
+    the time the crossfade begins; that warm-up audio is discarded. If 'regions' ([start, end] seconds)
+    are given, only those parts of the audio are enhanced, back to back (see vad.speech_regions).
+
+    The whole (48kHz) waveform is held in memory, plus the 16kHz output, so this is meant for videos of
+    ordinary length; long streams go through the streaming single pass instead (see tasks._enhance).
+    """
+
+    blocks = iter_decoded_audio(source, sample_rate=SHARD_SAMPLE_RATE)
+    if regions:
+        from .vad import iter_regions  # vad builds on this module.
+        blocks = iter_regions(blocks, regions, SHARD_SAMPLE_RATE)
+    samples = np.concatenate(list(blocks) or [np.zeros(0, dtype=np.float32)])
+    duration = len(samples) / SHARD_SAMPLE_RATE
+    splits = find_split_points(samples, shards) if shards > 1 else []
+    bounds = [0.0] + splits + [duration]
+    half_fade = crossfade_seconds / 2
+
+    # Each shard keeps [split - fade/2, next split + fade/2]; its input starts a pre-roll earlier.
+    windows = []
+    for index in range(len(bounds) - 1):
+        keep_start = max(0.0, bounds[index] - half_fade) if index > 0 else 0.0
+        keep_end = min(duration, bounds[index + 1] + half_fade) if index < len(bounds) - 2 else duration
+        input_start = max(0.0, keep_start - preroll_seconds)
+        windows.append((input_start, keep_start, keep_end))
+
+    def run(window):
+        input_start, _, keep_end = window
+        lo, hi = int(input_start * SHARD_SAMPLE_RATE), int(keep_end * SHARD_SAMPLE_RATE)
+        return _enhance_shard(samples[lo:hi], enhance_options)
+
+    # Every shard runs in its own FFmpeg process; the threads here only shuttle bytes to and from
+    # the pipes. (Celery's prefork children are daemonic and may not start a multiprocessing pool.)
+    print(f"Running sharded speech enhancement pipeline ({len(windows)} shards)...")
+    with ThreadPoolExecutor(max_workers=len(windows)) as pool:
+        enhanced = list(pool.map(run, windows))
+
+    total = int(round(duration * SAMPLE_RATE))
+    output = np.zeros(total, dtype=np.float32)
+    fade = int(round(crossfade_seconds * SAMPLE_RATE))
+
+    for index, ((input_start, keep_start, keep_end), shard) in enumerate(zip(windows, enhanced)):
+        offset = int(round(input_start * SAMPLE_RATE))
+        lo, hi = int(round(keep_start * SAMPLE_RATE)), min(total, int(round(keep_end * SAMPLE_RATE)))
+
+        # The resampler can make a shard a few samples shorter than expected; pad with silence.
+        piece = shard[lo - offset:hi - offset]
+        if len(piece) < hi - lo:
+            piece = np.pad(piece, (0, hi - lo - len(piece)))
+
+        weights = np.ones(hi - lo, dtype=np.float32)
+        if index > 0:
+            ramp = min(fade, hi - lo)
+            weights[:ramp] = np.linspace(0.0, 1.0, ramp, endpoint=False)
+        if index < len(windows) - 1:
+            ramp = min(fade, hi - lo)
+            weights[-ramp:] = np.minimum(weights[-ramp:], np.linspace(1.0, 0.0, ramp, endpoint=False))
+
+        output[lo:hi] += piece * weights
+
+    print("Pipeline complete.")
+    return output
+
+def write_wav(samples: np.ndarray, output_file: str, sample_rate: int = SAMPLE_RATE):
+    """
+    Saves a float32 waveform as 16-bit PCM WAV (the same format audio_enhance produces).
+    """
+
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(output_file, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(pcm.tobytes())
+
+def audio_enhance_sharded(input_file: str, output_file: str, shards: int = None, **enhance_options):
+    """
+    Drop-in replacement for preprocess.audio_enhance that enhances long recordings across several cores.
+    """
+
+    shards = shards or os.cpu_count() or 1
+    write_wav(enhance_sharded(input_file, shards, **enhance_options), output_file)
+    return output_file
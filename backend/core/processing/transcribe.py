@@ -1,43 +1,125 @@
 import whisperx
 from whisperx.utils import get_writer
 
+import numpy as np
 import os
 import warnings
 from dotenv import load_dotenv
 from datetime import datetime
 from django.conf import settings
+from . import model_registry
+from .vad import timeline_mapper
 
 warnings.filterwarnings("ignore")
 
 load_dotenv()
-start_time = datetime.now()
 
 # Define global constants for Whisper functions.
 DEVICE = "cpu"
-BATCH_SIZE = 16               # Reduce if low on GPU mem.
-COMPUTE_TYPE = "float32"      # Change to "int8" if low on GPU mem (may reduce accuracy).
 HF_TOKEN = settings.HF_TOKEN  # Load HuggingFace token for speaker diarization.
 
-def run_whisperx(audio_file_path, results_export=False):
+# Named transcription quality profiles, from a quick same-day transcript to the full-quality one:
+# - model_name / compute_type: the faster-whisper model and its precision ("int8" is much faster on CPU).
+# - batch_size: reduce if low on GPU memory.
+# - char_alignments: also align individual characters (only the full profile needs them).
+# - diarize / min_speakers / max_speakers: whether to run speaker diarization, and how to bound it.
+TRANSCRIPTION_PROFILES = {
+    "fast": {"model_name": "base", "compute_type": "int8", "batch_size": 16, "char_alignments": False,
+             "diarize": False, "min_speakers": None, "max_speakers": None},
+    "balanced": {"model_name": "small", "compute_type": "int8", "batch_size": 16, "char_alignments": False,
+                 "diarize": True, "min_speakers": 1, "max_speakers": 3},
+    "full": {"model_name": "small", "compute_type": "float32", "batch_size": 16, "char_alignments": True,
+             "diarize": True, "min_speakers": None, "max_speakers": None},
+}
+
+def get_profile(name: str = None) -> dict:
+    """
+    Returns the named transcription profile (settings.TRANSCRIPTION_PROFILE by default), with its name.
+    """
+
+    name = name or settings.TRANSCRIPTION_PROFILE
+    if name not in TRANSCRIPTION_PROFILES:
+        raise ValueError(f"Unknown transcription profile '{name}' (expected one of {list(TRANSCRIPTION_PROFILES)}).")
+    return {"name": name, **TRANSCRIPTION_PROFILES[name]}
+
+def _diarize(diarize_model, audio, profile: dict):
+    return diarize_model(audio, min_speakers=profile["min_speakers"], max_speakers=profile["max_speakers"])
+
+# The three WhisperX passes, also used on their own by the chunked path and the benchmark suite.
+
+def asr_pass(audio: np.ndarray, profile: dict) -> dict:
+    """
+    Transcribes with faster-whisper (batched) into {segments, language}.
+    """
+
+    model = model_registry.get_asr_model(profile["model_name"], DEVICE, profile["compute_type"], language="en")
+    return model.transcribe(audio, batch_size=profile["batch_size"])
+
+def alignment_pass(segments: list[dict], audio: np.ndarray, profile: dict, language: str = "en") -> dict:
+    """
+    Force-aligns segments against the audio with the phoneme model, adding word-level (and, if the
+    profile asks for them, character-level) timestamps.
+    """
+
+    model_a, metadata = model_registry.get_align_model(language, DEVICE)
+    return whisperx.align(segments, model_a, metadata, audio, DEVICE,
+                          return_char_alignments=profile["char_alignments"])
+
+def diarization_pass(result: dict, audio: np.ndarray, profile: dict) -> dict:
+    """
+    Assigns speaker labels to the aligned segments and words (bounded by the profile's 'min_speakers'
+    and 'max_speakers', if set). A no-op for profiles that skip diarization.
+    """
+
+    if not profile["diarize"]:
+        return result
+    diarize_model = model_registry.get_diarize_model(DEVICE)
+    return whisperx.assign_word_speakers(_diarize(diarize_model, audio, profile), result)
+
+def warm_up_models(profile_name: str = None):
     """
-    Run the WhisperX ASR model end-to-end.
+    Loads the models of a transcription profile (the default one unless given) into the process-level
+    registry ahead of time.
     """
 
+    profile = get_profile(profile_name)
+    model_registry.warm_up(profile["model_name"], DEVICE, profile["compute_type"], language="en",
+                           diarize=profile["diarize"])
+
+# Rough share of run_whisperx's time taken by each pass, for progress reporting.
+PASS_PROGRESS = {"asr": 0.6, "align": 0.85, "diarize": 1.0}
+
+def run_whisperx(audio_file_path, results_export=False, profile_name: str = None, on_progress=None):
+    """
+    Run the WhisperX ASR model end-to-end. Accepts either a path to an audio file or a 16kHz
+    float32 waveform that is already in memory (see preprocess.enhance_audio_stream). The
+    transcription profile decides the model, precision, alignment detail and diarization.
+    'on_progress', if given, is called with the fraction of the work done after each pass.
+    """
+
+    def report(step: str):
+        if on_progress is not None:
+            on_progress(PASS_PROGRESS[step])
+
+    profile = get_profile(profile_name)
+    start_time = datetime.now()
+
     print(f"[{datetime.now()}] Checkpoint #1: Loading Whisper model and audio for transcription...")
-    # 1: Transcribe with original Whisper (batched).
-    model = whisperx.load_model("small", DEVICE, compute_type=COMPUTE_TYPE, language="en")
-    audio = whisperx.load_audio(audio_file_path)
-    result = model.transcribe(audio, batch_size=BATCH_SIZE)
+    # 1: Transcribe with original Whisper (batched). Models come from the process-level registry,
+    # so only the first job in a worker (or the one after an eviction) pays the load cost.
+    if isinstance(audio_file_path, np.ndarray):
+        audio, audio_file_path = audio_file_path, "stream"
+    else:
+        audio = whisperx.load_audio(audio_file_path)
+    result = asr_pass(audio, profile)
+    report("asr")
 
     print(f"[{datetime.now()}] Checkpoint #2: Using phoneme recognition model to force-align and generate "
         "word-level timestamps...")
 
     # 2: Align whisper output.
-    model_a, metadata = whisperx.load_align_model(
-        language_code=result["language"], device=DEVICE
-    )
-    aligned_result = whisperx.align(result["segments"], model_a, metadata, audio, DEVICE, return_char_alignments=True)
-    result.update(aligned_result)
+    result.update(alignment_pass(result["segments"], audio, profile, result["language"]))
+    report("align")
 
     print(f"[{datetime.now()}] Checkpoint #3: Initializing output directory...")
 
@@ -47,11 +129,8 @@ def run_whisperx(audio_file_path, results_export=False):
     print(f"[{datetime.now()}] Checkpoint #4: Executing speaker diarization pipeline...")
 
     # 3: Assign speaker labels.
-    diarize_model = whisperx.diarize.DiarizationPipeline(use_auth_token=HF_TOKEN, device=DEVICE)
-    diarize_segments = diarize_model(audio)  # Can optionally specify 'min_speakers' and 'max_speakers'.
-
-    diarized_result = whisperx.assign_word_speakers(diarize_segments, result)
-    result.update(diarized_result)
+    result.update(diarization_pass(result, audio, profile))
+    report("diarize")
 
     # print(diarized_result["segments"]) => Debugging Output
 
@@ -67,9 +146,167 @@ def run_whisperx(audio_file_path, results_export=False):
         }
         writer(result, audio_file_path, writer_options)
 
+    # Give memory back if this run pushed the box past the configured floor.
+    model_registry.release_under_pressure()
+
     elapsed_time = datetime.now() - start_time
     total_seconds = elapsed_time.total_seconds()
     print("\nWhisperX has run successfully!")
     print(f"Total time elapsed: {int(total_seconds // 60)} minutes and {(total_seconds % 60):.2f} seconds.\n")
 
     return result
+
+def _map_timestamps(segments: list[dict], to_time):
+    """
+    Rewrites segment, word and character timestamps (in place) through 'to_time'.
+    """
+
+    def remap(item: dict):
+        for key in ("start", "end"):
+            if item.get(key) is not None:
+                item[key] = round(to_time(item[key]), 3)
+
+    for segment in segments:
+        remap(segment)
+        for word in segment.get("words", []):
+            remap(word)
+        for char in segment.get("chars", []):
+            remap(char)
+
+def _shift_timestamps(segments: list[dict], offset: float):
+    """
+    Moves segment, word and character timestamps (in place) from block time to video time.
+    """
+
+    _map_timestamps(segments, lambda t: t + offset)
+
+def restore_timeline(result: dict, regions: list) -> dict:
+    """
+    Maps the timestamps of a result transcribed from dead-air-trimmed audio (the speech 'regions' back
+    to back, see vad.speech_regions) onto the original video timeline, in place. A no-op without regions.
+    """
+
+    if regions:
+        _map_timestamps(result["segments"], timeline_mapper(regions))
+        if "word_segments" in result:
+            # As in run_whisperx_chunked: rebuild the flat word list rather than mapping shared dicts twice.
+            result["word_segments"] = [word for segment in result["segments"] for word in segment.get("words", [])]
+    return result
+
+def run_whisperx_chunked(audio_blocks, sample_rate: int = 16000, profile_name: str = None):
+    """
+    Bounded-memory variant of run_whisperx for multi-hour videos. Consumes an iterator of float32
+    blocks (see preprocess.iter_enhanced_audio), transcribes, aligns and diarizes one block at a time,
+    and stitches the results back together on the original timeline.
+
+    NOTE: diarization only sees one block at a time, so speaker labels are not guaranteed to be
+    consistent across blocks.
+    """
+
+    profile = get_profile(profile_name)
+    merged = {"segments": [], "word_segments": [], "language": "en"}
+    offset = 0.0
+
+    for index, block in enumerate(audio_blocks):
+        print(f"[{datetime.now()}] Chunked transcription: block #{index + 1} starting at {offset:.1f}s...")
+        result = asr_pass(block, profile)
+
+        if result["segments"]:
+            result.update(alignment_pass(result["segments"], block, profile, result["language"]))
+            result.update(diarization_pass(result, block, profile))
+
+            # WhisperX's word_segments share their dicts with segment["words"], so shift the segments
+            # once and rebuild the flat word list from them rather than shifting both.
+            _shift_timestamps(result["segments"], offset)
+            merged["segments"].extend(result["segments"])
+            merged["word_segments"].extend(word for seg in result["segments"] for word in seg.get("words", []))
+            merged["language"] = result["language"]
+
+        offset += len(block) / sample_rate
+
+    model_registry.release_under_pressure()
+    print(f"[{datetime.now()}] Chunked transcription complete ({offset:.1f}s of audio).")
+    return merged
+
+# Incremental transcription: ASR runs window by window as the enhanced audio arrives (each window's
+# segments can be committed right away), and alignment and diarization run afterwards as refinement
+# passes over the committed windows.
+
+def transcribe_windows(windows, profile_name: str = None, sample_rate: int = 16000, on_window=None) -> dict:
+    """
+    ASR-only transcription of an iterator of (offset in seconds, samples) windows, e.g. from
+    vad.iter_vad_windows. Returns {segments, language, windows} on the video timeline, where each entry
+    of 'windows' is {start, end, first, last} (its time range and its slice of 'segments'). 'on_window',
+    if given, is called with the result so far after every window.
+    """
+
+    profile = get_profile(profile_name)
+    result = {"segments": [], "language": "en", "windows": []}
+
+    for offset, samples in windows:
+        print(f"[{datetime.now()}] Incremental transcription: window starting at {offset:.1f}s...")
+        window = asr_pass(samples, profile)
+        _shift_timestamps(window["segments"], offset)
+
+        first = len(result["segments"])
+        result["segments"].extend(window["segments"])
+        result["language"] = window.get("language") or result["language"]
+        result["windows"].append({"start": round(offset, 3), "end": round(offset + len(samples) / sample_rate, 3),
+                                  "first": first, "last": len(result["segments"])})
+        if on_window is not None:
+            on_window(result)
+
+    return result
+
+def refine_windows(result: dict, audio: np.ndarray, profile_name: str = None, sample_rate: int = 16000,
+                   block_seconds: float = None, on_progress=None) -> dict:
+    """
+    Refines an incremental ASR result (see transcribe_windows) into the same shape run_whisperx returns:
+    each committed window is force-aligned against its own audio, then speakers are assigned over the
+    whole recording (or per 'block_seconds' block, as in run_whisperx_chunked, for very long videos).
+    'on_progress', if given, is called with the fraction of the refinement done.
+    """
+
+    profile = get_profile(profile_name)
+    total = max(len(result["windows"]), 1)
+    # Share of the refinement spent aligning (the rest is diarization), for progress reporting.
+    align_share = 0.6 if profile["diarize"] else 1.0
+    segments = []
+
+    for index, window in enumerate(result["windows"]):
+        window_segments = [dict(segment) for segment in result["segments"][window["first"]:window["last"]]]
+        if window_segments:
+            start = int(window["start"] * sample_rate)
+            samples = np.asarray(audio[start:int(window["end"] * sample_rate)])
+            _shift_timestamps(window_segments, -window["start"])
+            aligned = alignment_pass(window_segments, samples, profile, result["language"])["segments"]
+            _shift_timestamps(aligned, window["start"])
+            segments.extend(aligned)
+        if on_progress is not None:
+            on_progress(align_share * (index + 1) / total)
+
+    refined = {"segments": segments, "language": result["language"]}
+    if profile["diarize"] and segments:
+        if block_seconds is None:
+            refined = diarization_pass(refined, np.asarray(audio), profile)
+        else:
+            diarized = []
+            block_size = int(block_seconds * sample_rate)
+            for block_start in range(0, len(audio), block_size):
+                offset = block_start / sample_rate
+                block_segments = [segment for segment in segments
+                                  if offset <= (segment.get("start") or 0.0) < offset + block_seconds]
+                if not block_segments:
+                    continue
+                _shift_timestamps(block_segments, -offset)
+                block_audio = np.asarray(audio[block_start:block_start + block_size])
+                block = diarization_pass({"segments": block_segments}, block_audio, profile)
+                _shift_timestamps(block["segments"], offset)
+                diarized.extend(block["segments"])
+            refined = {"segments": diarized, "language": result["language"]}
+
+    refined["word_segments"] = [word for segment in refined["segments"] for word in segment.get("words", [])]
+    if on_progress is not None:
+        on_progress(1.0)
+    model_registry.release_under_pressure()
+    return refined
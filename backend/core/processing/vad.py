@@ -0,0 +1,154 @@
+from itertools import accumulate
+import numpy as np
+import bisect
+
+from .preprocess import SAMPLE_RATE, iter_decoded_audio
+from .sharded_enhance import SHARD_SAMPLE_RATE, _frame_energy
+
+# Lightweight, energy-based voice activity detection on 16kHz float32 audio. It is used to cut audio at
+# pauses rather than mid-word (incremental transcription windows) and to find the dead air (pre-show,
+# walk-ups, long gaps between questions) that isn't worth enhancing and transcribing, so it only needs to
+# tell speech from quiet, not to be a general-purpose speech detector.
+FRAME_SECONDS = 0.03
+
+# Raw PCM input options for FFmpeg, for feeding it the trimmed audio (see iter_speech_pcm).
+PCM_INPUT_OPTIONS = {"format": "f32le", "ar": SHARD_SAMPLE_RATE, "ac": 1}
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                    frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """
+    Returns the RMS energy (in dBFS) of consecutive, non-overlapping frames.
+    """
+
+    energy = _frame_energy(samples, int(frame_seconds * sample_rate))
+    return 20 * np.log10(energy + 1e-10)
+
+def find_pause(samples: np.ndarray, lo: int, hi: int, sample_rate: int = SAMPLE_RATE,
+               frame_seconds: float = FRAME_SECONDS, pause_seconds: float = 0.3) -> int:
+    """
+    Returns a sample index in [lo, hi) at the quietest frame of the quietest 'pause_seconds' stretch of
+    that range. Energy is averaged over the stretch first, so a single quiet frame inside a word (e.g. a
+    plosive) doesn't win over a real pause between sentences; without any real pause (one long answer),
+    the cut still lands in the gap between two syllables rather than on one.
+    """
+
+    frame_size = int(frame_seconds * sample_rate)
+    energy = frame_energy_db(samples[lo:hi], sample_rate, frame_seconds)
+    if len(energy) == 0:
+        return hi
+
+    width = max(1, min(len(energy), int(pause_seconds / frame_seconds)))
+    smoothed = np.convolve(energy, np.ones(width) / width, mode="valid")
+    stretch = int(np.argmin(smoothed))
+    quietest = stretch + int(np.argmin(energy[stretch:stretch + width]))
+    return lo + quietest * frame_size + frame_size // 2
+
+def iter_vad_windows(blocks, min_seconds: float, max_seconds: float, sample_rate: int = SAMPLE_RATE):
+    """
+    Regroups a stream of audio blocks (e.g. from preprocess.iter_enhanced_audio) into windows of
+    'min_seconds' to 'max_seconds', each ending at a pause. Yields (offset in seconds, samples) as soon as
+    enough audio has arrived to cut a window; the last window holds whatever is left.
+    """
+
+    min_samples, max_samples = int(min_seconds * sample_rate), int(max_seconds * sample_rate)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, np.asarray(block, dtype=np.float32)])
+        while len(buffer) >= max_samples:
+            cut = find_pause(buffer, min_samples, max_samples, sample_rate)
+            yield offset / sample_rate, buffer[:cut]
+            offset += cut
+            buffer = buffer[cut:]
+
+    if len(buffer):
+        yield offset / sample_rate, buffer
+
+# Dead-air trimming: only the speech regions (padded) go through enhancement and transcription, back to
+# back, and timestamps on that trimmed audio are mapped back onto the video timeline afterwards.
+
+def speech_regions(blocks, sample_rate: int = SAMPLE_RATE, min_silence_seconds: float = 3.0,
+                   padding_seconds: float = 0.5, margin_db: float = 10.0,
+                   frame_seconds: float = FRAME_SECONDS) -> tuple[list[list[float]], float]:
+    """
+    Finds the speech in a stream of audio blocks (whose lengths are multiples of the frame size, as
+    preprocess.iter_decoded_audio's are). A frame is speech if it is 'margin_db' above the noise floor
+    (the 10th percentile of frame energy); speech separated by less than 'min_silence_seconds' of quiet
+    stays in one region, and every region is padded by 'padding_seconds' on both sides.
+
+    Returns ([[start, end], ...] in seconds, duration in seconds). The regions are empty if no speech
+    stands out at all, in which case nothing should be trimmed.
+    """
+
+    energies, total_samples = [], 0
+    for block in blocks:
+        energies.append(frame_energy_db(block, sample_rate, frame_seconds))
+        total_samples += len(block)
+    duration = total_samples / sample_rate
+    energy = np.concatenate(energies) if energies else np.zeros(0)
+    if not len(energy):
+        return [], duration
+
+    speech = np.flatnonzero(energy > np.percentile(energy, 10) + margin_db)
+    if not len(speech):
+        return [], duration
+
+    # Gaps of at least 'min_silence_seconds' between consecutive speech frames separate the regions.
+    gaps = np.flatnonzero((np.diff(speech) - 1) * frame_seconds >= min_silence_seconds)
+    starts = speech[np.concatenate([[0], gaps + 1])] * frame_seconds
+    ends = (speech[np.concatenate([gaps, [len(speech) - 1]])] + 1) * frame_seconds
+
+    regions = []
+    for start, end in zip(starts, ends):
+        start, end = max(0.0, start - padding_seconds), min(duration, end + padding_seconds)
+        if regions and start <= regions[-1][1]:
+            regions[-1][1] = round(end, 3)
+        else:
+            regions.append([round(start, 3), round(end, 3)])
+    return regions, duration
+
+def kept_seconds(regions: list[list[float]]) -> float:
+    return sum(end - start for start, end in regions)
+
+def iter_regions(blocks, regions: list[list[float]], sample_rate: int):
+    """
+    Yields the parts of a stream of audio blocks that fall inside 'regions', back to back.
+    """
+
+    bounds = [(int(start * sample_rate), int(end * sample_rate)) for start, end in regions]
+    position = 0
+    for block in blocks:
+        block_end = position + len(block)
+        for start, end in bounds:
+            lo, hi = max(start, position), min(end, block_end)
+            if lo < hi:
+                yield block[lo - position:hi - position]
+        position = block_end
+
+def iter_speech_pcm(source, regions: list[list[float]]):
+    """
+    Decodes 'source' (at RNNoise's native rate, so trimming doesn't band-limit the enhancement) and
+    yields the raw float32 bytes of its speech regions: an input for preprocess.iter_enhanced_audio with
+    input_options=PCM_INPUT_OPTIONS.
+    """
+
+    blocks = iter_decoded_audio(source, sample_rate=SHARD_SAMPLE_RATE)
+    for samples in iter_regions(blocks, regions, SHARD_SAMPLE_RATE):
+        yield samples.tobytes()
+
+def timeline_mapper(regions: list[list[float]]):
+    """
+    Returns a function that maps a time on the trimmed audio (the regions back to back) to the same
+    moment on the original timeline. Without regions (nothing trimmed) it is the identity.
+    """
+
+    if not regions:
+        return lambda t: t
+    trimmed_starts = list(accumulate((end - start for start, end in regions[:-1]), initial=0.0))
+
+    def to_original(t: float) -> float:
+        index = max(0, bisect.bisect_right(trimmed_starts, t) - 1)
+        return regions[index][0] + t - trimmed_starts[index]
+
+    return to_original
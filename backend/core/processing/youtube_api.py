@@ -0,0 +1,108 @@
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+import requests
+
+# The YouTube Data API accepts up to 50 IDs per 'videos' call and returns up to 50 playlist items per page.
+MAX_BATCH_SIZE = 50
+
+def parse_snippet(snippet: dict) -> dict:
+    """
+    Picks the fields we keep from a video's 'snippet': title, publication date, and the best available
+    thumbnail ('high', then 'medium', then 'default').
+    """
+
+    thumbnails = snippet.get("thumbnails", {})
+    thumbnail_url = (
+        thumbnails.get("high", {}) or
+        thumbnails.get("medium", {}) or
+        thumbnails.get("default", {})
+    ).get("url")
+
+    return {
+        "title": snippet.get("title", "Unknown Title"),
+        "thumbnail_url": thumbnail_url,
+        "published_at": snippet.get("publishedAt"),
+    }
+
+class YouTubeDataClient:
+    """
+    Minimal YouTube Data API v3 client over one pooled, keep-alive session.
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, timeout: float = 10.0):
+        self.api_key = api_key or settings.YOUTUBE_API_KEY
+        self.base_url = (base_url or settings.YOUTUBE_API_BASE_URL).rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get(self, endpoint: str, params: dict, etag: str = None) -> requests.Response:
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.session.get(f"{self.base_url}/{endpoint}", params={**params, "key": self.api_key},
+                                    headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def playlist_video_ids(self, playlist_id: str, etag: str = None, known_ids: set = frozenset(),
+                           max_pages: int = None):
+        """
+        Pages through a playlist and returns (video IDs, ETag of the first page). The first page is
+        requested conditionally: if it is unchanged since 'etag', returns (None, etag) after a single
+        (quota-free) 304. The playlist lists the newest uploads first, so paging stops at the first page
+        that reaches an already 'known' video.
+        """
+
+        video_ids, first_etag, page_token, pages = [], None, None, 0
+        while True:
+            params = {"part": "contentDetails", "playlistId": playlist_id, "maxResults": MAX_BATCH_SIZE}
+            if page_token:
+                params["pageToken"] = page_token
+            response = self._get("playlistItems", params, etag=etag if pages == 0 else None)
+            if response.status_code == 304:
+                return None, etag
+
+            data = response.json()
+            if pages == 0:
+                first_etag = response.headers.get("ETag") or data.get("etag")
+            page_ids = [item["contentDetails"]["videoId"] for item in data.get("items", [])]
+            video_ids.extend(page_ids)
+            pages += 1
+
+            page_token = data.get("nextPageToken")
+            if not page_token or any(video_id in known_ids for video_id in page_ids):
+                break
+            if max_pages is not None and pages >= max_pages:
+                break
+
+        return video_ids, first_etag
+
+    def videos_metadata(self, video_ids: list[str]) -> dict:
+        """
+        Returns {video ID: parsed snippet} for the given IDs, MAX_BATCH_SIZE IDs per request. IDs the API
+        doesn't return (private or deleted videos) are absent.
+        """
+
+        metadata = {}
+        for start in range(0, len(video_ids), MAX_BATCH_SIZE):
+            batch = video_ids[start:start + MAX_BATCH_SIZE]
+            data = self._get("videos", {"part": "snippet", "id": ",".join(batch),
+                                        "maxResults": MAX_BATCH_SIZE}).json()
+            for item in data.get("items", []):
+                metadata[item["id"]] = parse_snippet(item["snippet"])
+        return metadata
+
+_CLIENT = None
+
+def get_youtube_client() -> YouTubeDataClient:
+    """
+    Returns the process-wide client, so every caller shares its connection pool.
+    """
+
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = YouTubeDataClient()
+    return _CLIENT
@@ -1,35 +1,38 @@
-from django.conf import settings
 from pytubefix import YouTube
+from pytubefix import request as yt_request
 from pytubefix.cli import on_progress
-from pydub import AudioSegment
 import requests
-import io
 import re
 
-def download_yt_audio(url: str, output_path: str) -> str:
+from .youtube_api import get_youtube_client
+
+def open_yt_audio_stream(url: str):
     """
-    Retrieve .mp3 audio from a specified YouTube video URL.
+    Opens the audio-only YouTube stream without buffering or transcoding it. Returns the video length
+    (in seconds) and an iterator over the raw container bytes, ready to be piped straight into FFmpeg.
     """
 
-    try:
-        yt = YouTube(url, on_progress_callback=on_progress)
-        ys = yt.streams.get_audio_only()
+    yt = YouTube(url)
+    ys = yt.streams.get_audio_only()
+    print(f"Streaming {ys.mime_type} audio ({yt.length}s) from {url}...")
 
-        # Create an in-memory RAM buffer to avoid having to download an intermediate .m4a file.
-        buffer = io.BytesIO()
-        ys.stream_to_buffer(buffer)
-        buffer.seek(0)
+    # YouTube serves DASH audio as fragmented MP4/WebM, which FFmpeg can demux from a pipe as it arrives.
+    return yt.length, yt_request.stream(ys.url)
 
-        # Load the audio from the buffer and coerce it into MP3.
-        raw_audio = AudioSegment.from_file(buffer)
-        # output_filename = os.path.splitext(ys.default_filename)[0] + ".mp3"
-        raw_audio.export(output_path, format="mp3")
+def save_yt_audio_stream(url: str, output_path: str) -> float:
+    """
+    Streams the audio-only YouTube track to disk as-is (no decoding or MP3 re-encoding), chunk by
+    chunk. Returns the video length in seconds. The pipeline writes it into the artifact cache, so
+    later stages (and re-runs) read the file instead of downloading it again.
+    """
 
-    except Exception as e:
-        print(e)
+    duration, chunks = open_yt_audio_stream(url)
+    with open(output_path, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
 
     print(f"Audio saved to: {output_path}!")
-    return output_path
+    return duration
 
 def download_yt_video(url: str) -> str:
     """
@@ -41,69 +44,42 @@ def download_yt_video(url: str) -> str:
 
     return "video.mp4"
 
-def extract_video_metadata(url: str) -> dict:
+def extract_video_id(url: str):
     """
-    Pull out all of the relevant metadata from the YouTube video.
+    Reliably extract the Video ID from any URL format, using a regular expression that handles
+    both "watch?v=" and "youtu.be/" links. Returns None if there isn't one.
     """
 
-    print(f"Fetching video metadata from {url}!")
-
-    # Reliably extract the Video ID from any URL format, using a regular expression
-    # that handles both "watch?v=" and "youtu.be/" links.
     video_id_match = (
         re.search(r"(?<=v=)[\w-]+", url) or
         re.search(r"(?<=youtu\.be/)[\w-]+", url)
     )
-    
-    if not video_id_match:
+    return video_id_match.group(0) if video_id_match else None
+
+def extract_video_metadata(url: str) -> dict:
+    """
+    Pull out all of the relevant metadata from the YouTube video.
+    """
+
+    print(f"Fetching video metadata from {url}!")
+
+    video_id = extract_video_id(url)
+    if not video_id:
         print("ERROR: Could not extract a valid YouTube Video ID from the URL.")
         return {}
     
-    video_id = video_id_match.group(0)
     print(f"Extracted Video ID: {video_id}.")
 
-    # Build the correct API URL to get data for this specific video.
-    api_key = settings.YOUTUBE_API_KEY
-
-    # We use the 'videos' endpoint with the 'snippet' part to get the metadata. Could also
-    # use 'contentDetails' here but that pulls the description, which isn't that useful.
-    api_url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet&id={video_id}&key={api_key}"
-
     try:
-        # Invoke the YouTube Data API and store the returned JSON.
-        response = requests.get(api_url)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Check if the 'items' list exists and has content.
-        if not data.get("items"):
+        # Use the shared, pooled Data API client (the 'videos' endpoint with the 'snippet' part).
+        metadata = get_youtube_client().videos_metadata([video_id]).get(video_id)
+        if not metadata:
             print("ERROR: YouTube API returned no 'items' for this video.")
             return {}
 
-        # The metadata is inside the 'snippet' object of the first item. Use it to safely
-        # get the title, publication date, and best available thumbnail URL.
-        snippet = data["items"][0]["snippet"]
-        title = snippet.get("title", "Unknown Title")
-        published_at = snippet.get("publishedAt")
-
-        # It tries to find 'high', then 'medium', then 'default'.
-        thumbnails = snippet.get("thumbnails", {})
-        thumbnail_url = (
-            thumbnails.get("high", {}) or
-            thumbnails.get("medium", {}) or
-            thumbnails.get("default", {})
-        ).get("url")
-
-        print(f"Successfully parsed title: {title}.")
-        
-        # Return a clean dictionary of the parsed JSON.
-        return {
-            "title": title,
-            "thumbnail_url": thumbnail_url,
-            "published_at": published_at,
-        }
+        print(f"Successfully parsed title: {metadata['title']}.")
+        return metadata
 
     except requests.exceptions.RequestException as e:
         print(f"ERROR: Failed to interface with YouTube API: {e}.")
         return {}
-    
\ No newline at end of file
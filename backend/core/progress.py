@@ -0,0 +1,193 @@
+from django.conf import settings
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import redis.asyncio as aioredis
+import asyncio
+import redis
+import json
+import time
+
+# Job progress, pushed instead of polled. Pipeline stages publish progress events for their video to a
+# Redis pub/sub channel, and the latest event is also kept as the video's snapshot. Web processes fan
+# the events out to server-sent-event streams (one Redis subscription per process, see ProgressHub), and
+# serve the status endpoint from the snapshot; neither touches Postgres while a job runs.
+#
+# Every event is a complete snapshot: {video_id, status, stage, stage_percent, percent, eta_seconds,
+# finished, updated_at}, where 'status' is the video's status, 'percent' is an estimate over the whole
+# pipeline (stages weighted by their typical share of the work), 'eta_seconds' is the time left in the
+# current stage extrapolated from its progress so far, and 'finished' marks the last event of a job.
+CHANNEL_PREFIX = "progress:video:"
+SNAPSHOT_PREFIX = "progress:snapshot:"
+
+# Incremental jobs enhance inside their transcribe stage and then run a separate refine stage (alignment
+# and diarization), which the regular transcribe stage already includes.
+STAGE_WEIGHTS = {"queued": 0, "metadata": 1, "download": 5, "enhance": 10, "transcribe": 55, "refine": 15,
+                 "summarize": 10, "index": 4}
+
+def channel(video_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{video_id}"
+
+def snapshot_key(video_id: int) -> str:
+    return f"{SNAPSHOT_PREFIX}{video_id}"
+
+def overall_percent(stage: str, fraction: float) -> float:
+    """
+    Pipeline-wide progress for being 'fraction' of the way through 'stage'.
+    """
+
+    stages = list(STAGE_WEIGHTS)
+    done = sum(STAGE_WEIGHTS[name] for name in stages[:stages.index(stage)])
+    return round(100 * (done + STAGE_WEIGHTS[stage] * fraction) / sum(STAGE_WEIGHTS.values()), 1)
+
+_REDIS = None
+
+def _redis() -> redis.Redis:
+    global _REDIS
+    if _REDIS is None:
+        _REDIS = redis.Redis.from_url(settings.PROGRESS_REDIS_URL)
+    return _REDIS
+
+def publish(video_id: int, status: str, stage: str = None, stage_percent: float = None, percent: float = None,
+            eta_seconds: float = None, finished: bool = False, **extra) -> dict:
+    """
+    Stores the event as the video's snapshot and publishes it to the video's channel. Progress is
+    best-effort: a Redis failure is logged and never fails the pipeline.
+    """
+
+    event = {"video_id": video_id, "status": status, "stage": stage, "stage_percent": stage_percent,
+             "percent": percent, "eta_seconds": eta_seconds, "finished": finished, "updated_at": time.time(),
+             **extra}
+    payload = json.dumps(event)
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        pipe.set(snapshot_key(video_id), payload, ex=settings.PROGRESS_SNAPSHOT_TTL_SECONDS)
+        pipe.publish(channel(video_id), payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Progress Service: Failed to publish progress for video {video_id} ({e}).")
+    return event
+
+def publish_status(video_id: int, status: str, **extra) -> dict:
+    """
+    Publishes a bare status change (e.g. a video queued for processing), resetting the stage progress.
+    """
+
+    finished = status in ("COMPLETED", "FAILED")
+    return publish(video_id, status, percent=100.0 if status == "COMPLETED" else None, finished=finished, **extra)
+
+def get_snapshot(video_id: int):
+    """
+    The video's latest progress event, or None if there is none (or Redis is unavailable).
+    """
+
+    try:
+        payload = _redis().get(snapshot_key(video_id))
+    except redis.RedisError as e:
+        print(f"Progress Service: Failed to read the snapshot of video {video_id} ({e}).")
+        return None
+    return None if payload is None else json.loads(payload)
+
+class StageProgress:
+    """
+    Reports one video's progress through one pipeline stage: start(), any number of update(fraction)
+    calls (throttled to one event per PROGRESS_MIN_INTERVAL_SECONDS), and finish().
+    """
+
+    def __init__(self, job: dict, stage: str):
+        self.video_id = job["video_id"]
+        self.stage = stage
+        # The video's status as far as the job knows (an upgrade runs behind a completed video).
+        self.status = job.get("status", "PROCESSING")
+        self.extra = {"upgrade": True} if job.get("upgrade") else {}
+        self.started = time.monotonic()
+        self._last_published = 0.0
+
+    def _publish(self, fraction: float, eta_seconds: float = None):
+        self._last_published = time.monotonic()
+        publish(self.video_id, self.status, self.stage, stage_percent=round(100 * fraction, 1),
+                percent=overall_percent(self.stage, fraction), eta_seconds=eta_seconds, **self.extra)
+
+    def start(self):
+        self._publish(0.0)
+
+    def update(self, fraction: float):
+        now = time.monotonic()
+        if now - self._last_published < settings.PROGRESS_MIN_INTERVAL_SECONDS:
+            return
+        fraction = min(max(fraction, 0.0), 1.0)
+        elapsed = now - self.started
+        eta_seconds = round(elapsed * (1 - fraction) / fraction, 1) if fraction > 0 else None
+        self._publish(fraction, eta_seconds)
+
+    def finish(self):
+        self._publish(1.0, 0.0)
+
+class ProgressHub:
+    """
+    Fans progress events out to the server-sent-event streams of a web process. A single pattern
+    subscription receives every video's events and hands each to the queues of that video's streams,
+    so a process holds one Redis connection however many clients are following jobs.
+    """
+
+    # A slow client only needs the latest snapshot, so its queue drops the oldest events when full.
+    QUEUE_SIZE = 16
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._listener = None
+        self._loop = None
+
+    def ensure_listening(self):
+        """
+        Starts (or, after a Redis failure, restarts) the subscription on the running event loop.
+        """
+
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._loop is not loop:
+            self._loop = loop
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        client = aioredis.Redis.from_url(settings.PROGRESS_REDIS_URL)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            async for message in pubsub.listen():
+                if message["type"] == "pmessage":
+                    video_id = int(message["channel"].decode().rsplit(":", 1)[1])
+                    self._dispatch(video_id, json.loads(message["data"]))
+        except aioredis.RedisError as e:
+            print(f"Progress Hub: Redis subscription failed ({e}); it restarts with the next heartbeat.")
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+    def _dispatch(self, video_id: int, event: dict):
+        for queue in list(self._subscribers.get(video_id, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, video_id: int):
+        """
+        Yields a queue that receives the video's events until the block exits.
+        """
+
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers[video_id].add(queue)
+        self.ensure_listening()
+        try:
+            yield queue
+        finally:
+            self._subscribers[video_id].discard(queue)
+            if not self._subscribers[video_id]:
+                del self._subscribers[video_id]
+
+_HUB = None
+
+def get_progress_hub() -> ProgressHub:
+    global _HUB
+    if _HUB is None:
+        _HUB = ProgressHub()
+    return _HUB
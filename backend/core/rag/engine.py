@@ -0,0 +1,209 @@
+from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import Chroma
+from chromadb.api.client import SharedSystemClient
+from contextlib import contextmanager
+import threading
+import os
+
+CHROMA_DATA_PATH = "chroma_data/"
+CHROMA_COLLECTION_NAME = "seahawks_transcripts"
+
+# It's crucial to use the exact same model for indexing and querying.
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# The indexing worker and the web process are different processes, so they coordinate through a
+# tiny marker file next to the Chroma data: every write bumps it, every query compares against it.
+INDEX_VERSION_FILE = os.path.join(CHROMA_DATA_PATH, "index_version")
+
+def read_index_version() -> str:
+    """
+    Returns the current index version marker (empty if nothing has been indexed yet).
+    """
+
+    try:
+        with open(INDEX_VERSION_FILE) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+def bump_index_version() -> str:
+    """
+    Publishes a new index version, so that resident readers know to reopen the collection.
+    """
+
+    os.makedirs(CHROMA_DATA_PATH, exist_ok=True)
+    version = os.urandom(8).hex()
+
+    # Write-then-rename keeps readers from ever seeing a half-written marker.
+    tmp_path = f"{INDEX_VERSION_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, INDEX_VERSION_FILE)
+    return version
+
+class ReadWriteLock:
+    """
+    Any number of readers, or a single writer. A waiting writer holds off new readers, so that a steady
+    stream of them can't starve it.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+class RetrievalEngine:
+    """
+    Keeps the MiniLM encoder and the Chroma collection handle resident for the lifetime of the process.
+    Safe to share across request threads: every use of the handle holds a read lock, and the handle is
+    only swapped (under the write lock, i.e. once no query is using the old one) when the indexing worker
+    has published a new index version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handle_lock = ReadWriteLock()
+        self._encoder = None
+        self._store = None
+        self._store_version = None
+
+    @property
+    def encoder(self) -> HuggingFaceEmbeddings:
+        if self._encoder is None:
+            with self._lock:
+                if self._encoder is None:
+                    print("RAG Engine: Loading embedding model...")
+                    self._encoder = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        return self._encoder
+
+    def _open_store(self) -> Chroma:
+        # Chroma caches one client per persist directory inside the process, including its in-memory
+        # vector index. Dropping that cache is what makes vectors written by the worker visible; it also
+        # tears down the old handle's system, hence the write lock around this.
+        SharedSystemClient.clear_system_cache()
+        return Chroma(persist_directory=CHROMA_DATA_PATH, embedding_function=self.encoder,
+                      collection_name=CHROMA_COLLECTION_NAME)
+
+    @property
+    def store(self) -> Chroma:
+        """
+        The collection handle for the current index version. Use it through 'using_store', which keeps
+        it from being swapped out mid-query, rather than holding on to it.
+        """
+
+        version = read_index_version()
+        if self._store is None or version != self._store_version:
+            self.encoder  # Load outside the lock below (it takes the same lock).
+            with self._lock:
+                if self._store is None or version != self._store_version:
+                    with self._handle_lock.writing():
+                        print(f"RAG Engine: Opening Chroma collection (index version '{version}')...")
+                        self._store = self._open_store()
+                        self._store_version = version
+        return self._store
+
+    @contextmanager
+    def using_store(self):
+        """
+        Yields the current collection handle, which stays open until the block ends. Don't nest these
+        blocks: a reopen waiting on the outer one would hold off the inner one.
+        """
+
+        self.store
+        with self._handle_lock.reading():
+            yield self._store
+
+    @property
+    def index_version(self):
+        return self._store_version
+
+    def similarity_search(self, question: str, k: int = 3):
+        """
+        Returns the 'k' transcript chunks closest to the question.
+        """
+
+        with self.using_store() as store:
+            return store.similarity_search(question, k=k)
+
+    def similarity_search_by_vector(self, vector: list[float], k: int = 3):
+        """
+        Same as similarity_search, for callers that have already embedded the question.
+        """
+
+        with self.using_store() as store:
+            return store.similarity_search_by_vector(vector, k=k)
+
+    def add_texts(self, texts: list[str], metadatas: list[dict]):
+        """
+        Writes new chunks to the collection and announces the new index version to other processes.
+        """
+
+        with self.using_store() as store:
+            store.add_texts(texts=texts, metadatas=metadatas)
+            store.persist()
+        bump_index_version()
+
+    def replace_video_texts(self, video_id: int, texts: list[str], metadatas: list[dict]):
+        """
+        Like add_texts, but first drops the chunks previously indexed for the video (e.g. after its
+        transcript was upgraded), so it never appears twice in the results.
+        """
+
+        with self.using_store() as store:
+            store.delete(where={"video_id": video_id})
+            store.add_texts(texts=texts, metadatas=metadatas)
+            store.persist()
+        bump_index_version()
+
+    def warm_up(self):
+        """
+        Loads the encoder and opens the collection ahead of the first request.
+        """
+
+        self.store
+        print("RAG Engine: Warm-up complete.")
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_retrieval_engine() -> RetrievalEngine:
+    """
+    Returns the process-wide retrieval engine, creating it on first use.
+    """
+
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = RetrievalEngine()
+    return _ENGINE
@@ -0,0 +1,86 @@
+from django.conf import settings
+import numpy as np
+import threading
+
+from .engine import read_index_version
+
+class SemanticAnswerCache:
+    """
+    A small in-memory vector index of recently answered questions. A new question whose embedding is
+    within 'threshold' cosine similarity of a cached one gets the cached answer and sources back, so
+    "how's Geno's ankle" and "update on Geno's ankle injury" only cost one retrieval and LLM call.
+
+    The whole cache is dropped whenever the RAG index version changes (i.e. a new video was indexed),
+    so answers never outlive a fresh press conference.
+    """
+
+    def __init__(self, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._results = []
+        self._index_version = None
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync_index_version(self):
+        version = read_index_version()
+        if version != self._index_version:
+            if self._results:
+                print(f"RAG Semantic Cache: Index changed, dropping {len(self._results)} cached answers.")
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._results = []
+            self._index_version = version
+
+    def lookup(self, question_vector):
+        """
+        Returns the cached result for the closest previous question, or None if none is close enough.
+        """
+
+        query = self._normalize(question_vector)
+        with self._lock:
+            self._sync_index_version()
+            if not self._results:
+                return None
+
+            similarities = self._vectors @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            question, result = self._results[best]
+            print(f"RAG Semantic Cache: Hit ({similarities[best]:.3f} similar to '{question}').")
+            return result
+
+    def store(self, question: str, question_vector, result: dict):
+        """
+        Remembers an answer, evicting the oldest entry once the cache is full.
+        """
+
+        vector = self._normalize(question_vector)[np.newaxis, :]
+        with self._lock:
+            self._sync_index_version()
+            self._vectors = vector if not self._results else np.vstack([self._vectors, vector])
+            self._results.append((question, result))
+
+            if len(self._results) > self.max_entries:
+                self._vectors = self._vectors[1:]
+                self._results.pop(0)
+
+_SEMANTIC_CACHE = None
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    """
+    Returns the process-wide semantic answer cache configured in settings.
+    """
+
+    global _SEMANTIC_CACHE
+    if _SEMANTIC_CACHE is None:
+        _SEMANTIC_CACHE = SemanticAnswerCache(settings.RAG_SEMANTIC_CACHE_THRESHOLD,
+                                              settings.RAG_SEMANTIC_CACHE_MAX_ENTRIES)
+    return _SEMANTIC_CACHE
@@ -1,27 +1,28 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from django.conf import settings
-import openai
+import asyncio
 
-from ..models import Video
+from ..models import Transcript
+from ..llm.client import astream_chat_completion, chat_completion
+from .engine import get_retrieval_engine
+from .semantic_cache import get_semantic_cache
 
-CHROMA_DATA_PATH = "chroma_data/"
-CHROMA_COLLECTION_NAME = "seahawks_transcripts"
+ANSWER_MODEL = "llama-3.3-70b-versatile"
+ANSWER_PROMPT_VERSION = 1
 
 def create_video_embeddings(video_id: int):
     """
-    Develops a set of embeddings that wrap around the video transcript text.
+    Develops a set of embeddings that wrap around the video transcript text. Errors propagate, so the
+    indexing stage is recorded as failed.
     """
 
     try:
-        video = Video.objects.get(id=video_id)
-        if not video.transcript_data or 'segments' not in video.transcript_data:
+        # Only the precomputed full text is needed, never the word/segment arrays.
+        transcript = Transcript.objects.only("full_text").filter(video_id=video_id).first()
+        if transcript is None:
             print(f"RAG Service: Video {video_id} has no transcript data. Skipping embedding.")
             return
 
-        # Combine all text segments into a single block of text.
-        full_transcript_text = " ".join(seg['text'].strip() for seg in video.transcript_data['segments'] if seg['text'])
+        full_transcript_text = transcript.full_text
 
         if not full_transcript_text:
             print(f"RAG Service: Transcript for Video {video_id} is empty. Skipping embedding.")
@@ -36,51 +37,42 @@ def create_video_embeddings(video_id: int):
         chunks = text_splitter.split_text(full_transcript_text)
         print(f"RAG Service: Split transcript for Video {video_id} into {len(chunks)} chunks.")
 
-        # Load the free, local embedding model from HuggingFace. It's crucial to use the
-        # exact same model for indexing and querying.
-        model_name = "sentence-transformers/all-MiniLM-L6-v2"
-        embedding_model = HuggingFaceEmbeddings(model_name=model_name)
-
-        # Generate vector embeddings and populate ChromaDB accordingly.
-        vector_store = Chroma.from_texts(texts=chunks, embedding=embedding_model, 
-                                         metadatas=[{"video_id": video_id} for _ in chunks],
-                                         persist_directory=CHROMA_DATA_PATH,
-                                         collection_name=CHROMA_COLLECTION_NAME)
-        vector_store.persist()
+        # Generate vector embeddings with the resident MiniLM encoder and populate ChromaDB accordingly.
+        # This also bumps the index version, so the web process picks up the new vectors on its next query.
+        # Any chunks from an earlier transcript of the same video are replaced.
+        get_retrieval_engine().replace_video_texts(video_id, texts=chunks,
+                                                   metadatas=[{"video_id": video_id} for _ in chunks])
         print(f"RAG Service (Chroma): Successfully saved {len(chunks)} chunks to ChromaDB.")
 
-    except Video.DoesNotExist:
-        print(f"ERROR: Video with ID {video_id} not found.")
     except Exception as e:
         print(f"ERROR: An unexpected RAG Error occurred for Video ID {video_id}: {e}!")
+        raise
 
 
-def answer_question(question: str) -> dict:
+def retrieve_answer_context(question: str) -> dict:
     """
-    Performs the full RAG pipeline to answer a user's question.
+    The retrieval half of the RAG pipeline (everything before the LLM call):
     1. Embeds the user's question into a vector.
-    2. Retrieves the most relevant transcript chunks from the database using vector similarity search.
-    3. Augments a prompt with the retrieved context.
-    4. Generates a final, synthesized answer using a powerful LLM.
+    2. Returns a cached answer if a near-identical question was answered recently.
+    3. Retrieves the most relevant transcript chunks from the database using vector similarity search.
+    4. Augments a prompt with the retrieved context.
+    Returns a dict with either a final 'result', or the 'prompt' and 'sources' for generation.
     """
 
-    print(f"RAG Service: Received question: '{question}'")
+    # Embed the question once; the vector serves both the semantic answer cache and the retrieval.
+    engine = get_retrieval_engine()
+    question_vector = engine.encoder.embed_query(question)
 
-    # Use the exact same embedding model as in the indexing step.
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    embedding_model = HuggingFaceEmbeddings(model_name=model_name)
-    
-    # Load the persisted Chroma database from disk, now we have context from the DB!
-    vector_store = Chroma(
-        persist_directory=CHROMA_DATA_PATH, 
-        embedding_function=embedding_model,
-        collection_name=CHROMA_COLLECTION_NAME
-    )
-
-    # Perform a semantic search to load relevant sources/chunks.
-    relevant_chunks = vector_store.similarity_search(question, k=3)
+    # Near-duplicates of a recently answered question skip retrieval and the LLM call entirely.
+    cached_result = get_semantic_cache().lookup(question_vector)
+    if cached_result is not None:
+        return {"result": cached_result}
+
+    # Perform a semantic search to load relevant sources/chunks. The encoder and the Chroma handle
+    # stay resident in the process, so this is just a vector lookup.
+    relevant_chunks = engine.similarity_search_by_vector(question_vector, k=3)
     if not relevant_chunks:
-        return {"answer": "I couldn't find any relevant information to answer that.", "sources": []}
+        return {"result": {"answer": "I couldn't find any relevant information to answer that.", "sources": []}}
     
     context = "\n\n---\n\n".join([doc.page_content for doc in relevant_chunks])
     
@@ -109,12 +101,54 @@ def answer_question(question: str) -> dict:
     3.  If the answer is not found in the context, you MUST respond with: "I couldn't find specific information 
         about that in the press conferences."
     """
-    
-    # Craft a final coherent answer with an LLM call.
-    client = openai.OpenAI(api_key=settings.GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
-    response = client.chat.completions.create(model="llama-3.3-70b-versatile", 
-                                              messages=[{"role": "user", "content": prompt}])
-    answer = response.choices[0].message.content
-
-    # Return the RAG work in JSON format.
-    return {"answer": answer, "sources": sources}
+
+    return {"prompt": prompt, "sources": sources, "question_vector": question_vector}
+
+def answer_question(question: str) -> dict:
+    """
+    Performs the full RAG pipeline to answer a user's question: retrieval (see retrieve_answer_context),
+    then a final, synthesized answer from a powerful LLM.
+    """
+
+    print(f"RAG Service: Received question: '{question}'")
+
+    retrieval = retrieve_answer_context(question)
+    if "result" in retrieval:
+        return retrieval["result"]
+
+    # Craft a final coherent answer with an LLM call (served from the response cache when the same
+    # question has already been asked against the same context).
+    answer = chat_completion(model=ANSWER_MODEL, prompt_name="rag_answer", prompt_version=ANSWER_PROMPT_VERSION,
+                             messages=[{"role": "user", "content": retrieval["prompt"]}])
+
+    # Return the RAG work in JSON format (and remember it for similar questions).
+    result = {"answer": answer, "sources": retrieval["sources"]}
+    get_semantic_cache().store(question, retrieval["question_vector"], result)
+    return result
+
+async def stream_answer(question: str):
+    """
+    Async, streaming variant of answer_question. Retrieval runs in a worker thread (off the event
+    loop); then yields ("sources", [...]) first, followed by ("token", text) events as the LLM
+    generates the answer.
+    """
+
+    print(f"RAG Service: Received streaming question: '{question}'")
+
+    retrieval = await asyncio.to_thread(retrieve_answer_context, question)
+    if "result" in retrieval:
+        yield "sources", retrieval["result"]["sources"]
+        yield "token", retrieval["result"]["answer"]
+        return
+
+    yield "sources", retrieval["sources"]
+
+    answer_parts = []
+    async for token in astream_chat_completion(model=ANSWER_MODEL, prompt_name="rag_answer",
+                                               prompt_version=ANSWER_PROMPT_VERSION,
+                                               messages=[{"role": "user", "content": retrieval["prompt"]}]):
+        answer_parts.append(token)
+        yield "token", token
+
+    result = {"answer": "".join(answer_parts), "sources": retrieval["sources"]}
+    get_semantic_cache().store(question, retrieval["question_vector"], result)
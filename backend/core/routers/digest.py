@@ -1,8 +1,11 @@
 from ninja import Router, Schema
+from django.db.models import Prefetch
 from typing import List, Optional
 from datetime import date
+import time
 from ..models import DailyDigest, Video
 from ..tasks import build_daily_digest
+from ..cache.responses import cached_response
 
 digest_router = Router()
 
@@ -22,8 +25,16 @@ class DigestSchema(Schema):
 
     @staticmethod
     def resolve_video_ids(obj: DailyDigest):
+        # Served from the prefetch in digests_with_video_ids() when listing, so there's no query per digest.
         return [video.id for video in obj.videos.all()]
 
+def digests_with_video_ids():
+    """
+    Digests with their video IDs (only) prefetched in a single extra query.
+    """
+
+    return DailyDigest.objects.prefetch_related(Prefetch("videos", queryset=Video.objects.only("id")))
+
 @digest_router.post("/", response={202: DigestSchema})
 def create_digest(request, payload: DigestCreateSchema):
     """
@@ -31,27 +42,29 @@ def create_digest(request, payload: DigestCreateSchema):
     """
 
     digest = DailyDigest.objects.create()
-    videos = Video.objects.filter(id__in=payload.video_ids)
+    video_ids = Video.objects.filter(id__in=payload.video_ids).values_list("id", flat=True)
 
-    digest.videos.set(videos)
-    build_daily_digest.delay(digest.id)  # Perform the Celery task.
+    digest.videos.set(video_ids)
+    build_daily_digest.delay(digest.id, enqueued_at=time.time())  # Perform the Celery task.
     
     # 202: We've received and accepted the request for processing, but that processing
     # is not yet complete (continues to run silently after-the-fact).
     return 202, digest
 
 @digest_router.get("/", response=List[DigestSchema])
+@cached_response(List[DigestSchema], scopes=["digests"])
 def list_digests(request):
     """
     List all of the daily digests we've accumulated.
     """
 
-    return DailyDigest.objects.all()
+    return digests_with_video_ids()
 
 @digest_router.get("/{digest_id}", response=DigestSchema)
+@cached_response(DigestSchema, scopes=["digest:{digest_id}"])
 def get_digest(request, digest_id: int):
     """
     Extract digest data attached to a particular digest ID.
     """
 
-    return DailyDigest.objects.get(id=digest_id)
+    return digests_with_video_ids().get(id=digest_id)
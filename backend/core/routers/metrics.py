@@ -0,0 +1,17 @@
+from ninja import Router
+from django.http import HttpResponse
+from ..metrics import render_prometheus
+
+metrics_router = Router()
+
+# The Prometheus text exposition format (version 0.0.4).
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@metrics_router.get("/")
+def pipeline_metrics(request):
+    """
+    Per-stage pipeline timings (duration, queue wait and real-time factor histograms, recent p50/p95)
+    and run/outcome counters, for Prometheus to scrape.
+    """
+
+    return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
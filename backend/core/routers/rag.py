@@ -1,6 +1,8 @@
 from ninja import Schema, Router, Body
+from django.http import StreamingHttpResponse
 from typing import List
-from ..rag.services import answer_question
+from ..rag.services import answer_question, stream_answer
+import json
 
 rag_router = Router()
 
@@ -22,3 +24,29 @@ def query_transcripts(request, payload: QuerySchema = Body(...)):
 
     result = answer_question(payload.query)
     return result
+
+async def _answer_events(question: str):
+    """
+    Formats the streamed answer as server-sent events: one 'sources' event, a 'token' event per chunk
+    of generated text, and a final 'done' (or 'error') event.
+    """
+
+    try:
+        async for event, data in stream_answer(question):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        print(f"RAG Service: Streaming answer failed: {e}!")
+        yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+
+@rag_router.post("/streamTranscripts")
+async def stream_transcripts(request, payload: QuerySchema = Body(...)):
+    """
+    Async counterpart of queryTranscripts (serve via ASGI): streams the sources, then the answer
+    tokens as they are generated, as server-sent events.
+    """
+
+    response = StreamingHttpResponse(_answer_events(payload.query), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Stop reverse proxies from buffering the stream.
+    return response
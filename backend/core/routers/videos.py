@@ -1,7 +1,19 @@
 from ninja import Schema, Router
+from ninja.errors import HttpError
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
 from typing import List, Optional
 from datetime import datetime
-from ..models import Video
+import asyncio
+import base64
+import json
+
+from ..cache.responses import cached_response
+from ..models import Video, Transcript
+from ..processing.transcribe import TRANSCRIPTION_PROFILES
+from ..progress import get_progress_hub, get_snapshot, publish_status
 from ..tasks import process_video_pipeline
 
 videos_router = Router()
@@ -10,6 +22,10 @@ videos_router = Router()
 
 class VideoCreateSchema(Schema):
     youtube_url: str
+    profile: Optional[str] = None  # Transcription profile; the global default if omitted.
+
+class TranscriptUpgradeSchema(Schema):
+    profile: str = "full"
 
 class VideoSchema(Schema):
     id: int
@@ -19,15 +35,89 @@ class VideoSchema(Schema):
     title: Optional[str] = None
     thumbnail_url: Optional[str] = None
     published_at: Optional[datetime] = None
+    transcription_profile: Optional[str] = None
+    skipped_audio_fraction: Optional[float] = None
     summary_data: Optional[dict] = None
     transcript_data: Optional[dict] = None
 
+    @staticmethod
+    def resolve_transcript_data(obj: Video):
+        # Segments come from the compact transcript, in the same WhisperX shape (words included) as the
+        # raw JSON that older videos still carry. While a video is transcribed incrementally, this is the
+        # part committed so far.
+        transcript = getattr(obj, "transcript", None)
+        if transcript is not None:
+            compact = transcript.load()
+            return {"segments": compact.segments(include_words=True), "word_segments": compact.word_segments(),
+                    "refinement": transcript.refinement, "committed_seconds": transcript.committed_seconds}
+        return obj.transcript_data
+
+# The list endpoint only returns what a video card needs; the heavy transcript/summary JSON is fetched
+# per video through getVideoData.
+class VideoListItemSchema(Schema):
+    id: int
+    youtube_url: str
+    status: str
+    speaker: Optional[str] = None
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+class VideoPageSchema(Schema):
+    items: List[VideoListItemSchema]
+    next_cursor: Optional[str] = None
+
+# Transcript reads that don't need the whole transcript: derived stats, a time range or one segment.
+class TranscriptInfoSchema(Schema):
+    video_id: int
+    duration: float
+    segment_count: int
+    word_count: int
+    speaker_talk_time: dict
+    full_text: str
+    refinement: str  # 'asr' while an incremental transcription is still committing windows, then 'final'.
+    committed_seconds: Optional[float] = None
+
+class TranscriptWordSchema(Schema):
+    word: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+    score: Optional[float] = None
+    speaker: Optional[str] = None
+
+class TranscriptSegmentSchema(Schema):
+    index: int
+    start: Optional[float] = None
+    end: Optional[float] = None
+    text: str
+    speaker: Optional[str] = None
+    words: Optional[List[TranscriptWordSchema]] = None
+
+# Job progress: the latest progress event of a video (see core/progress.py).
+class VideoStatusSchema(Schema):
+    video_id: int
+    status: str
+    stage: Optional[str] = None
+    stage_percent: Optional[float] = None
+    percent: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    finished: bool = False
+    upgrade: bool = False
+    error: Optional[str] = None
+    updated_at: Optional[float] = None
+
+LIST_FIELDS = [name for name in VideoListItemSchema.model_fields]
+MAX_PAGE_SIZE = 200
+
 @videos_router.post("/submitVideo", response={201: VideoSchema})
 def submit_video(request, payload: VideoCreateSchema):
     """
     Submit a new video for processing.
     """
 
+    if payload.profile and payload.profile not in TRANSCRIPTION_PROFILES:
+        raise HttpError(400, f"Unknown transcription profile '{payload.profile}'.")
+
     video, created = Video.objects.get_or_create(youtube_url=payload.youtube_url)
 
     # Only retry if the video has status FAILED or PENDING (incomplete prior run).
@@ -35,7 +125,8 @@ def submit_video(request, payload: VideoCreateSchema):
         print(f"Submitting video {video.id} for processing.")
         video.status = 'PENDING'
         video.save()
-        process_video_pipeline.delay(video.id)
+        publish_status(video.id, 'PENDING')
+        process_video_pipeline.delay(video.id, payload.profile)
     else:
         print(f"Video {video.id} is already processing or complete. Not submitting!")
 
@@ -43,20 +134,179 @@ def submit_video(request, payload: VideoCreateSchema):
     # client's request, including the resource data on response.
     return 201, video
 
-@videos_router.get("/listVideos", response=List[VideoSchema])
-def list_videos(request):
+def encode_cursor(video: Video) -> str:
+    published_at = video.published_at.isoformat() if video.published_at else None
+    return base64.urlsafe_b64encode(json.dumps([published_at, video.id]).encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        published_at, video_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(published_at) if published_at else None), int(video_id)
+    except (ValueError, TypeError):
+        raise HttpError(400, "Invalid cursor.")
+
+@videos_router.post("/upgradeTranscript/{video_id}", response={202: VideoSchema})
+def upgrade_transcript(request, video_id: int, payload: TranscriptUpgradeSchema):
+    """
+    Re-transcribe a completed video with a better profile in the background (e.g. a same-day 'fast'
+    transcript upgraded to 'full'). The current transcript stays available until the new one lands.
+    """
+
+    if payload.profile not in TRANSCRIPTION_PROFILES:
+        raise HttpError(400, f"Unknown transcription profile '{payload.profile}'.")
+
+    video = Video.objects.get(id=video_id)
+    if video.status != 'COMPLETED':
+        raise HttpError(409, f"Video {video_id} is not completed yet.")
+
+    if video.transcription_profile != payload.profile:
+        print(f"Upgrading video {video.id} from '{video.transcription_profile}' to '{payload.profile}'.")
+        process_video_pipeline.delay(video.id, payload.profile, upgrade=True)
+    return 202, video
+
+@videos_router.get("/listVideos", response=VideoPageSchema)
+@cached_response(VideoPageSchema, scopes=["videos"])
+def list_videos(request, status: Optional[str] = None, speaker: Optional[str] = None,
+                published_after: Optional[datetime] = None, published_before: Optional[datetime] = None,
+                cursor: Optional[str] = None, limit: int = 50):
     """
-    List all of the videos that have been interacted with so far.
+    List videos newest first (by published_at, then id), optionally filtered by status, speaker and a
+    published_at range. Pages are keyset-paginated: pass the returned 'next_cursor' to get the next page.
     """
 
-    videos = Video.objects.all()
-    return videos
+    videos = Video.objects.only(*LIST_FIELDS)
+    if status:
+        videos = videos.filter(status=status)
+    if speaker:
+        videos = videos.filter(speaker=speaker)
+    if published_after:
+        videos = videos.filter(published_at__gte=published_after)
+    if published_before:
+        videos = videos.filter(published_at__lt=published_before)
+
+    # Seek past the last row of the previous page instead of using OFFSET, so every page costs the same
+    # index range scan. Videos without a published_at sort last.
+    if cursor:
+        published_at, video_id = decode_cursor(cursor)
+        if published_at is None:
+            videos = videos.filter(published_at__isnull=True, id__lt=video_id)
+        else:
+            videos = videos.filter(Q(published_at__lt=published_at) | Q(published_at=published_at, id__lt=video_id)
+                                   | Q(published_at__isnull=True))
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page = list(videos.order_by(F("published_at").desc(nulls_last=True), "-id")[:limit + 1])
+
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return {"items": page[:limit], "next_cursor": next_cursor}
 
 @videos_router.get("/getVideoData/{video_id}", response=VideoSchema)
+@cached_response(VideoSchema, scopes=["video:{video_id}"])
 def get_video(request, video_id: int):
     """
     Retrieve video data for the given video ID.
     """
 
-    video = Video.objects.get(id=video_id)
+    video = Video.objects.select_related("transcript").get(id=video_id)
     return video
+
+def _get_transcript(video_id: int, *fields: str) -> Transcript:
+    transcript = Transcript.objects.only("video_id", *fields).filter(video_id=video_id).first()
+    if transcript is None:
+        raise HttpError(404, f"Video {video_id} has no transcript.")
+    return transcript
+
+@videos_router.get("/getTranscriptInfo/{video_id}", response=TranscriptInfoSchema)
+@cached_response(TranscriptInfoSchema, scopes=["video:{video_id}"])
+def get_transcript_info(request, video_id: int):
+    """
+    Retrieve the precomputed transcript fields (full text, duration, counts, per-speaker talk time).
+    """
+
+    return _get_transcript(video_id, "full_text", "duration", "segment_count", "word_count", "speaker_talk_time",
+                           "refinement", "committed_seconds")
+
+@videos_router.get("/getTranscriptRange/{video_id}", response=List[TranscriptSegmentSchema])
+@cached_response(List[TranscriptSegmentSchema], scopes=["video:{video_id}"])
+def get_transcript_range(request, video_id: int, start: float = 0.0, end: Optional[float] = None,
+                         include_words: bool = False):
+    """
+    Retrieve the transcript segments overlapping [start, end) seconds (to the end if 'end' is omitted).
+    """
+
+    compact = _get_transcript(video_id, "data", "speakers").load()
+    return compact.segments_between(start, end if end is not None else float("inf"), include_words)
+
+@videos_router.get("/getTranscriptSegment/{video_id}/{index}", response=TranscriptSegmentSchema)
+@cached_response(TranscriptSegmentSchema, scopes=["video:{video_id}"])
+def get_transcript_segment(request, video_id: int, index: int, include_words: bool = True):
+    """
+    Retrieve a single transcript segment by its index.
+    """
+
+    compact = _get_transcript(video_id, "data", "speakers").load()
+    if not 0 <= index < len(compact):
+        raise HttpError(404, f"Video {video_id} has no transcript segment {index}.")
+    return compact.segment(index, include_words)
+
+def video_status_snapshot(video_id: int) -> dict:
+    """
+    The video's latest progress event, from Redis. Only a video without one (never processed since
+    progress was introduced, or idle past the snapshot TTL) costs a status-only query, which then seeds it.
+    """
+
+    snapshot = get_snapshot(video_id)
+    if snapshot is None:
+        status = Video.objects.filter(id=video_id).values_list("status", flat=True).first()
+        if status is None:
+            raise HttpError(404, f"Video {video_id} does not exist.")
+        snapshot = publish_status(video_id, status)
+    return snapshot
+
+@videos_router.get("/getVideoStatus/{video_id}", response=VideoStatusSchema)
+def get_video_status(request, video_id: int):
+    """
+    Retrieve just the processing status and progress of a video: the lightweight fallback for clients
+    that can't follow streamProgress.
+    """
+
+    return video_status_snapshot(video_id)
+
+def _sse(event: dict) -> str:
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+async def _progress_events(video_id: int, first: dict):
+    """
+    Streams the video's progress events as server-sent events, starting with its current snapshot,
+    until the job finishes (or the client goes away). Quiet periods get a keep-alive comment.
+    """
+
+    hub = get_progress_hub()
+    async with hub.subscribe(video_id) as queue:
+        # Re-read the snapshot now that we are subscribed, so no event can fall in between.
+        event = await sync_to_async(get_snapshot)(video_id) or first
+        yield _sse(event)
+
+        while not event.get("finished"):
+            try:
+                update = await asyncio.wait_for(queue.get(), timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                hub.ensure_listening()
+                yield ": keep-alive\n\n"
+                continue
+            if update["updated_at"] >= event["updated_at"]:
+                event = update
+                yield _sse(event)
+
+@videos_router.get("/streamProgress/{video_id}")
+async def stream_progress(request, video_id: int):
+    """
+    Follow a video's processing as server-sent 'progress' events (serve via ASGI): the stage, percent
+    done and ETA as the pipeline publishes them. The stream ends after the event marked 'finished'.
+    """
+
+    first = await sync_to_async(video_status_snapshot)(video_id)
+    response = StreamingHttpResponse(_progress_events(video_id, first), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Stop reverse proxies from buffering the stream.
+    return response
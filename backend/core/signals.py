@@ -0,0 +1,22 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .models import Video, DailyDigest
+from .cache.responses import invalidate_digest, invalidate_video
+
+# Keep the cached API responses in step with the database. Note that queryset update() calls skip
+# these signals, so code that uses them invalidates explicitly.
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def video_changed(sender, instance, **kwargs):
+    invalidate_video(instance)
+
+@receiver(post_save, sender=DailyDigest)
+@receiver(post_delete, sender=DailyDigest)
+def digest_changed(sender, instance, **kwargs):
+    invalidate_digest(instance)
+
+@receiver(m2m_changed, sender=DailyDigest.videos.through)
+def digest_videos_changed(sender, instance, action, **kwargs):
+    if action.startswith("post_"):
+        invalidate_digest(instance)
@@ -1,98 +1,759 @@
-from celery import shared_task, group
+from celery import shared_task, chain
+from celery.signals import celeryd_after_setup, task_postrun, task_prerun, worker_process_init
 from django.conf import settings
-from .models import Video, DailyDigest
+from django.utils import timezone
+from contextlib import contextmanager
+from .models import Video, DailyDigest, PlaylistSync, Transcript
 
 # Imports all of the service functions feature-by-feature (i.e. processing, llm, rag, tts).
-from .processing.youtube_utils import download_yt_audio, extract_video_metadata
-from .processing.preprocess import audio_enhance
-from .processing.transcribe import run_whisperx
+from .processing.youtube_utils import extract_video_id, extract_video_metadata, save_yt_audio_stream
+from .processing.youtube_api import get_youtube_client
+from .processing.preprocess import (ENHANCE_DEFAULTS, SAMPLE_RATE, iter_decoded_audio, iter_enhanced_audio,
+                                    probe_duration)
+from .processing.sharded_enhance import enhance_sharded
+from .processing.transcribe import (get_profile, refine_windows, restore_timeline, run_whisperx, run_whisperx_chunked,
+                                    transcribe_windows, warm_up_models)
+from .processing.vad import (PCM_INPUT_OPTIONS, iter_speech_pcm, iter_vad_windows, kept_seconds, speech_regions,
+                             timeline_mapper)
+from .processing import model_registry
 from .processing.ner_utils import infer_person_from_title
-from .llm.services import generate_video_summary, generate_master_summary
+from .llm.client import estimate_tokens
+from .llm.services import (MAP_PROMPT_VERSION, MASTER_SUMMARY_PROMPT_VERSION, REDUCE_PROMPT_VERSION, SUMMARY_MODEL,
+                           SUMMARY_PROMPT_VERSION, generate_video_summary, generate_master_summary,
+                           split_into_windows, summarize_window)
+from .rag.engine import EMBEDDING_MODEL_NAME
 from .rag.services import create_video_embeddings
-from .tts.services import produce_tts_audio
+from .tts.services import GoogleSynthesizer, produce_tts_audio
+from .cache.artifacts import get_artifact_cache
+from .cache.responses import bump_version, invalidate_digest, invalidate_video
+from .instrumentation import QueryTracker
+from .metrics import finish_run, record_stage, start_run
+from .progress import StageProgress, publish, publish_status
 
+import numpy as np
+import hashlib
+import json
 import uuid
+import time
 import os
 
+# Queues consumed by this worker (None until the worker has set itself up, or outside a worker).
+_WORKER_QUEUES = None
+
+@celeryd_after_setup.connect
+def record_worker_queues(sender, instance, **kwargs):
+    """
+    Remembers which queues this worker consumes, before the pool forks its child processes.
+    """
+
+    global _WORKER_QUEUES
+    queues = instance.app.amqp.queues
+    _WORKER_QUEUES = set(queues.consume_from or queues)
+
+@worker_process_init.connect
+def warm_transcription_models(**kwargs):
+    """
+    Loads the WhisperX models once per worker process, so that videos don't pay for it one by one.
+    Only workers that consume the CPU queue (where transcription runs) need them.
+    """
+
+    consumes_cpu_queue = _WORKER_QUEUES is None or settings.CELERY_CPU_QUEUE in _WORKER_QUEUES
+    if settings.WHISPERX_WARM_ON_WORKER_INIT and consumes_cpu_queue:
+        warm_up_models()
+
+# Query trackers of the tasks currently running in this process, by task ID.
+_TASK_QUERY_TRACKERS = {}
+
+@task_prerun.connect
+def start_task_query_stats(task_id, task, **kwargs):
+    tracker = QueryTracker()
+    tracker.start()
+    _TASK_QUERY_TRACKERS[task_id] = tracker
+
+@task_postrun.connect
+def log_task_query_stats(task_id, task, state=None, **kwargs):
+    """
+    Logs the SQL queries, rows and bytes each task ran/fetched (see core/instrumentation.py).
+    """
+
+    tracker = _TASK_QUERY_TRACKERS.pop(task_id, None)
+    if tracker is not None:
+        stats = tracker.stop()
+        if settings.DB_STATS_LOG:
+            print(f"DB Stats: task {task.name}[{task_id}] ({state}): {stats}.")
+
+@shared_task
+def transcription_models_status():
+    """
+    Readiness check for the WhisperX model registry of whichever worker picks this up.
+    """
+
+    return model_registry.registry_status()
+
+def pipeline_stage_keys(youtube_id: str, profile: dict, incremental: bool = False) -> dict:
+    """
+    Content-addressed cache keys for every stage artifact of a video: the YouTube video ID plus a hash
+    of everything that influences the stage's output. Each key folds in its upstream key, so changing
+    e.g. the enhancement filters invalidates the enhanced audio, transcript and summary, but not the
+    download. An incremental transcript is built from the windowed ASR result rather than straight from
+    the enhanced audio (and its enhancement always streams, i.e. is never sharded). With dead-air
+    trimming, the enhanced audio only holds the speech regions, so it is keyed on them too.
+    """
+
+    cache = get_artifact_cache()
+    download = cache.key(youtube_id, {"stage": "download", "format": "audio-only"})
+    speech = None
+    if settings.AUDIO_TRIM_DEAD_AIR:
+        speech = cache.key(youtube_id, {"stage": "vad", "input": download,
+                                        "min_silence_seconds": settings.AUDIO_VAD_MIN_SILENCE_SECONDS,
+                                        "padding_seconds": settings.AUDIO_VAD_PADDING_SECONDS,
+                                        "margin_db": settings.AUDIO_VAD_MARGIN_DB})
+    enhanced = cache.key(youtube_id, {"stage": "enhance", "input": download, "speech": speech, **ENHANCE_DEFAULTS,
+                                      "shards": 1 if incremental else settings.AUDIO_ENHANCE_SHARDS})
+    asr = cache.key(youtube_id, {"stage": "asr", "input": enhanced, **profile,
+                                 "window_seconds": [settings.INCREMENTAL_WINDOW_MIN_SECONDS,
+                                                    settings.INCREMENTAL_WINDOW_MAX_SECONDS]})
+    transcript = cache.key(youtube_id, {"stage": "transcribe", "input": asr if incremental else enhanced, **profile,
+                                        "chunk_seconds": settings.AUDIO_CHUNK_SECONDS,
+                                        "chunked_min_seconds": settings.AUDIO_CHUNKED_MIN_SECONDS})
+    summary = cache.key(youtube_id, {"stage": "summarize", "input": transcript, "model": SUMMARY_MODEL,
+                                     "prompt_version": SUMMARY_PROMPT_VERSION,
+                                     "map_reduce": [MAP_PROMPT_VERSION, REDUCE_PROMPT_VERSION,
+                                                    settings.SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS,
+                                                    settings.SUMMARY_WINDOW_TOKENS]})
+    return {"download": download, "speech": speech, "enhanced": enhanced, "asr": asr, "transcript": transcript,
+            "summary": summary}
+
 @shared_task
-def process_video_pipeline(video_id):
+def process_video_pipeline(video_id, profile_name: str = None, upgrade: bool = False):
+    """
+    The main, multi-stage asynchronous pipeline for processing a single video. Rather than doing all
+    of the work itself, it dispatches a chain of stage tasks (metadata extraction, audio download,
+    audio preprocessing, WhisperX transcription, LLM summary and RAG indexing), each of which is routed
+    to a queue that matches its workload (see CELERY_TASK_ROUTES). That way, a download or an LLM call
+    for the next video overlaps with the transcription of the current one.
+
+    Stage outputs are kept in the artifact cache, so a re-submitted video (or the same YouTube ID under
+    a different URL form) only recomputes the stages whose inputs or configuration changed.
+
+    'profile_name' selects the transcription profile (see transcribe.TRANSCRIPTION_PROFILES; the global
+    default otherwise). An 'upgrade' re-transcribes an already completed video with a better profile in the
+    background: the video keeps serving its current transcript (and status) until the new one replaces it.
+
+    With TRANSCRIPTION_INCREMENTAL, new videos are enhanced and transcribed window by window, with each
+    window committed to the stored transcript as it completes, and then refined (aligned and diarized).
+    Upgrades never are: partial ASR output would replace the finished transcript they keep serving.
+    """
+
+    video = Video.objects.get(id=video_id)
+    youtube_id = extract_video_id(video.youtube_url) or video.youtube_url
+    profile = get_profile(profile_name)
+    job_id = str(uuid.uuid4())  # Assign a unique job ID for temporary file prefixing.
+    incremental = settings.TRANSCRIPTION_INCREMENTAL and not upgrade
+
+    job = {
+        "video_id": video_id,
+        "job_id": job_id,
+        # Every stage records its timing against this run (see core/metrics.py).
+        "run_id": start_run("upgrade" if upgrade else "video", video_id=video_id, job_id=job_id,
+                            profile=profile["name"]),
+        "keys": pipeline_stage_keys(youtube_id, profile, incremental=incremental),
+        "profile": profile["name"],
+        "upgrade": upgrade,
+        "incremental": incremental,
+        # The video's status as the stages' progress events report it; an upgrade keeps it COMPLETED.
+        "status": 'COMPLETED' if upgrade else 'PROCESSING',
+        "original_audio_path": None,
+        "enhanced_audio_path": None,
+        # Speech regions of the original audio, when dead air is trimmed (see _speech_regions).
+        "speech_regions": [],
+    }
+
+    if incremental:
+        transcription_stages = [transcribe_video_incremental.s(), refine_video_transcript.s()]
+    else:
+        transcription_stages = [enhance_video_audio.s(), transcribe_video_audio.s()]
+    stages = [
+        fetch_video_metadata.s(),
+        download_video_audio.s(),
+        *transcription_stages,
+        summarize_video.s(),
+        index_video.s(),
+    ]
+    # An upgrade already has its metadata (and keeps its status), so it starts at the download.
+    if upgrade:
+        stages = stages[1:]
+    job["enqueued_at"] = time.time()
+    publish(video_id, job["status"] if upgrade else 'PENDING', stage="queued", stage_percent=0.0, percent=0.0,
+            **({"upgrade": True} if upgrade else {}))
+    chain(*stages).apply_async((job,))
+
+@shared_task
+def sync_playlist(playlist_id: str = None):
+    """
+    Periodic (Celery beat) ingestion of the press conference playlist. The playlist is paged with a
+    conditional request, so an unchanged playlist costs one 304. Metadata for new uploads is fetched
+    50 IDs per call over the pooled client, the videos are upserted, and each new one is sent down the
+    pipeline right away (its metadata stage then has nothing left to fetch, so the download starts at once).
+    """
+
+    playlist_id = playlist_id or settings.YOUTUBE_PLAYLIST_ID
+    state, _ = PlaylistSync.objects.get_or_create(playlist_id=playlist_id)
+    client = get_youtube_client()
+
+    known_ids = {extract_video_id(url) for url in Video.objects.values_list("youtube_url", flat=True)}
+    video_ids, etag = client.playlist_video_ids(playlist_id, etag=state.etag, known_ids=known_ids)
+    state.last_synced_at = timezone.now()
+
+    if video_ids is None:
+        print(f"Playlist Sync: {playlist_id} is unchanged.")
+        state.save(update_fields=["last_synced_at"])
+        return 0
+
+    # Preserve the playlist order while dropping duplicates and videos we already have.
+    new_ids = [video_id for video_id in dict.fromkeys(video_ids) if video_id not in known_ids]
+    metadata = client.videos_metadata(new_ids)
+
+    # Upsert on the URL, so a video submitted by hand in the meantime is refreshed rather than duplicated.
+    videos = Video.objects.bulk_create(
+        [Video(youtube_url=f"https://www.youtube.com/watch?v={video_id}", status='PENDING', **metadata[video_id])
+         for video_id in new_ids if video_id in metadata],
+        update_conflicts=True, unique_fields=["youtube_url"],
+        update_fields=["title", "thumbnail_url", "published_at"],
+    )
+    bump_version("videos")  # bulk_create skips the save signals.
+
+    for video in videos:
+        process_video_pipeline.delay(video.id)
+
+    state.etag = etag
+    state.last_new_videos = len(videos)
+    state.save()
+    print(f"Playlist Sync: {playlist_id} had {len(videos)} new videos; queued them for processing.")
+    return len(videos)
+
+def _tmp_path(job: dict, suffix: str) -> str:
+    """
+    A scratch path in the reserved /tmp directory (shared by all workers) for a stage's output-in-progress.
+    """
+
+    tmp_dir = os.path.join(settings.BASE_DIR, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    return os.path.join(tmp_dir, f"{job['job_id']}_{suffix}")
+
+def _cleanup_tmp(job: dict):
+    """
+    Ensures partially-written scratch files are cleaned up. Finished artifacts belong to the cache.
+    """
+
+    for suffix in ("original.audio", "enhanced.f32"):
+        path = _tmp_path(job, suffix)
+        if os.path.exists(path):
+            print(f"Deleting temporary file: {path}.")
+            os.remove(path)
+
+@contextmanager
+def _stage(job: dict, name: str, **fields):
+    """
+    Runs the block as a pipeline stage: times it (see core/metrics.py) and reports its progress to
+    anyone following the video (see core/progress.py). Yields the timing record and the progress reporter.
+    """
+
+    progress = StageProgress(job, name)
+    progress.start()
+    with record_stage(job, name, **fields) as timing:
+        yield timing, progress
+    progress.finish()
+
+def _fail_video(job: dict, stage: str, error: Exception):
+    """
+    Marks the video as failed and releases its scratch files. The caller re-raises, which stops the chain.
+    A failed upgrade leaves the video as it was (it still has its earlier transcript).
+    """
+
+    _cleanup_tmp(job)
+    finish_run(job.get("run_id"), 'FAILED', audio_seconds=job.get("audio_seconds"), error=error)
+    if not job.get("upgrade"):
+        Video.objects.filter(id=job["video_id"]).update(status='FAILED')
+        invalidate_video(job["video_id"])
+        publish_status(job["video_id"], 'FAILED', stage=stage, error=str(error))
+    else:
+        publish_status(job["video_id"], 'COMPLETED', stage=stage, error=str(error), upgrade=True)
+    print(f"Process task failed for video {job['video_id']} during '{stage}': {error}.")
+
+def _is_cached(job: dict, *stages: str) -> bool:
+    """
+    True if any of the given stage artifacts is already in the cache. Trimmed enhanced audio only counts
+    together with the speech regions that map it back onto the video timeline.
+    """
+
+    cache = get_artifact_cache()
+    namespaces = {"download": "audio", "enhanced": "audio", "asr": "transcripts", "transcript": "transcripts",
+                  "summary": "summaries"}
+
+    def cached(stage: str) -> bool:
+        if stage == "enhanced" and job["keys"].get("speech") and not cache.contains("speech", job["keys"]["speech"]):
+            return False
+        return cache.contains(namespaces[stage], job["keys"][stage])
+
+    return any(cached(stage) for stage in stages)
+
+def _speech_regions(job: dict, detect: bool = True) -> list:
     """
-    The main, multi-stage asynchronous pipeline for processing a single video, including
-    metadata extraction, audio preprocessing, WhisperX transcription, LLM calls for intelligent
-    summaries, and a final post-hoc RAG enrichment task that runs in the background.
+    The speech regions ([start, end] seconds) of the video's original audio that go through enhancement
+    and transcription, or [] to keep all of it. They are detected once per download (unless 'detect' is
+    False, for stages whose inputs are all cached) and kept in the artifact cache; the share of audio
+    skipped as dead air is recorded on the video.
     """
 
-    job_id = str(uuid.uuid4())  # Assign a unique job ID for file prefixing.
-    original_audio_path = None
-    enhanced_audio_path = None
+    if not job["keys"].get("speech"):
+        return []
+
+    cache = get_artifact_cache()
+    speech = cache.get_json("speech", job["keys"]["speech"])
+    if speech is None:
+        if not detect:
+            return []
+        regions, duration = speech_regions(iter_decoded_audio(_original_audio(job)),
+                                           min_silence_seconds=settings.AUDIO_VAD_MIN_SILENCE_SECONDS,
+                                           padding_seconds=settings.AUDIO_VAD_PADDING_SECONDS,
+                                           margin_db=settings.AUDIO_VAD_MARGIN_DB)
+        speech = {"regions": regions, "duration": duration}
+        cache.put_json("speech", job["keys"]["speech"], speech)
+
+    # Not worth a second decode for less than a second of dead air (or if no speech stood out at all).
+    skipped_seconds = speech["duration"] - kept_seconds(speech["regions"]) if speech["regions"] else 0.0
+    regions = speech["regions"] if skipped_seconds >= 1.0 else []
+    skipped = max(0.0, skipped_seconds) / speech["duration"] if regions else 0.0
+
+    # A queryset update skips the post_save signal, so the cached API responses are invalidated here.
+    if Video.objects.filter(id=job["video_id"]).exclude(skipped_audio_fraction=round(skipped, 4)) \
+            .update(skipped_audio_fraction=round(skipped, 4)):
+        invalidate_video(job["video_id"])
+    print(f"VAD: Skipping {skipped:.1%} of the audio of video {job['video_id']} as dead air "
+          f"({len(regions)} speech regions).")
+    return regions
+
+def _enhancement_source(job: dict, regions: list) -> tuple:
+    """
+    The enhancement input: the downloaded file, or only its speech regions as raw PCM.
+    """
+
+    if regions:
+        return iter_speech_pcm(job["original_audio_path"], regions), PCM_INPUT_OPTIONS
+    return job["original_audio_path"], None
+
+# A path handed down the chain can be evicted from the artifact cache before the next stage runs (or was
+# never set, when a stage was skipped because later artifacts were cached), so stages that read audio
+# re-resolve it through these, which redo the upstream work if it is gone.
+
+def _original_audio(job: dict) -> str:
+    """
+    The path of the downloaded audio, downloading it again if it isn't in the artifact cache.
+    """
+
+    cache = get_artifact_cache()
+    path = cache.get_path("audio", job["keys"]["download"])
+    if path is None:
+        print(f"Artifact Cache: Downloaded audio for video {job['video_id']} is gone; downloading it again.")
+        video = Video.objects.get(id=job["video_id"])
+        scratch_path = _tmp_path(job, "original.audio")
+        save_yt_audio_stream(video.youtube_url, scratch_path)
+        path = cache.put_file("audio", job["keys"]["download"], scratch_path)
+    job["original_audio_path"] = path
+    return path
+
+def _enhance(job: dict, progress: StageProgress = None) -> str:
+    """
+    Enhances the downloaded audio (only its speech regions, see _speech_regions) into the artifact cache
+    and returns the path of the raw 16kHz float32 samples.
+    """
+
+    _original_audio(job)
+    regions = job["speech_regions"] = _speech_regions(job)
+    scratch_path = _tmp_path(job, "enhanced.f32")
+    total_seconds = kept_seconds(regions) if regions else probe_duration(job["original_audio_path"])
+    with open(scratch_path, "wb") as out:
+        # Sharding holds the whole waveform in memory, so videos long enough to be transcribed in chunks
+        # (or of unknown length) keep the streaming single pass, whose memory use is bounded.
+        if settings.AUDIO_ENHANCE_SHARDS > 1 and total_seconds and total_seconds <= settings.AUDIO_CHUNKED_MIN_SECONDS:
+            enhance_sharded(job["original_audio_path"], shards=settings.AUDIO_ENHANCE_SHARDS,
+                            regions=regions).tofile(out)
+        else:
+            source, input_options = _enhancement_source(job, regions)
+            total_samples = (total_seconds or 0) * SAMPLE_RATE
+            written = 0
+            for block in iter_enhanced_audio(source, input_options=input_options):
+                out.write(block.tobytes())
+                written += len(block)
+                if progress is not None and total_samples:
+                    progress.update(written / total_samples)
+
+    return get_artifact_cache().put_file("audio", job["keys"]["enhanced"], scratch_path)
+
+def _enhanced_audio(job: dict) -> str:
+    """
+    The path of the enhanced audio, enhancing it again (and downloading it, if need be) if it isn't in
+    the artifact cache.
+    """
+
+    path = get_artifact_cache().get_path("audio", job["keys"]["enhanced"])
+    if path is None:
+        print(f"Artifact Cache: Enhanced audio for video {job['video_id']} is gone; enhancing it again.")
+        path = _enhance(job)
+    job["enhanced_audio_path"] = path
+    return path
+
+@shared_task
+def fetch_video_metadata(job: dict):
+    """
+    Stage 1 (external API): pull the YouTube metadata and infer the speaker from the title.
+    """
 
     try:
-        video = Video.objects.get(id=video_id)
+        with _stage(job, "metadata") as (stage, progress):
+            video = Video.objects.get(id=job["video_id"])
 
-        # For the selected video, we pull out all of the semantic details and assign
-        # them to the appropriate model attributes.
-        metadata = extract_video_metadata(video.youtube_url)
-        if metadata:
-            video.title = metadata.get("title")
-            video.thumbnail_url = metadata.get("thumbnail_url")
-            video.published_at = metadata.get("published_at")
+            # For the selected video, we pull out all of the semantic details and assign
+            # them to the appropriate model attributes. Videos ingested by the playlist sync
+            # already have them (fetched in batches), so they skip the API call.
+            if not (video.title and video.published_at):
+                metadata = extract_video_metadata(video.youtube_url)
+                if metadata:
+                    video.title = metadata.get("title")
+                    video.thumbnail_url = metadata.get("thumbnail_url")
+                    video.published_at = metadata.get("published_at")
+            else:
+                stage.outcome = "cached"
 
             # If the video title is available, we leverage spaCy Named Entity Recognition (NER)
             # to dynamically infer the speaker/subject of the press conference.
-            if video.title:
+            if video.title and not video.speaker:
                 speaker_name = infer_person_from_title(video.title)
                 if speaker_name:
                     video.speaker = speaker_name
 
-        video.status = 'PROCESSING'
-        video.save()
+            video.status = 'PROCESSING'
+            video.save()
+        return job
 
-        # Set up the audio file paths to be stored in a reserved /tmp directory.
-        tmp_dir = os.path.join(settings.BASE_DIR, 'tmp')
-        original_audio_path = os.path.join(tmp_dir, f"{job_id}_original.mp3")
-        enhanced_audio_path = os.path.join(tmp_dir, f"{job_id}_enhanced.wav")
-
-        # Extract the MP3 audio via Pytube, then pass it through the RNNoise and FFmpeg filters
-        # to end up with a 16Hz '...enhanced.wav' file that can be plugged into WhisperX.
-        download_yt_audio(video.youtube_url, original_audio_path)
-        audio_enhance(original_audio_path, enhanced_audio_path)
-
-        # Compile a word-segment transcript and pass the full text into an LLM for summary.
-        transcript_dictionary = run_whisperx(enhanced_audio_path)
-        full_text = " ".join(seg['text'] for seg in transcript_dictionary['segments'])
-        summary = generate_video_summary(full_text)
-
-        if 'error' in summary:
-            raise Exception(f"LLM summary generation failed with error {summary['error']}.")
-        
-        # Update the relevant model fields, along with their status in the PostgreSQL DB.
-        video.transcript_data = transcript_dictionary
-        video.summary_data = summary
-        video.status = 'COMPLETED'
-        video.save()
-
-        # In this post-processing fan-out step, we trigger a "fire and forget" async operation
-        # to add the newly-processed video to the RAG index/embeddings.
-        print(f"Triggering post-processing enrichment tasks for video {video_id}...")
-        enrichment_tasks = group(develop_rag_embeddings.s(video_id))
-        enrichment_tasks.apply_async()
+    except Exception as e:
+        _fail_video(job, "metadata", e)
+        raise
+
+@shared_task
+def download_video_audio(job: dict):
+    """
+    Stage 2 (I/O): stream the audio-only track from YouTube into the artifact cache, untouched.
+    """
+
+    try:
+        with _stage(job, "download") as (stage, progress):
+            cache = get_artifact_cache()
+            if _is_cached(job, "download", "enhanced", "transcript"):
+                print(f"Artifact Cache: Skipping download for video {job['video_id']}.")
+                stage.outcome = "cached"
+                job["original_audio_path"] = cache.get_path("audio", job["keys"]["download"])
+                return job
+
+            video = Video.objects.get(id=job["video_id"])
+            scratch_path = _tmp_path(job, "original.audio")
+            save_yt_audio_stream(video.youtube_url, scratch_path)
+            job["original_audio_path"] = cache.put_file("audio", job["keys"]["download"], scratch_path)
+            stage.bytes_processed = os.path.getsize(job["original_audio_path"])
+        return job
+
+    except Exception as e:
+        _fail_video(job, "download", e)
+        raise
+
+@shared_task
+def enhance_video_audio(job: dict):
+    """
+    Stage 3 (CPU): pass the audio through the RNNoise and FFmpeg filters, ending up with the 16kHz
+    float32 samples WhisperX consumes. These are written raw (no WAV/MP3 container), block by block,
+    so the transcription stage can memory-map them without another FFmpeg decode.
+    """
+
+    try:
+        with _stage(job, "enhance", model=ENHANCE_DEFAULTS["model_path"]) as (stage, progress):
+            cache = get_artifact_cache()
+            if _is_cached(job, "enhanced", "transcript"):
+                print(f"Artifact Cache: Skipping enhancement for video {job['video_id']}.")
+                stage.outcome = "cached"
+                job["enhanced_audio_path"] = cache.get_path("audio", job["keys"]["enhanced"])
+                job["speech_regions"] = _speech_regions(job, detect=False)
+                return job
+
+            # Dead air is dropped before the expensive stages (see _speech_regions).
+            job["enhanced_audio_path"] = _enhance(job, progress)
+            # 4 bytes per float32 sample.
+            job["audio_seconds"] = os.path.getsize(job["enhanced_audio_path"]) / 4 / SAMPLE_RATE
+            stage.audio_seconds = job["audio_seconds"]
+            stage.bytes_processed = os.path.getsize(job["original_audio_path"])
+        return job
+
+    except Exception as e:
+        _fail_video(job, "enhance", e)
+        raise
+
+@shared_task
+def transcribe_video_audio(job: dict):
+    """
+    Stage 4 (CPU): compile a word-segment transcript with WhisperX and store it on the video.
+    """
+
+    try:
+        profile = get_profile(job["profile"])
+        model = f"whisper-{profile['model_name']}/{profile['compute_type']}"
+        with _stage(job, "transcribe", model=model) as (stage, progress):
+            cache = get_artifact_cache()
+            transcript_dictionary = cache.get_json("transcripts", job["keys"]["transcript"])
+
+            if transcript_dictionary is not None:
+                print(f"Artifact Cache: Reusing transcript for video {job['video_id']}.")
+                stage.outcome = "cached"
+            else:
+                audio = np.memmap(_enhanced_audio(job), dtype=np.float32, mode="r")
+                duration = len(audio) / SAMPLE_RATE
+                job["audio_seconds"] = stage.audio_seconds = duration
+                stage.bytes_processed = audio.nbytes
+
+                # Very long videos are transcribed block by block to keep memory bounded.
+                # (A block is requested once the previous one is transcribed, which is when progress is reported.)
+                if duration > settings.AUDIO_CHUNKED_MIN_SECONDS:
+                    block_size = settings.AUDIO_CHUNK_SECONDS * SAMPLE_RATE
+
+                    def blocks():
+                        for i in range(0, len(audio), block_size):
+                            progress.update(i / len(audio))
+                            yield np.asarray(audio[i:i + block_size])
+
+                    transcript_dictionary = run_whisperx_chunked(blocks(), profile_name=job["profile"])
+                else:
+                    transcript_dictionary = run_whisperx(np.asarray(audio), profile_name=job["profile"],
+                                                         on_progress=progress.update)
+                # Timestamps on trimmed audio are moved back onto the video timeline before anything keeps them.
+                restore_timeline(transcript_dictionary, job.get("speech_regions"))
+                cache.put_json("transcripts", job["keys"]["transcript"], transcript_dictionary)
+
+            # Store the compact, columnar transcript; the full WhisperX JSON stays in the artifact cache only.
+            Transcript.store(job["video_id"], transcript_dictionary)
+            Video.objects.filter(id=job["video_id"]).update(transcription_profile=job["profile"])
+            invalidate_video(job["video_id"])
+        return job
+
+    except Exception as e:
+        _fail_video(job, "transcribe", e)
+        raise
+
+def _tee_to_file(blocks, path: str):
+    """
+    Passes float32 blocks through while writing them (raw) to 'path'.
+    """
+
+    with open(path, "wb") as out:
+        for block in blocks:
+            out.write(block.tobytes())
+            yield block
+
+def _prefetch_summary_windows(job: dict, segments: list[dict]):
+    """
+    Once a partial transcript is long enough to be summarized map-reduce style, queues the map step for
+    each of its closed summary windows (every window but the last, which may still grow), once per window.
+    """
+
+    text = " ".join(segment.get("text", "").strip() for segment in segments)
+    if estimate_tokens(text) <= settings.SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS:
+        return
+    closed = split_into_windows(segments, settings.SUMMARY_WINDOW_TOKENS)[:-1]
+    for index in range(job.get("summary_windows_prefetched", 0), len(closed)):
+        prefetch_summary_window.delay(closed[index], index)
+    job["summary_windows_prefetched"] = len(closed)
+
+@shared_task
+def prefetch_summary_window(window_text: str, index: int):
+    """
+    Summarizes one closed window of a transcript that is still being transcribed, so that the
+    summarize stage later finds its notes in the LLM response cache.
+    """
+
+    summarize_window(window_text, index)
+
+@shared_task
+def transcribe_video_incremental(job: dict):
+    """
+    Stages 3-4, incremental mode (CPU): enhance the audio and transcribe it window by window as FFmpeg
+    produces it, each window cut at a pause (see processing/vad.py). Every window's segments are
+    committed to the stored transcript as soon as they are transcribed, so the first answers of a long
+    press conference are readable within minutes; alignment and diarization are left to
+    refine_video_transcript. Closed summary windows are queued for early summarization along the way.
+    """
+
+    try:
+        profile = get_profile(job["profile"])
+        model = f"whisper-{profile['model_name']}/{profile['compute_type']}"
+        with _stage(job, "transcribe", model=model) as (stage, progress):
+            cache = get_artifact_cache()
+            keys = job["keys"]
+            job["enhanced_audio_path"] = None
+            if _is_cached(job, "enhanced"):
+                job["enhanced_audio_path"] = cache.get_path("audio", keys["enhanced"])
+
+            if _is_cached(job, "transcript") or (job["enhanced_audio_path"] and _is_cached(job, "asr")):
+                print(f"Artifact Cache: Skipping incremental transcription for video {job['video_id']}.")
+                stage.outcome = "cached"
+                job["speech_regions"] = _speech_regions(job, detect=False)
+                return job
+
+            # Dead air is dropped before the expensive stages (see _speech_regions).
+            regions = job["speech_regions"] = _speech_regions(job)
+            if job["enhanced_audio_path"]:
+                audio = np.memmap(job["enhanced_audio_path"], dtype=np.float32, mode="r")
+                block_size = int(settings.INCREMENTAL_WINDOW_MAX_SECONDS * SAMPLE_RATE)
+                blocks = (np.asarray(audio[i:i + block_size]) for i in range(0, len(audio), block_size))
+                total_seconds = len(audio) / SAMPLE_RATE
+                stage.bytes_processed = audio.nbytes
+            else:
+                stage.bytes_processed = os.path.getsize(_original_audio(job))
+                scratch_path = _tmp_path(job, "enhanced.f32")
+                source, input_options = _enhancement_source(job, regions)
+                blocks = _tee_to_file(iter_enhanced_audio(source, input_options=input_options), scratch_path)
+                total_seconds = kept_seconds(regions) if regions else (probe_duration(job["original_audio_path"]) or 0)
+
+            # Windows are cut from the trimmed audio; what gets stored is on the video timeline.
+            to_original = timeline_mapper(regions)
+
+            def commit(result: dict):
+                committed_seconds = result["windows"][-1]["end"]
+                partial = restore_timeline({"segments": [dict(segment) for segment in result["segments"]]}, regions)
+                Transcript.store(job["video_id"], partial, refinement='asr',
+                                 committed_seconds=round(to_original(committed_seconds), 3))
+                invalidate_video(job["video_id"])
+                if total_seconds:
+                    progress.update(committed_seconds / total_seconds)
+                _prefetch_summary_windows(job, result["segments"])
+
+            windows = iter_vad_windows(blocks, settings.INCREMENTAL_WINDOW_MIN_SECONDS,
+                                       settings.INCREMENTAL_WINDOW_MAX_SECONDS)
+            asr = transcribe_windows(windows, profile_name=job["profile"], on_window=commit)
+
+            if job["enhanced_audio_path"]:
+                job["audio_seconds"] = len(audio) / SAMPLE_RATE
+            else:
+                job["enhanced_audio_path"] = cache.put_file("audio", keys["enhanced"], scratch_path)
+                # 4 bytes per float32 sample.
+                job["audio_seconds"] = os.path.getsize(job["enhanced_audio_path"]) / 4 / SAMPLE_RATE
+            cache.put_json("transcripts", keys["asr"], asr)
+            stage.audio_seconds = job["audio_seconds"]
+        return job
+
+    except Exception as e:
+        _fail_video(job, "transcribe", e)
+        raise
+
+@shared_task
+def refine_video_transcript(job: dict):
+    """
+    Stage 4, incremental mode, continued (CPU): align the committed ASR windows and assign speakers,
+    then replace the partial transcript with the final one.
+    """
+
+    try:
+        with _stage(job, "refine") as (stage, progress):
+            cache = get_artifact_cache()
+            transcript_dictionary = cache.get_json("transcripts", job["keys"]["transcript"])
+
+            if transcript_dictionary is not None:
+                print(f"Artifact Cache: Reusing transcript for video {job['video_id']}.")
+                stage.outcome = "cached"
+            else:
+                asr = cache.get_json("transcripts", job["keys"]["asr"])
+                if asr is None:
+                    raise RuntimeError("The incremental ASR result is no longer in the artifact cache.")
+
+                audio = np.memmap(_enhanced_audio(job), dtype=np.float32, mode="r")
+                duration = len(audio) / SAMPLE_RATE
+                job["audio_seconds"] = stage.audio_seconds = duration
+                stage.bytes_processed = audio.nbytes
+
+                # Very long videos are diarized block by block, like the chunked transcription path.
+                block_seconds = None
+                if duration > settings.AUDIO_CHUNKED_MIN_SECONDS:
+                    block_seconds = settings.AUDIO_CHUNK_SECONDS
+                transcript_dictionary = refine_windows(asr, audio, profile_name=job["profile"],
+                                                       block_seconds=block_seconds, on_progress=progress.update)
+                restore_timeline(transcript_dictionary, job.get("speech_regions"))
+                cache.put_json("transcripts", job["keys"]["transcript"], transcript_dictionary)
+
+            Transcript.store(job["video_id"], transcript_dictionary)
+            Video.objects.filter(id=job["video_id"]).update(transcription_profile=job["profile"])
+            invalidate_video(job["video_id"])
+        return job
 
     except Exception as e:
-        video_to_fail = Video.objects.get(id=video_id)
-        video_to_fail.status = 'FAILED'
-        video_to_fail.save()
-
-        print(f"Process task failed for video {video_id}: {e}.")
-    
-    finally:
-        # Ensures temporary audio files are cleaned up (regardless of success/failure).
-        print("Running cleanup...")
-        if original_audio_path and os.path.exists(original_audio_path):
-            print(f"Deleting temporary file (1/2): {original_audio_path}.")
-            os.remove(original_audio_path)
-        if enhanced_audio_path and os.path.exists(enhanced_audio_path):
-            print(f"Deleting temporary file (2/2): {enhanced_audio_path}.")
-            os.remove(enhanced_audio_path)
+        _fail_video(job, "refine", e)
+        raise
+
+@shared_task
+def summarize_video(job: dict):
+    """
+    Stage 5 (external API): pass the full transcript text into an LLM for summary.
+    """
+
+    try:
+        with _stage(job, "summarize", model=SUMMARY_MODEL) as (stage, progress):
+            cache = get_artifact_cache()
+            video = Video.objects.defer("transcript_data").get(id=job["video_id"])
+            summary = cache.get_json("summaries", job["keys"]["summary"])
+
+            if summary is not None:
+                print(f"Artifact Cache: Reusing summary for video {job['video_id']}.")
+                stage.outcome = "cached"
+            else:
+                transcript = Transcript.objects.get(video_id=job["video_id"])
+                stage.bytes_processed = len(transcript.full_text.encode())
+                # Incremental jobs window the map-reduce summary over their ASR segments, which is what the
+                # early summary windows were cut from, so those come straight from the LLM response cache.
+                asr = cache.get_json("transcripts", job["keys"]["asr"]) if job.get("incremental") else None
+                segments = asr["segments"] if asr else transcript.load().segments()
+                summary = generate_video_summary(transcript.full_text, segments=segments)
+
+                if 'error' in summary:
+                    raise Exception(f"LLM summary generation failed with error {summary['error']}.")
+                cache.put_json("summaries", job["keys"]["summary"], summary)
+
+            # Update the relevant model fields, along with their status in the PostgreSQL DB.
+            video.summary_data = summary
+            video.status = 'COMPLETED'
+            video.save()
+            job["status"] = 'COMPLETED'
+        return job
+
+    except Exception as e:
+        _fail_video(job, "summarize", e)
+        raise
+
+@shared_task
+def index_video(job: dict):
+    """
+    Stage 6 (CPU): add the newly-processed video to the RAG index/embeddings.
+    """
+
+    print(f"Triggering post-processing enrichment tasks for video {job['video_id']}...")
+    upgrade = {"upgrade": True} if job.get("upgrade") else {}
+    try:
+        with _stage(job, "index", model=EMBEDDING_MODEL_NAME):
+            develop_rag_embeddings(job["video_id"])
+    except Exception as e:
+        # The transcript and summary are already stored, so the video stays usable; only the run fails.
+        finish_run(job.get("run_id"), 'FAILED', audio_seconds=job.get("audio_seconds"), error=e)
+        publish_status(job["video_id"], 'COMPLETED', stage="index", error=str(e), **upgrade)
+        print(f"Process task failed for video {job['video_id']} during 'index': {e}.")
+        raise
+    finish_run(job.get("run_id"), 'COMPLETED', audio_seconds=job.get("audio_seconds"))
+    publish_status(job["video_id"], 'COMPLETED', **upgrade)
+    return job
 
 @shared_task
 def develop_rag_embeddings(video_id: int):
@@ -103,11 +764,26 @@ def develop_rag_embeddings(video_id: int):
     print(f"RAG Task: received job for Video ID: {video_id}.")
     create_video_embeddings(video_id)
 
+def digest_fingerprint(summaries_by_video: dict, voice_config: dict) -> str:
+    """
+    Fingerprints a digest by its (sorted) video IDs, the summary version of each video (a hash of the
+    summary it contributes) and the voice configuration, plus the master-script prompt version.
+    """
+
+    summary_versions = {
+        video_id: hashlib.sha256(summary.encode()).hexdigest()[:16]
+        for video_id, summary in sorted(summaries_by_video.items())
+    }
+    payload = {"videos": summary_versions, "voice": voice_config, "prompt_version": MASTER_SUMMARY_PROMPT_VERSION}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
 @shared_task
-def build_daily_digest(digest_id: int):
+def build_daily_digest(digest_id: int, enqueued_at: float = None):
     """
     Synthesizes multiple video summaries into a single daily digest (on-demand), using
-    the Google Text-to-Speech API for lifelike speech synthesis.
+    the Google Text-to-Speech API for lifelike speech synthesis. If a completed digest with the
+    same fingerprint already exists, its script and audio are reused instead. 'enqueued_at' (a Unix
+    timestamp) lets the timing records include the time the task spent queued.
     """
 
     # Set up the new digest object and initialize its status to processing.
@@ -116,33 +792,68 @@ def build_daily_digest(digest_id: int):
     digest.status = 'PROCESSING'
     digest.save()
 
+    job = {"run_id": start_run("digest", digest_id=digest_id), "enqueued_at": enqueued_at}
     audio_file_path = None
     try:
-        # Compile and aggregate video summaries via loop comprehension.
-        video_summaries = [v.summary_data['one_sentence_summary'] 
-                           for v in digest.videos.all() 
-                           if v.summary_data and 'one_sentence_summary' in v.summary_data]
-        
-        if not video_summaries:
-            raise ValueError("Cannot create a digest -- no video summaries found.")
-        
-        master_summary = generate_master_summary(video_summaries)
+        with record_stage(job, "script", model=SUMMARY_MODEL) as stage:
+            # Compile and aggregate video summaries via loop comprehension.
+            # Only the one-liners are needed, so read just that key rather than whole video rows.
+            summaries_by_video = {video_id: summary
+                                  for video_id, summary in digest.videos.values_list(
+                                      'id', 'summary_data__one_sentence_summary')
+                                  if summary}
+
+            if not summaries_by_video:
+                raise ValueError("Cannot create a digest -- no video summaries found.")
+
+            synthesizer = GoogleSynthesizer()
+            digest.fingerprint = digest_fingerprint(summaries_by_video, synthesizer.cache_config)
+
+            previous = (DailyDigest.objects
+                        .filter(fingerprint=digest.fingerprint, status='COMPLETED')
+                        .exclude(id=digest_id)
+                        .order_by('-id')
+                        .first())
+            if previous and previous.audio_url and os.path.exists(previous.audio_url):
+                print(f"Daily digest {digest_id} matches digest {previous.id}; reusing its script and audio.")
+                stage.outcome = "cached"
+                digest.summary_text = previous.summary_text
+                digest.audio_url = previous.audio_url
+                digest.status = 'COMPLETED'
+                digest.save()
+                finish_run(job["run_id"], 'COMPLETED')
+                return
+
+            # Keep the script in video order so identical inputs produce an identical (cacheable) prompt.
+            video_summaries = [summary for _, summary in sorted(summaries_by_video.items())]
+            stage.bytes_processed = sum(len(summary.encode()) for summary in video_summaries)
+            master_summary = generate_master_summary(video_summaries)
 
         # As with the YouTube audio artifacts, shelve the TTS audio result onto /tmp.
         audio_filename = f"{uuid.uuid4()}.mp3"
         tmp_dir = os.path.join(settings.BASE_DIR, 'tmp')
         audio_file_path = os.path.join(tmp_dir, audio_filename)
 
-        produce_tts_audio(master_summary, audio_file_path)
+        # Expose the audio as soon as its first sentence is on disk; it keeps growing until COMPLETED.
+        def publish_partial_audio(path):
+            DailyDigest.objects.filter(id=digest_id).update(audio_url=path)
+            invalidate_digest(digest_id)
+
+        with record_stage(job, "tts", model=synthesizer.cache_config["voice_name"]) as stage:
+            produce_tts_audio(master_summary, audio_file_path, synthesizer=synthesizer,
+                              on_first_chunk=publish_partial_audio)
+            stage.bytes_processed = os.path.getsize(audio_file_path)
 
         # Populate the digest model fields and execute the DB save.
         digest.summary_text = master_summary
         digest.audio_url = audio_file_path
         digest.status = 'COMPLETED'
         digest.save()
+        finish_run(job["run_id"], 'COMPLETED')
         print(f"Daily digest {digest_id} completed successfully!")
 
     except Exception as e:
         digest.status = 'FAILED'
         digest.save()
+        finish_run(job["run_id"], 'FAILED', error=e)
         print(f"Daily digest task failed for digest ID {digest_id}!")
@@ -1,3 +1,1186 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.cache import caches
+from django.db import connection
+from django.db.backends.postgresql.base import CursorDebugWrapper as PostgresCursorDebugWrapper
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import asyncio
+import redis.asyncio as aioredis
+import openai
+import httpx
+import threading
+import tempfile
+import shutil
+import errno
+import json
+import time
+import os
 
-# Create your tests here.
+from .benchmarks.fixtures import synth_press_conference
+from .benchmarks.llm_standin import LocalLLMStandIn
+from .benchmarks.runner import compare
+from .cache.artifacts import ArtifactCache
+from .instrumentation import QueryBudgetExceeded, QueryTracker, query_budget
+from .llm.cache import LLMResponseCache, MemoryBackend, make_cache_key
+from .llm.client import _retry_delay, achat_completion, astream_chat_completion
+from .llm.ratelimit import TokenBucketLimiter
+from .llm.services import generate_video_summary_map_reduce, split_into_windows
+from .metrics import record_stage, start_run
+from .middleware import QueryStatsMiddleware
+from .models import DailyDigest, PipelineRun, PlaylistSync, StageTiming, Transcript, Video
+from .processing import youtube_api
+from .processing.compact_transcript import CompactTranscript
+from .processing.preprocess import enhance_audio_stream
+from .processing.sharded_enhance import enhance_sharded, write_wav
+from .progress import StageProgress, overall_percent
+from .processing.ner_utils import infer_people_from_titles, match_gazetteer
+from .processing.transcribe import get_profile, restore_timeline
+from .processing.vad import iter_regions, iter_vad_windows, speech_regions, timeline_mapper
+from .rag.engine import RetrievalEngine
+from .rag.semantic_cache import SemanticAnswerCache
+from .tasks import (_enhance, _enhanced_audio, _prefetch_summary_windows, _speech_regions, build_daily_digest,
+                    digest_fingerprint, index_video, pipeline_stage_keys, sync_playlist)
+from .tts.services import GoogleSynthesizer, LocalSynthesizer, Synthesizer, produce_tts_audio, split_sentences
+
+# Keep the response cache in-process so the tests don't need Redis.
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "responses"},
+}
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class QueryBudgetTests(TestCase):
+    """
+    The read endpoints and the digest task must stay within a fixed number of queries, however many
+    rows there are (i.e. no N+1 patterns).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.videos = [
+            Video.objects.create(youtube_url=f"https://www.youtube.com/watch?v=video{i}", title=f"Video {i}",
+                                 status="COMPLETED", summary_data={"one_sentence_summary": f"Summary {i}."},
+                                 transcript_data={"segments": [{"text": "x" * 10000}]})
+            for i in range(5)
+        ]
+        for i in range(3):
+            digest = DailyDigest.objects.create(status="COMPLETED")
+            digest.videos.set(cls.videos[i:i + 3])
+
+    def test_budget_is_enforced(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(Video.objects.all())
+                list(DailyDigest.objects.all())
+
+    def test_list_digests(self):
+        with query_budget(2):
+            response = self.client.get("/api/digests/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_get_digest(self):
+        digest = DailyDigest.objects.first()
+        with query_budget(2):
+            response = self.client.get(f"/api/digests/{digest.id}")
+        self.assertEqual(len(response.json()["video_ids"]), 3)
+
+    def test_list_videos_skips_heavy_columns(self):
+        with query_budget(1, max_rows=6, max_bytes=5000):
+            response = self.client.get("/api/videos/listVideos?status=COMPLETED")
+        self.assertEqual(len(response.json()["items"]), 5)
+
+    def test_get_video(self):
+        with query_budget(1):
+            response = self.client.get(f"/api/videos/getVideoData/{self.videos[0].id}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_resource_is_served_without_queries(self):
+        first = self.client.get(f"/api/videos/getVideoData/{self.videos[0].id}")
+        with query_budget(0):
+            response = self.client.get(f"/api/videos/getVideoData/{self.videos[0].id}",
+                                       HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(DB_STATS_HEADER=True)
+    def test_request_totals_are_reported_in_a_header(self):
+        caches["responses"].clear()
+        response = self.client.get(f"/api/videos/getVideoData/{self.videos[0].id}")
+        stats = dict(part.split("=") for part in response["X-DB-Stats"].split("; "))
+        self.assertEqual(stats["queries"], "1")
+        self.assertEqual(stats["rows"], "1")
+        self.assertGreater(int(stats["bytes"]), 10000)
+
+    def test_backend_debug_cursor_is_kept(self):
+        with CaptureQueriesContext(connection), QueryTracker() as stats:
+            with connection.cursor() as cursor:
+                # PostgreSQL's own debug wrapper (which also logs COPY statements) is still in place.
+                self.assertIsInstance(cursor._cursor, PostgresCursorDebugWrapper)
+                self.assertTrue(hasattr(cursor, "copy_expert"))
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+        self.assertEqual((stats.queries, stats.rows), (1, 1))
+
+    @override_settings(DB_STATS_LOG=True)
+    def test_async_streaming_response_is_counted_until_its_body_ends(self):
+        async def body():
+            yield b"data: start\n\n"
+            yield f"data: {await sync_to_async(Video.objects.count)()}\n\n".encode()
+
+        async def view(request):
+            await sync_to_async(Video.objects.first)()
+            return StreamingHttpResponse(body(), content_type="text/event-stream")
+
+        middleware = QueryStatsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        async def stream():
+            response = await middleware(RequestFactory().get("/api/videos/streamProgress/1"))
+            return [chunk async for chunk in response.streaming_content]
+
+        with mock.patch("core.middleware.print") as log:
+            chunks = async_to_sync(stream)()
+        self.assertEqual(chunks[-1], b"data: 5\n\n")
+        log.assert_called_once()
+        self.assertIn("2 queries, 2 rows", log.call_args.args[0])
+
+    def test_reused_digest_reads_only_summaries(self):
+        summaries = {video.id: video.summary_data["one_sentence_summary"] for video in self.videos[:2]}
+        fingerprint = digest_fingerprint(summaries, GoogleSynthesizer().cache_config)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as audio:
+            audio.write(b"mp3")
+        self.addCleanup(os.remove, audio.name)
+        DailyDigest.objects.create(status="COMPLETED", fingerprint=fingerprint, summary_text="Script.",
+                                   audio_url=audio.name)
+
+        digest = DailyDigest.objects.create()
+        digest.videos.set(self.videos[:2])
+        # Reading the digest, its summaries and the matching digest, two saves, and the timing record
+        # (run start, stage, run end).
+        with query_budget(8, max_bytes=5000):
+            build_daily_digest(digest.id)
+
+        digest.refresh_from_db()
+        self.assertEqual(digest.status, "COMPLETED")
+        self.assertEqual(digest.audio_url, audio.name)
+
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class VideoListPagingTests(TestCase):
+    """
+    listVideos pages with a (published_at, id) keyset cursor; videos without a published_at come last.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        day = timezone.now().replace(microsecond=0)
+        published = [day, day, day - timedelta(days=1), None, day - timedelta(days=2), None, None]
+        cls.videos = [Video.objects.create(youtube_url=f"https://www.youtube.com/watch?v=page{i}", title=f"Video {i}",
+                                           published_at=published_at)
+                      for i, published_at in enumerate(published)]
+
+    def list_ids(self, limit, **params):
+        pages, ids, cursor = 0, [], None
+        while True:
+            query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/api/videos/listVideos", query).json()
+            pages += 1
+            ids += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return pages, ids
+
+    def test_pages_cover_every_video_once_in_order(self):
+        # Newest first, ties broken by id; the three unpublished videos last.
+        v = self.videos
+        expected = [v[1].id, v[0].id, v[2].id, v[4].id, v[6].id, v[5].id, v[3].id]
+        self.assertEqual(self.list_ids(limit=50), (1, expected))
+        self.assertEqual(self.list_ids(limit=2), (4, expected))
+        self.assertEqual(self.list_ids(limit=1), (7, expected))
+
+    def test_cursor_within_unpublished_videos(self):
+        # The page boundary falls between two videos without a published_at (the NULLS LAST branch).
+        first = self.client.get("/api/videos/listVideos", {"limit": 5}).json()
+        self.assertIsNone(first["items"][-1]["published_at"])
+        rest = self.client.get("/api/videos/listVideos", {"limit": 5, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([item["id"] for item in rest["items"]], [self.videos[5].id, self.videos[3].id])
+        self.assertIsNone(rest["next_cursor"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/videos/listVideos", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class ResponseCacheTests(TestCase):
+    """
+    The cached video endpoints load through the URLconf, answer conditional requests with a 304 and
+    serve a fresh body once the video changes.
+    """
+
+    def test_video_reads_revalidate_until_the_video_changes(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=etag", status="COMPLETED",
+                                     title="Monday presser")
+
+        for path in ("/api/videos/listVideos", f"/api/videos/getVideoData/{video.id}"):
+            first = self.client.get(path)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        first = self.client.get(f"/api/videos/getVideoData/{video.id}")
+        video.title = "Monday presser (updated)"
+        video.save()
+        response = self.client.get(f"/api/videos/getVideoData/{video.id}", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Monday presser (updated)")
+
+WHISPERX_RESULT = {"segments": [
+    {"start": 0.5, "end": 4.0, "text": " Good afternoon.", "speaker": "SPEAKER_00",
+     "words": [{"word": "Good", "start": 0.5, "end": 0.9, "score": 0.9, "speaker": "SPEAKER_00"},
+               {"word": "afternoon.", "start": 1.0, "end": 4.0, "score": 0.8, "speaker": "SPEAKER_00"}]},
+    {"start": 5.0, "end": 9.0, "text": " How is the hamstring?", "speaker": "SPEAKER_01",
+     "words": [{"word": "How", "start": 5.0, "end": 5.2, "score": 0.7, "speaker": "SPEAKER_01"},
+               {"word": "is", "start": None, "end": None, "score": None},
+               {"word": "the", "start": 5.6, "end": 5.7, "score": 0.9, "speaker": "SPEAKER_01"},
+               {"word": "hamstring?", "start": 5.8, "end": 9.0, "score": 0.6, "speaker": "SPEAKER_01"}]},
+    {"start": 10.0, "end": 14.0, "text": " We'll know after the MRI.", "speaker": "SPEAKER_00", "words": []},
+]}
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class CompactTranscriptTests(TestCase):
+    """
+    The columnar transcript format, the range/segment reads served from it, and the legacy JSON fallback.
+    """
+
+    def test_npz_round_trip(self):
+        compact = CompactTranscript.from_whisperx(WHISPERX_RESULT)
+        decoded = CompactTranscript.from_bytes(compact.to_bytes(), compact.speakers)
+
+        self.assertEqual(decoded.segments(include_words=True), compact.segments(include_words=True))
+        self.assertEqual(decoded.full_text, "Good afternoon. How is the hamstring? We'll know after the MRI.")
+        self.assertEqual((len(decoded), decoded.word_count, decoded.duration), (3, 6, 14.0))
+        self.assertEqual(decoded.speakers, ["SPEAKER_00", "SPEAKER_01"])
+
+        words = decoded.segment(1, include_words=True)["words"]
+        self.assertEqual(words[1], {"word": "is", "start": None, "end": None, "score": None, "speaker": None})
+        self.assertEqual(words[3]["end"], 9.0)
+
+    def test_range_and_segment_reads(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=compact", status="COMPLETED")
+        Transcript.store(video.id, WHISPERX_RESULT)
+
+        segments = self.client.get(f"/api/videos/getTranscriptRange/{video.id}?start=4.5&end=10.5").json()
+        self.assertEqual([segment["index"] for segment in segments], [1, 2])
+        self.assertIsNone(segments[0]["words"])
+
+        segment = self.client.get(f"/api/videos/getTranscriptSegment/{video.id}/1").json()
+        self.assertEqual((segment["text"], segment["speaker"]), ("How is the hamstring?", "SPEAKER_01"))
+        self.assertEqual([word["word"] for word in segment["words"]], ["How", "is", "the", "hamstring?"])
+
+        self.assertEqual(self.client.get(f"/api/videos/getTranscriptSegment/{video.id}/3").status_code, 404)
+        info = self.client.get(f"/api/videos/getTranscriptInfo/{video.id}").json()
+        self.assertEqual((info["segment_count"], info["word_count"]), (3, 6))
+
+    def test_video_data_has_the_same_shape_for_both_formats(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=shape", status="COMPLETED")
+        Transcript.store(video.id, WHISPERX_RESULT)
+
+        data = self.client.get(f"/api/videos/getVideoData/{video.id}").json()["transcript_data"]
+        self.assertEqual([segment["words"] for segment in data["segments"]],
+                         [[{"speaker": None, **word} for word in segment["words"]]
+                          for segment in WHISPERX_RESULT["segments"]])
+        self.assertEqual([word["word"] for word in data["word_segments"]],
+                         ["Good", "afternoon.", "How", "is", "the", "hamstring?"])
+
+    def test_legacy_json_transcripts_are_still_served(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=legacy", status="COMPLETED",
+                                     transcript_data=WHISPERX_RESULT)
+
+        data = self.client.get(f"/api/videos/getVideoData/{video.id}").json()
+        self.assertEqual(data["transcript_data"], WHISPERX_RESULT)
+        # The columnar reads need the compact transcript.
+        self.assertEqual(self.client.get(f"/api/videos/getTranscriptRange/{video.id}").status_code, 404)
+
+class FakeYouTubeAPI:
+    """
+    Local stand-in for the YouTube Data API's playlistItems and videos endpoints, serving a playlist
+    (newest first) in pages of 50 with an ETag, and recording every request it receives.
+    """
+
+    def __init__(self, video_ids: list[str]):
+        self.video_ids = video_ids
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                fake.requests.append((url.path.rsplit("/", 1)[-1], params, self.headers.get("If-None-Match")))
+                status, headers, body = fake.respond(url.path.rsplit("/", 1)[-1], params,
+                                                     self.headers.get("If-None-Match"))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def etag(self) -> str:
+        return f'"playlist-{len(self.video_ids)}"'
+
+    def respond(self, endpoint: str, params: dict, if_none_match: str):
+        if endpoint == "playlistItems":
+            if if_none_match == self.etag and "pageToken" not in params:
+                return 304, {}, b""
+            start = int(params.get("pageToken", 0))
+            page = self.video_ids[start:start + 50]
+            data = {"etag": self.etag, "items": [{"contentDetails": {"videoId": video_id}} for video_id in page]}
+            if start + 50 < len(self.video_ids):
+                data["nextPageToken"] = str(start + 50)
+            return 200, {"ETag": self.etag}, json.dumps(data).encode()
+
+        if endpoint == "videos":
+            ids = params["id"].split(",")
+            items = [{"id": video_id,
+                      "snippet": {"title": f"Press conference {video_id}", "publishedAt": "2025-10-01T18:00:00Z",
+                                  "thumbnails": {"high": {"url": f"https://i.ytimg.com/{video_id}.jpg"}}}}
+                     for video_id in ids]
+            return 200, {}, json.dumps({"items": items}).encode()
+
+        return 404, {}, b"{}"
+
+    def calls(self, endpoint: str) -> list:
+        return [request for request in self.requests if request[0] == endpoint]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class PlaylistSyncTests(TestCase):
+    """
+    Ingestion of the press conference playlist against a local fake of the YouTube Data API.
+    """
+
+    def setUp(self):
+        self.api = FakeYouTubeAPI([f"vid{i:03d}" for i in range(120)])
+        self.addCleanup(self.api.close)
+        settings_override = override_settings(YOUTUBE_API_BASE_URL=self.api.base_url, YOUTUBE_PLAYLIST_ID="PLtest")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # The client is a process-wide singleton; make it pick up the fake server's URL.
+        youtube_api._CLIENT = None
+        self.addCleanup(setattr, youtube_api, "_CLIENT", None)
+
+        pipeline = mock.patch("core.tasks.process_video_pipeline.delay")
+        self.queued = pipeline.start()
+        self.addCleanup(pipeline.stop)
+
+    def test_sync_batches_metadata_and_queues_new_videos(self):
+        self.assertEqual(sync_playlist(), 120)
+
+        self.assertEqual(len(self.api.calls("playlistItems")), 3)
+        self.assertEqual([len(call[1]["id"].split(",")) for call in self.api.calls("videos")], [50, 50, 20])
+        self.assertEqual(Video.objects.count(), 120)
+        self.assertEqual(self.queued.call_count, 120)
+        self.assertEqual(Video.objects.get(youtube_url="https://www.youtube.com/watch?v=vid007").title,
+                         "Press conference vid007")
+
+    def test_unchanged_playlist_costs_one_conditional_request(self):
+        sync_playlist()
+        self.api.requests.clear()
+
+        self.assertEqual(sync_playlist(), 0)
+        self.assertEqual(self.api.requests, [("playlistItems", mock.ANY, self.api.etag)])
+        self.assertEqual(self.queued.call_count, 120)
+
+    def test_only_new_uploads_are_fetched(self):
+        sync_playlist()
+        self.api.requests.clear()
+        self.queued.reset_mock()
+
+        # Two new uploads appear at the top of the playlist.
+        self.api.video_ids = ["new001", "new002", *self.api.video_ids]
+        self.assertEqual(sync_playlist(), 2)
+
+        self.assertEqual(len(self.api.calls("playlistItems")), 1)  # The first page already reaches known videos.
+        self.assertEqual([call[1]["id"] for call in self.api.calls("videos")], ["new001,new002"])
+        self.assertEqual(self.queued.call_count, 2)
+        self.assertEqual(PlaylistSync.objects.get(playlist_id="PLtest").last_new_videos, 2)
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False, TRANSCRIPTION_PROFILE="balanced")
+class TranscriptionProfileTests(TestCase):
+    """
+    Videos are transcribed with a named profile, and a completed one can be upgraded to a better profile.
+    """
+
+    def setUp(self):
+        pipeline = mock.patch("core.tasks.process_video_pipeline.delay")
+        self.queued = pipeline.start()
+        self.addCleanup(pipeline.stop)
+
+    def test_profile_selection(self):
+        self.assertEqual(get_profile()["name"], "balanced")
+        fast = get_profile("fast")
+        self.assertEqual((fast["name"], fast["model_name"], fast["compute_type"], fast["diarize"]),
+                         ("fast", "base", "int8", False))
+        with self.assertRaises(ValueError):
+            get_profile("ultra")
+
+    def test_profile_only_changes_the_transcript_and_later_keys(self):
+        fast, full = (pipeline_stage_keys("abc123", get_profile(name)) for name in ("fast", "full"))
+        self.assertEqual([fast[stage] == full[stage] for stage in ("download", "enhanced", "transcript", "summary")],
+                         [True, True, False, False])
+
+    def test_submit_with_a_profile(self):
+        response = self.client.post("/api/videos/submitVideo", {"youtube_url": "https://youtu.be/abc123",
+                                                                "profile": "fast"}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.queued.assert_called_once_with(response.json()["id"], "fast")
+
+        response = self.client.post("/api/videos/submitVideo", {"youtube_url": "https://youtu.be/def456",
+                                                                "profile": "ultra"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Video.objects.filter(youtube_url="https://youtu.be/def456").exists())
+
+    def test_upgrade_endpoint(self):
+        video = Video.objects.create(youtube_url="https://youtu.be/abc123", status="COMPLETED",
+                                     transcription_profile="fast")
+        url = f"/api/videos/upgradeTranscript/{video.id}"
+
+        response = self.client.post(url, {"profile": "full"}, content_type="application/json")
+        self.assertEqual(response.status_code, 202)
+        self.queued.assert_called_once_with(video.id, "full", upgrade=True)
+
+        # Already on the requested profile: nothing to do.
+        self.queued.reset_mock()
+        response = self.client.post(url, {"profile": "fast"}, content_type="application/json")
+        self.assertEqual(response.status_code, 202)
+        self.queued.assert_not_called()
+
+        response = self.client.post(url, {"profile": "ultra"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        Video.objects.filter(id=video.id).update(status="PROCESSING")
+        response = self.client.post(url, {"profile": "full"}, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.queued.assert_not_called()
+
+class SpeakerGazetteerTests(SimpleTestCase):
+    """
+    Known speakers are resolved from titles by the gazetteer, without spaCy.
+    """
+
+    def test_aliases_map_to_the_canonical_name(self):
+        self.assertEqual(match_gazetteer("QB Sam Darnold on the win over Arizona"), "Sam Darnold")
+        self.assertEqual(match_gazetteer("JSN talks after practice"), "Jaxon Smith-Njigba")
+        self.assertEqual(match_gazetteer("COACH MACDONALD | Week 7 Press Conference"), "Mike Macdonald")
+
+    def test_longest_name_wins_and_words_must_be_whole(self):
+        self.assertEqual(match_gazetteer("Kenneth Walker III postgame"), "Kenneth Walker III")
+        self.assertIsNone(match_gazetteer("Darnoldson press conference"))
+
+    def test_batch_keeps_title_order(self):
+        titles = ["Kubiak on the run game", "", "Durde: defense is ready", "Kubiak on the run game"]
+        self.assertEqual(infer_people_from_titles(titles), ["Klint Kubiak", None, "Aden Durde", "Klint Kubiak"])
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    """
+    The benchmark fixtures must be reproducible, and the result comparison must flag slowdowns.
+    """
+
+    def test_fixture_is_deterministic(self):
+        first, script = synth_press_conference(60, seed=3)
+        second, _ = synth_press_conference(60, seed=3)
+        other, _ = synth_press_conference(60, seed=4)
+
+        self.assertEqual(len(first), 60 * 16000)
+        self.assertEqual(first.dtype, np.float32)
+        np.testing.assert_array_equal(first, second)
+        self.assertFalse(np.array_equal(first, other))
+        self.assertEqual({segment["speaker"] for segment in script}, {"SPEAKER_00", "SPEAKER_01"})
+
+    def test_reporters_are_quieter_than_the_coach(self):
+        audio, script = synth_press_conference(120, seed=0)
+
+        def rms(speaker):
+            samples = np.concatenate([audio[int(s["start"] * 16000):int(s["end"] * 16000)]
+                                      for s in script if s["speaker"] == speaker])
+            return np.sqrt(np.mean(samples ** 2))
+
+        self.assertGreater(rms("SPEAKER_00") / rms("SPEAKER_01"), 4)
+
+    def test_llm_standin_answers_json_requests(self):
+        standin = LocalLLMStandIn()
+        self.addCleanup(standin.close)
+        response = standin.complete({"messages": [{"role": "user", "content": "Summarize."}],
+                                     "response_format": {"type": "json_object"}})
+        self.assertIn("key_bullet_points", json.loads(response["choices"][0]["message"]["content"]))
+
+    def test_compare_flags_regressions(self):
+        baseline = {"stages": {"embed": {"seconds": 1.0, "peak_rss_mb": 500.0},
+                               "retrieve": {"seconds": 0.5, "peak_rss_mb": 500.0}}}
+        current = {"stages": {"embed": {"seconds": 1.1, "peak_rss_mb": 510.0},
+                              "retrieve": {"seconds": 0.8, "peak_rss_mb": 500.0}}}
+        regressed = [(stage, metric) for stage, metric, *_, flag in compare(baseline, current, 0.15) if flag]
+        self.assertEqual(regressed, [("retrieve", "seconds")])
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class PipelineMetricsTests(TestCase):
+    """
+    Stage timing records and their Prometheus exposition.
+    """
+
+    def test_record_stage_times_the_block(self):
+        job = {"run_id": start_run("video", profile="fast"), "profile": "fast", "enqueued_at": time.time() - 2}
+        with record_stage(job, "transcribe", model="whisper-base/int8") as stage:
+            stage.audio_seconds = 100.0
+
+        timing = StageTiming.objects.get()
+        self.assertEqual((timing.stage, timing.outcome, timing.profile), ("transcribe", "ok", "fast"))
+        self.assertGreaterEqual(timing.queue_wait_seconds, 2)
+        self.assertAlmostEqual(timing.rtf, timing.duration_seconds / 100)
+        self.assertGreater(job["enqueued_at"], time.time() - 1)  # The next stage's wait starts now.
+
+    def test_failed_stage_is_recorded(self):
+        job = {"run_id": start_run("digest")}
+        with self.assertRaises(RuntimeError):
+            with record_stage(job, "tts"):
+                raise RuntimeError("quota exceeded")
+        self.assertEqual(StageTiming.objects.get().outcome, "failed")
+
+    def test_metrics_endpoint(self):
+        run = PipelineRun.objects.create(kind="video", status="COMPLETED")
+        now = timezone.now()
+        for seconds, outcome in ((3.0, "ok"), (40.0, "ok"), (0.01, "cached")):
+            StageTiming.objects.create(run=run, stage="transcribe", outcome=outcome, started_at=now, finished_at=now,
+                                       duration_seconds=seconds, queue_wait_seconds=1.0, audio_seconds=600.0,
+                                       rtf=seconds / 600)
+
+        with query_budget(4):
+            response = self.client.get("/api/metrics/")
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+
+        # Cache hits count towards the queue wait, but not towards the stage's duration.
+        self.assertIn('pipeline_stage_duration_seconds_bucket{stage="transcribe",le="5"} 1', body)
+        self.assertIn('pipeline_stage_duration_seconds_count{stage="transcribe"} 2', body)
+        self.assertIn('pipeline_stage_queue_wait_seconds_count{stage="transcribe"} 3', body)
+        self.assertIn('pipeline_stage_duration_seconds_recent{stage="transcribe",quantile="0.5"} 21.5', body)
+        self.assertIn('pipeline_stage_total{stage="transcribe",outcome="cached"} 1', body)
+        self.assertIn('pipeline_runs_total{kind="video",status="COMPLETED"} 1', body)
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class LLMCacheTests(TestCase):
+    """
+    Two processes sharing one backend (standing in for Redis), each with its own in-memory LRU.
+    """
+
+    def setUp(self):
+        self.shared = MemoryBackend()
+        self.shared.name = "redis"
+        self.web, self.worker = (LLMResponseCache([MemoryBackend(), self.shared]) for _ in range(2))
+        self.key = make_cache_key("llama", "video_summary", 1, [{"role": "user", "content": "Summarize."}])
+
+    def test_invalidation_reaches_other_processes_memory(self):
+        self.worker.set(self.key, "Old summary.")
+        self.assertEqual(self.worker.get(self.key), "Old summary.")
+
+        self.web.invalidate("video_summary", 1)
+        self.assertIsNone(self.worker.get(self.key))
+        self.worker.set(self.key, "New summary.")
+        self.assertEqual(self.web.get(self.key), "New summary.")
+
+    def test_stats_are_shared_and_exposed(self):
+        self.worker.set(self.key, "Summary.")
+        self.worker.get(self.key)
+        self.web.get(self.key)
+        self.web.get(make_cache_key("llama", "video_summary", 1, [{"role": "user", "content": "Other."}]))
+        self.assertEqual(self.web.shared_stats(), {"memory_hits": 1, "redis_hits": 1, "misses": 1})
+
+        with mock.patch("core.metrics.get_llm_cache", return_value=self.web):
+            body = self.client.get("/api/metrics/").content.decode()
+        self.assertIn('llm_cache_lookups_total{result="redis"} 1', body)
+        self.assertIn('llm_cache_lookups_total{result="miss"} 1', body)
+
+class RecordingLimiter:
+    def __init__(self):
+        self.acquired, self.settled = [], []
+
+    async def acquire(self, tokens):
+        self.acquired.append(tokens)
+
+    async def settle(self, estimated_tokens, used_tokens):
+        self.settled.append((estimated_tokens, used_tokens))
+
+@override_settings(LLM_RETRY_BASE_DELAY=0.0, LLM_MAX_RETRIES=2)
+class LLMClientTests(SimpleTestCase):
+    """
+    The shared client path (rate limiter, retries) against a mocked HTTP transport.
+    """
+
+    messages = [{"role": "user", "content": "Summarize the press conference."}]
+
+    def setUp(self):
+        self.requests = []
+        self.responses = []
+        self.limiter = RecordingLimiter()
+
+    def handle(self, request):
+        self.requests.append(json.loads(request.content))
+        return self.responses.pop(0)
+
+    def completion(self, content="Summary.", total_tokens=42):
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "llama",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": total_tokens - 2, "completion_tokens": 2, "total_tokens": total_tokens},
+        })
+
+    def run_client(self, coroutine_function):
+        async def run():
+            client = openai.AsyncOpenAI(api_key="test", base_url="http://llm.test/v1", max_retries=0,
+                                        http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.handle)))
+            with mock.patch("core.llm.client._loop_resources",
+                            return_value={"client": client, "limiter": self.limiter}):
+                return await coroutine_function()
+        return asyncio.run(run())
+
+    def test_token_bucket_is_settled_with_the_reported_usage(self):
+        self.responses = [self.completion(total_tokens=42)]
+        content = self.run_client(lambda: achat_completion(self.messages, "llama", "test", 1, use_cache=False))
+        self.assertEqual(content, "Summary.")
+        estimate = self.limiter.acquired[0]
+        self.assertGreater(estimate, 42)
+        self.assertEqual(self.limiter.settled, [(estimate, 42)])
+
+    def test_stream_is_settled_once_it_ends(self):
+        chunk = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "llama"}
+        events = [{**chunk, "choices": [{"index": 0, "delta": {"content": text}}]} for text in ("Sum", "mary.")]
+        events.append({**chunk, "choices": [], "usage": {"prompt_tokens": 30, "completion_tokens": 3,
+                                                         "total_tokens": 33}})
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        self.responses = [httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})]
+
+        async def stream():
+            return [part async for part in astream_chat_completion(self.messages, "llama", "test", 1, use_cache=False)]
+
+        self.assertEqual(self.run_client(stream), ["Sum", "mary."])
+        self.assertEqual(self.requests[0]["stream_options"], {"include_usage": True})
+        self.assertEqual(self.limiter.settled, [(self.limiter.acquired[0], 33)])
+
+    def test_rate_limited_call_waits_for_retry_after(self):
+        self.responses = [httpx.Response(429, headers={"retry-after": "0.3"}, json={"error": {"message": "slow down"}}),
+                          self.completion()]
+        started = time.monotonic()
+        content = self.run_client(lambda: achat_completion(self.messages, "llama", "test", 1, use_cache=False))
+        self.assertEqual(content, "Summary.")
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        # Each attempt waits for rate-limit budget again.
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(len(self.limiter.acquired), 2)
+
+    def test_retries_give_up_after_the_limit(self):
+        self.responses = [httpx.Response(503, json={"error": {"message": "overloaded"}}) for _ in range(3)]
+        with self.assertRaises(openai.InternalServerError):
+            self.run_client(lambda: achat_completion(self.messages, "llama", "test", 1, use_cache=False))
+        self.assertEqual(len(self.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.responses = [httpx.Response(400, json={"error": {"message": "bad request"}})]
+        with self.assertRaises(openai.BadRequestError):
+            self.run_client(lambda: achat_completion(self.messages, "llama", "test", 1, use_cache=False))
+        self.assertEqual(len(self.requests), 1)
+
+    @override_settings(LLM_RETRY_BASE_DELAY=1.0, LLM_RETRY_MAX_DELAY=4.0)
+    def test_backoff_is_capped_and_honours_retry_after(self):
+        error = openai.RateLimitError("slow down", response=httpx.Response(
+            429, headers={"retry-after": "7"}, request=httpx.Request("POST", "http://llm.test")), body=None)
+        with mock.patch("core.llm.client.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual([_retry_delay(attempt, RuntimeError()) for attempt in range(4)], [1.0, 2.0, 4.0, 4.0])
+            self.assertEqual(_retry_delay(0, error), 7.0)
+
+    def test_limiter_fails_open_without_redis(self):
+        async def use_limiter():
+            limiter = TokenBucketLimiter(aioredis.Redis.from_url("redis://127.0.0.1:1"), 30, 6000)
+            await asyncio.wait_for(limiter.acquire(100), 5)
+            await asyncio.wait_for(limiter.settle(100, 40), 5)
+
+        asyncio.run(use_limiter())
+
+class RetrievalEngineTests(SimpleTestCase):
+    """
+    The resident Chroma handle is only swapped for a new index version once no query is using it.
+    """
+
+    def test_reopen_waits_for_queries_on_the_old_handle(self):
+        engine = RetrievalEngine()
+        engine._encoder = object()
+        version, events = ["v1"], []
+        in_query, release = threading.Event(), threading.Event()
+
+        class FakeStore:
+            def __init__(self, version):
+                self.version = version
+
+            def similarity_search_by_vector(self, vector, k):
+                events.append(f"query on {self.version}")
+                in_query.set()
+                release.wait(5)
+                events.append(f"query done on {self.version}")
+                return []
+
+        def open_store():
+            events.append(f"open {version[0]}")
+            return FakeStore(version[0])
+
+        with mock.patch("core.rag.engine.read_index_version", side_effect=lambda: version[0]), \
+             mock.patch.object(engine, "_open_store", side_effect=open_store):
+            query = threading.Thread(target=engine.similarity_search_by_vector, args=([0.0],))
+            query.start()
+            self.assertTrue(in_query.wait(5))
+
+            version[0] = "v2"
+            reopen = threading.Thread(target=lambda: engine.store)
+            reopen.start()
+            reopen.join(0.2)
+            self.assertTrue(reopen.is_alive())  # Blocked until the query on v1 is done.
+
+            release.set()
+            query.join(5)
+            reopen.join(5)
+
+        self.assertEqual(events, ["open v1", "query on v1", "query done on v1", "open v2"])
+        self.assertEqual(engine.index_version, "v2")
+
+class SemanticAnswerCacheTests(SimpleTestCase):
+    """
+    Near-duplicate questions share an answer until the RAG index version changes.
+    """
+
+    def setUp(self):
+        self.version = "v1"
+        patcher = mock.patch("core.rag.semantic_cache.read_index_version", side_effect=lambda: self.version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SemanticAnswerCache(threshold=0.9, max_entries=2)
+
+    def test_hit_at_or_above_the_threshold(self):
+        self.cache.store("How's Geno's ankle?", [1.0, 0.0], {"answer": "Day to day."})
+        # Cosine similarity ignores scale: these are 1.0, 0.95, 0.8 and 0.0 similar to the cached question.
+        self.assertEqual(self.cache.lookup([2.0, 0.0]), {"answer": "Day to day."})
+        self.assertEqual(self.cache.lookup([0.95, np.sqrt(1 - 0.95 ** 2)]), {"answer": "Day to day."})
+        self.assertIsNone(self.cache.lookup([0.8, 0.6]))
+        self.assertIsNone(self.cache.lookup([0.0, 1.0]))
+
+    def test_closest_question_wins_and_oldest_is_evicted(self):
+        self.cache.store("a", [1.0, 0.0, 0.0], {"answer": "a"})
+        self.cache.store("b", [0.0, 1.0, 0.0], {"answer": "b"})
+        self.assertEqual(self.cache.lookup([0.1, 1.0, 0.0]), {"answer": "b"})
+
+        self.cache.store("c", [0.0, 0.0, 1.0], {"answer": "c"})
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0]))
+        self.assertEqual(self.cache.lookup([0.0, 0.0, 1.0]), {"answer": "c"})
+
+    def test_new_index_version_drops_every_answer(self):
+        self.cache.store("How's Geno's ankle?", [1.0, 0.0], {"answer": "Day to day."})
+        self.version = "v2"
+        self.assertIsNone(self.cache.lookup([1.0, 0.0]))
+
+        self.cache.store("How's Geno's ankle?", [1.0, 0.0], {"answer": "Cleared to play."})
+        self.assertEqual(self.cache.lookup([1.0, 0.0]), {"answer": "Cleared to play."})
+
+@override_settings(SUMMARY_WINDOW_TOKENS=10, SUMMARY_MAP_CONCURRENCY=2)
+class MapReduceSummaryTests(SimpleTestCase):
+    """
+    Windowing of long transcripts, and the map-reduce summary over the windows.
+    """
+
+    segments = [{"text": " " + "a" * 16}, {"text": " " + "b" * 16}, {"text": " "}, {"text": " " + "c" * 60}]
+
+    def test_windows_respect_the_token_budget_without_splitting_segments(self):
+        self.assertEqual(split_into_windows(self.segments, 10), ["a" * 16 + " " + "b" * 16, "c" * 60])
+        self.assertEqual(split_into_windows(self.segments, 5), ["a" * 16, "b" * 16, "c" * 60])
+
+    def run_map_reduce(self, failing_part: int = None):
+        async def map_step(messages, **kwargs):
+            part = int(messages[0]["content"].split("part ")[1].split(" ")[0])
+            if part == failing_part:
+                raise RuntimeError("rate limited")
+            return f"notes on part {part}"
+
+        reduce_step = mock.Mock(return_value=json.dumps({"title": "Title", "one_sentence_summary": "Summary.",
+                                                         "key_bullet_points": ["One."]}))
+        with mock.patch("core.llm.services.achat_completion", side_effect=map_step), \
+             mock.patch("core.llm.services.chat_completion", reduce_step):
+            return generate_video_summary_map_reduce(self.segments), reduce_step
+
+    def test_notes_are_reduced_in_transcript_order(self):
+        summary, reduce_step = self.run_map_reduce()
+        self.assertEqual(summary["title"], "Title")
+        notes = reduce_step.call_args.kwargs["messages"][1]["content"]
+        self.assertIn("PART 1:\nnotes on part 1\n\nPART 2:\nnotes on part 2", notes)
+
+    def test_a_failed_window_fails_the_summary(self):
+        summary, reduce_step = self.run_map_reduce(failing_part=2)
+        self.assertIn("[2]", summary["error"])
+        reduce_step.assert_not_called()
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False, PROGRESS_MIN_INTERVAL_SECONDS=60)
+class JobProgressTests(TestCase):
+    """
+    Progress events and the status-only endpoint, against an in-memory stand-in for Redis.
+    """
+
+    def setUp(self):
+        self.snapshots = {}
+        fake_redis = mock.MagicMock()
+        fake_redis.get.side_effect = self.snapshots.get
+        fake_redis.pipeline.return_value.set.side_effect = lambda key, value, ex: self.snapshots.__setitem__(key, value)
+        patcher = mock.patch("core.progress._redis", return_value=fake_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.published = fake_redis.pipeline.return_value.publish
+
+    def test_overall_percent_weights_stages(self):
+        self.assertEqual(overall_percent("queued", 0.0), 0.0)
+        self.assertEqual(overall_percent("index", 1.0), 100.0)
+        self.assertLess(overall_percent("transcribe", 0.1), overall_percent("transcribe", 0.9))
+
+    def test_stage_updates_are_throttled(self):
+        progress = StageProgress({"video_id": 7}, "transcribe")
+        progress.start()
+        for fraction in (0.1, 0.2, 0.3):
+            progress.update(fraction)
+        progress.finish()
+
+        events = [json.loads(call.args[1]) for call in self.published.call_args_list]
+        self.assertEqual([event["stage_percent"] for event in events], [0.0, 100.0])
+        self.assertEqual(events[-1]["status"], "PROCESSING")
+
+    def test_status_is_served_from_the_snapshot(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=status", status="COMPLETED")
+
+        with query_budget(1):
+            first = self.client.get(f"/api/videos/getVideoStatus/{video.id}").json()
+        with query_budget(0):
+            second = self.client.get(f"/api/videos/getVideoStatus/{video.id}").json()
+
+        self.assertEqual((first["status"], first["finished"], first["percent"]), ("COMPLETED", True, 100.0))
+        self.assertEqual(second, first)
+        self.assertEqual(self.client.get("/api/videos/getVideoStatus/999999").status_code, 404)
+
+    def test_failed_indexing_fails_the_run(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=index", status="COMPLETED")
+        job = {"video_id": video.id, "run_id": start_run("video", video_id=video.id)}
+
+        with mock.patch("core.tasks.create_video_embeddings", side_effect=RuntimeError("Chroma is down")):
+            with self.assertRaises(RuntimeError):
+                index_video(job)
+
+        run = PipelineRun.objects.get()
+        self.assertEqual((run.status, run.error), ("FAILED", "Chroma is down"))
+        self.assertEqual(StageTiming.objects.get().outcome, "failed")
+        self.assertEqual(Video.objects.get().status, "COMPLETED")
+        event = json.loads(self.published.call_args_list[-1].args[1])
+        self.assertEqual((event["status"], event["error"]), ("COMPLETED", "Chroma is down"))
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False)
+class IncrementalTranscriptionTests(TestCase):
+    """
+    Windowing of streamed audio at pauses, partial transcript commits and early summary windows.
+    """
+
+    def test_windows_are_cut_at_pauses_and_cover_the_audio(self):
+        audio, _ = synth_press_conference(120, seed=3)
+        blocks = [audio[i:i + 16000 * 7] for i in range(0, len(audio), 16000 * 7)]
+
+        windows = list(iter_vad_windows(blocks, min_seconds=10, max_seconds=20))
+
+        self.assertEqual(sum(len(samples) for _, samples in windows), len(audio))
+        offset = 0.0
+        for start, samples in windows[:-1]:
+            self.assertAlmostEqual(start, offset)
+            self.assertTrue(10 <= len(samples) / 16000 <= 20)
+            offset += len(samples) / 16000
+        # Cuts land in quiet audio, not mid-word.
+        for start, samples in windows[1:]:
+            cut = int(start * 16000)
+            self.assertLess(np.sqrt(np.mean(audio[cut - 800:cut + 800] ** 2)), np.sqrt(np.mean(audio ** 2)))
+
+    def test_partial_transcript_is_served_until_refined(self):
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=partial", status="PROCESSING")
+        partial = {"segments": [{"start": 0.5, "end": 4.0, "text": " Good afternoon."}]}
+
+        Transcript.store(video.id, partial, refinement="asr", committed_seconds=30.0)
+        info = self.client.get(f"/api/videos/getTranscriptInfo/{video.id}").json()
+        self.assertEqual((info["refinement"], info["committed_seconds"]), ("asr", 30.0))
+        self.assertEqual(info["full_text"], "Good afternoon.")
+
+        Transcript.store(video.id, {"segments": [{**partial["segments"][0], "speaker": "SPEAKER_00"}]})
+        transcript = Transcript.objects.get(video_id=video.id)
+        self.assertEqual((transcript.refinement, transcript.committed_seconds), ("final", None))
+
+    @override_settings(SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS=40, SUMMARY_WINDOW_TOKENS=35)
+    def test_closed_summary_windows_are_prefetched_once(self):
+        segments = [{"text": f"The defense played a complete game in week {i} of the season."} for i in range(8)]
+        job = {}
+
+        with mock.patch("core.tasks.prefetch_summary_window.delay") as delay:
+            _prefetch_summary_windows(job, segments[:2])
+            self.assertFalse(delay.called)  # Below the map-reduce threshold.
+            _prefetch_summary_windows(job, segments[:5])
+            _prefetch_summary_windows(job, segments)
+
+        # Two segments per window; the last window is still open.
+        self.assertEqual([call.args[1] for call in delay.call_args_list], [0, 1, 2])
+        self.assertEqual(job["summary_windows_prefetched"], 3)
+
+class DeadAirTrimmingTests(SimpleTestCase):
+    """
+    Speech detection ahead of enhancement, and mapping timestamps on the trimmed audio back onto the
+    video timeline.
+    """
+
+    def test_dead_air_is_found_and_trimmed(self):
+        speech, _ = synth_press_conference(60, seed=5)
+        rng = np.random.default_rng(5)
+        dead_air = lambda seconds: (rng.standard_normal(int(seconds * 16000)) * 1e-4).astype(np.float32)
+        audio = np.concatenate([dead_air(30), speech[:16000 * 30], dead_air(20), speech[16000 * 30:]])
+        blocks = [audio[i:i + 16000 * 30] for i in range(0, len(audio), 16000 * 30)]
+
+        regions, duration = speech_regions(blocks, min_silence_seconds=3.0, padding_seconds=0.5)
+
+        self.assertEqual(duration, 110.0)
+        self.assertAlmostEqual(regions[0][0], 29.5, delta=0.5)
+        kept = sum(end - start for start, end in regions)
+        self.assertAlmostEqual(kept, 60.0, delta=4.0)
+        # The 20s gap is cut.
+        self.assertTrue(all(not (start < 70 and end > 65) for start, end in regions))
+        trimmed = np.concatenate(list(iter_regions(blocks, regions, 16000)))
+        self.assertEqual(len(trimmed), sum(int(end * 16000) - int(start * 16000) for start, end in regions))
+
+    def test_timestamps_are_restored_to_the_video_timeline(self):
+        regions = [[10.0, 20.0], [30.0, 40.0]]
+        to_original = timeline_mapper(regions)
+        self.assertEqual([to_original(t) for t in (0.0, 5.0, 12.0, 20.0)], [10.0, 15.0, 32.0, 40.0])
+        self.assertEqual(timeline_mapper([])(7.5), 7.5)
+
+        word = {"word": "Thanks", "start": 9.5, "end": 10.5}
+        result = {"segments": [{"start": 9.5, "end": 11.0, "text": " Thanks.", "words": [word]}],
+                  "word_segments": [word]}
+        restore_timeline(result, regions)
+
+        self.assertEqual((result["segments"][0]["start"], result["segments"][0]["end"]), (19.5, 31.0))
+        self.assertEqual(result["word_segments"], [{"word": "Thanks", "start": 19.5, "end": 30.5}])
+
+class ArtifactCacheTests(SimpleTestCase):
+    """
+    Moving finished files into the cache, and keeping it within its size budget.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_files_move_across_filesystems(self):
+        cache = ArtifactCache(self.root, max_bytes=10 ** 6)
+        with tempfile.NamedTemporaryFile(delete=False) as scratch:
+            scratch.write(b"audio")
+        rename = os.replace
+
+        def cross_device_once(source, destination):
+            if source == scratch.name:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            rename(source, destination)
+
+        with mock.patch("core.cache.artifacts.os.replace", side_effect=cross_device_once):
+            path = cache.put_file("audio", "video-1", scratch.name)
+
+        self.assertEqual(cache.get_bytes("audio", "video-1"), b"audio")
+        self.assertFalse(os.path.exists(scratch.name))
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["video-1"])
+
+    def test_least_recently_used_files_are_evicted_without_walking_on_every_write(self):
+        cache = ArtifactCache(self.root, max_bytes=250)
+        walk = os.walk
+        with mock.patch("core.cache.artifacts.os.walk", side_effect=walk) as walks:
+            for i in range(3):
+                cache.put_bytes("audio", f"video-{i}", b"x" * 100)
+                os.utime(cache._path("audio", f"video-{i}"), (i, i))
+            self.assertEqual(walks.call_count, 2)  # On the first write, and once over budget.
+
+        self.assertEqual([cache.contains("audio", f"video-{i}") for i in range(3)], [False, True, True])
+
+def fake_download(url: str, path: str):
+    with open(path, "wb") as out:
+        out.write(b"audio")
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False, AUDIO_ENHANCE_SHARDS=1)
+class EvictedArtifactTests(TestCase):
+    """
+    A stage whose input was evicted from the artifact cache after the previous stage redoes the upstream work.
+    """
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.cache = ArtifactCache(root, max_bytes=10 ** 9)
+        patcher = mock.patch("core.tasks.get_artifact_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=evicted")
+        self.job = {"job_id": "evicted", "video_id": video.id, "original_audio_path": None,
+                    "keys": {"download": "evicted-download", "speech": None, "enhanced": "evicted-enhanced"},
+                    "enhanced_audio_path": self.cache.put_bytes("audio", "evicted-enhanced", b"\0" * 64)}
+
+    def test_evicted_audio_is_downloaded_and_enhanced_again(self):
+        os.remove(self.job["enhanced_audio_path"])
+        samples = np.linspace(-1, 1, 16000, dtype=np.float32)
+
+        with mock.patch("core.tasks.save_yt_audio_stream", side_effect=fake_download) as download, \
+             mock.patch("core.tasks.iter_enhanced_audio", return_value=iter([samples])) as enhance, \
+             mock.patch("core.tasks.probe_duration", return_value=1.0):
+            path = _enhanced_audio(self.job)
+            self.assertEqual(_enhanced_audio(self.job), path)
+
+        self.assertEqual((download.call_count, enhance.call_count), (1, 1))
+        self.assertEqual(self.job["enhanced_audio_path"], path)
+        self.assertTrue(os.path.exists(self.job["original_audio_path"]))
+        np.testing.assert_array_equal(np.fromfile(path, dtype=np.float32), samples)
+
+    def test_skipped_audio_fraction_reaches_the_cached_video_response(self):
+        url = f"/api/videos/getVideoData/{self.job['video_id']}"
+        self.assertIsNone(self.client.get(url).json()["skipped_audio_fraction"])
+
+        self.job["keys"]["speech"] = "evicted-speech"
+        self.cache.put_json("speech", "evicted-speech", {"regions": [[0.0, 15.0]], "duration": 20.0})
+        self.assertEqual(_speech_regions(self.job), [[0.0, 15.0]])
+        self.assertEqual(self.client.get(url).json()["skipped_audio_fraction"], 0.25)
+
+@override_settings(TTS_CHUNKED=True, TTS_MAX_PARALLEL=3)
+class DigestAudioTests(SimpleTestCase):
+    """
+    Chunked digest TTS: sentences are synthesized concurrently but written in script order.
+    """
+
+    script = ("A much longer opening sentence, which takes the synthesizer the longest to finish. Short one. "
+              "Tiny! And a last sentence?")
+
+    def test_split_sentences(self):
+        self.assertEqual(split_sentences(self.script), [
+            "A much longer opening sentence, which takes the synthesizer the longest to finish.",
+            "Short one.", "Tiny!", "And a last sentence?"])
+        self.assertEqual(split_sentences("one two three four. Five.", max_chars=9),
+                         ["one two", "three", "four.", "Five."])
+        self.assertEqual(split_sentences("x" * 10, max_chars=4), ["xxxx", "xxxx", "xx"])
+
+    @skipUnless(shutil.which("ffmpeg"), "FFmpeg is not installed.")
+    def test_chunks_are_written_in_script_order(self):
+        chunks = split_sentences(self.script)
+        expected = [LocalSynthesizer().synthesize(chunk) for chunk in chunks]
+        self.assertEqual(len(set(expected)), len(chunks))  # Each chunk's audio is distinguishable.
+
+        first_chunk_sizes = []
+        with tempfile.TemporaryDirectory() as tmp:
+            output_path = os.path.join(tmp, "digest.mp3")
+            # The opening sentence is the slowest to synthesize, so the others complete before it.
+            synthesizer = LocalSynthesizer(seconds_per_char=0.005)
+            produce_tts_audio(self.script, output_path, synthesizer, use_cache=False,
+                              on_first_chunk=lambda path: first_chunk_sizes.append(os.path.getsize(path)))
+            with open(output_path, "rb") as f:
+                audio = f.read()
+
+        self.assertEqual(audio, b"".join(expected))
+        # Fired once, as soon as the opening audio was on disk and before anything else was written.
+        self.assertEqual(first_chunk_sizes, [len(expected[0])])
+
+    def test_unchanged_sentences_come_from_the_cache(self):
+        synthesized = []
+
+        class TextSynthesizer(Synthesizer):
+            cache_config = {"engine": "text"}
+
+            def synthesize(self, text):
+                synthesized.append(text)
+                return text.encode() + b"|"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ArtifactCache(tmp, 10 ** 6)
+            output_path = os.path.join(tmp, "digest.mp3")
+            with mock.patch("core.tts.services.get_tts_cache", return_value=cache):
+                produce_tts_audio("Opening. Middle. End.", output_path, TextSynthesizer())
+                produce_tts_audio("Opening. New middle. End.", output_path, TextSynthesizer())
+            with open(output_path, "rb") as f:
+                self.assertEqual(f.read(), b"Opening.|New middle.|End.|")
+
+        self.assertEqual(sorted(synthesized), ["End.", "Middle.", "New middle.", "Opening."])
+
+@override_settings(CACHES=TEST_CACHES, DB_STATS_LOG=False, AUDIO_ENHANCE_SHARDS=4, AUDIO_CHUNKED_MIN_SECONDS=60)
+class ShardedEnhancementTests(TestCase):
+    """
+    Sharded enhancement matches the single pass, and is only used where holding the waveform is affordable.
+    """
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.cache = ArtifactCache(root, max_bytes=10 ** 9)
+        patcher = mock.patch("core.tasks.get_artifact_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        video = Video.objects.create(youtube_url="https://www.youtube.com/watch?v=sharded")
+        self.job = {"job_id": "sharded", "video_id": video.id, "enhanced_audio_path": None,
+                    "keys": {"download": "sharded-download", "speech": None, "enhanced": "sharded-enhanced"},
+                    "original_audio_path": self.cache.put_bytes("audio", "sharded-download", b"audio")}
+
+    def enhance(self, duration: float):
+        samples = np.zeros(16000, dtype=np.float32)
+        with mock.patch("core.tasks.probe_duration", return_value=duration), \
+             mock.patch("core.tasks.enhance_sharded", return_value=samples) as sharded, \
+             mock.patch("core.tasks.iter_enhanced_audio", return_value=iter([samples])) as single_pass:
+            np.testing.assert_array_equal(np.fromfile(_enhance(self.job), dtype=np.float32), samples)
+        return sharded.call_count, single_pass.call_count
+
+    def test_only_shorter_videos_are_sharded(self):
+        self.assertEqual(self.enhance(30.0), (1, 0))
+        self.assertEqual(self.enhance(3 * 3600.0), (0, 1))
+        self.assertEqual(self.enhance(None), (0, 1))
+
+    @skipUnless(shutil.which("ffmpeg"), "FFmpeg is not installed.")
+    def test_sharded_output_matches_the_single_pass(self):
+        audio, _ = synth_press_conference(40, seed=3)
+        path = os.path.join(tempfile.mkdtemp(), "presser.wav")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        write_wav(audio, path)
+
+        reference, sharded = enhance_audio_stream(path), enhance_sharded(path, 3)
+        self.assertLess(abs(len(reference) - len(sharded)), 160)
+        snr_db = lambda a, b: 10 * np.log10(np.sum(a ** 2) / max(np.sum((a - b) ** 2), 1e-20))
+
+        # Up to the first crossfade, the first shard is the single pass.
+        self.assertGreater(snr_db(reference[:16000 * 5], sharded[:16000 * 5]), 60)
+        # Later shards start from a 2s pre-roll rather than the filters' converged state. On real
+        # recordings bench_enhance expects 20 dB; this synthetic crowd noise keeps RNNoise's state apart
+        # for longer, which still leaves the difference well below the signal.
+        length = min(len(reference), len(sharded))
+        self.assertGreater(snr_db(reference[:length], sharded[:length]), 12)
@@ -1,40 +1,173 @@
 import os
+import re
+import time
+import ffmpeg
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import texttospeech
 from django.conf import settings
 
+from ..cache.artifacts import ArtifactCache
+
 # This tells the Google library where to find our key file, which we stored at the root of
 # the backend/ directory. It builds the full absolute path from the project BASE_DIR.
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = os.path.join(settings.BASE_DIR, 'gcloud-credentials.json')
 
-def produce_tts_audio(text_to_speak: str, output_path: str) -> str:
+# Google TTS rejects requests above 5000 bytes of input; stay comfortably below it per chunk.
+MAX_CHUNK_CHARS = 4500
+
+class Synthesizer:
     """
-    Generates an MP3 file from text using Google Cloud TTS.
+    Interface for anything that turns a piece of text into MP3 bytes. 'cache_config' describes
+    everything besides the text that affects the output (voice, encoding, ...).
     """
 
-    print(f"TTS Service: Attempting to generate audio for text and save to {output_path}...")
-    try:
-        # Set up the client and input type.
-        client = texttospeech.TextToSpeechClient()
-        synthesis_input = texttospeech.SynthesisInput(text=text_to_speak)
-        
+    cache_config = {}
+
+    def synthesize(self, text: str) -> bytes:
+        raise NotImplementedError
+
+class GoogleSynthesizer(Synthesizer):
+    """
+    Google Cloud TTS with the digest voice. The client is created on first use and reused across chunks.
+    """
+
+    def __init__(self, language_code: str = "en-US", voice_name: str = "en-US-Standard-C"):
+        self._client = None
+        self.cache_config = {"engine": "google", "language_code": language_code, "voice_name": voice_name,
+                             "encoding": "MP3"}
+
         # Configure the voice.
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="en-US",
-            name="en-US-Standard-C",
+        self.voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            name=voice_name,
             ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL)
-        
-        audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
 
-        response = client.synthesize_speech(input=synthesis_input, voice=voice, 
-                                            audio_config=audio_config)
+        self.audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = texttospeech.TextToSpeechClient()
+        return self._client
+
+    def synthesize(self, text: str) -> bytes:
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+        response = self.client.synthesize_speech(input=synthesis_input, voice=self.voice,
+                                                 audio_config=self.audio_config)
+        return response.audio_content
+
+class LocalSynthesizer(Synthesizer):
+    """
+    Offline stand-in for tests and benchmarks: encodes silence whose length tracks the text (roughly
+    speaking pace), after an optional artificial delay that mimics the network round-trip plus the
+    service's per-character synthesis time.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, seconds_per_char: float = 0.0, chars_per_second: float = 15.0):
+        self.latency_seconds = latency_seconds
+        self.seconds_per_char = seconds_per_char
+        self.chars_per_second = chars_per_second
+        self.cache_config = {"engine": "local", "chars_per_second": chars_per_second, "encoding": "MP3"}
+
+    def synthesize(self, text: str) -> bytes:
+        time.sleep(self.latency_seconds + len(text) * self.seconds_per_char)
+        duration = max(0.1, len(text) / self.chars_per_second)
+        audio, _ = (
+            ffmpeg.input("anullsrc=r=24000:cl=mono", f="lavfi", t=duration)
+            .output("pipe:1", format="mp3")
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        return audio
+
+class CachedSynthesizer(Synthesizer):
+    """
+    Wraps another synthesizer with an on-disk, size-bounded cache keyed by (text, voice, encoding).
+    Because digests are synthesized sentence by sentence, a lightly edited script only pays for the
+    sentences that actually changed.
+    """
+
+    def __init__(self, synthesizer: Synthesizer, cache: ArtifactCache):
+        self.synthesizer = synthesizer
+        self.cache = cache
+        self.cache_config = synthesizer.cache_config
+
+    def synthesize(self, text: str) -> bytes:
+        key = self.cache.key(hashlib.sha256(text.encode()).hexdigest()[:32], self.cache_config)
+        audio = self.cache.get_bytes("tts", key)
+        if audio is None:
+            audio = self.synthesizer.synthesize(text)
+            self.cache.put_bytes("tts", key, audio)
+        return audio
+
+_TTS_CACHE = None
+
+def get_tts_cache() -> ArtifactCache:
+    """
+    Returns the process-wide TTS audio cache configured in settings.
+    """
+
+    global _TTS_CACHE
+    if _TTS_CACHE is None:
+        _TTS_CACHE = ArtifactCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES)
+    return _TTS_CACHE
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list[str]:
+    """
+    Splits a script on sentence boundaries. A sentence longer than 'max_chars' (rare in a podcast
+    script) is further split on whitespace.
+    """
+
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+    chunks = []
+    for sentence in sentences:
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+def produce_tts_audio(text_to_speak: str, output_path: str, synthesizer: Synthesizer = None,
+                      on_first_chunk=None, use_cache: bool = True) -> str:
+    """
+    Generates an MP3 file from text using Google Cloud TTS (or any other Synthesizer). In chunked mode,
+    the script is split into sentences which are synthesized concurrently (with bounded parallelism)
+    and appended to the file in order as they complete; 'on_first_chunk(output_path)' fires as soon as
+    the opening audio is on disk, so playback can begin while the rest is still being synthesized.
+    Synthesized audio is served from (and added to) the TTS cache unless 'use_cache' is False.
+    """
+
+    print(f"TTS Service: Attempting to generate audio for text and save to {output_path}...")
+    try:
+        synthesizer = synthesizer or GoogleSynthesizer()
+        if use_cache:
+            synthesizer = CachedSynthesizer(synthesizer, get_tts_cache())
+
+        if not settings.TTS_CHUNKED:
+            with open(output_path, "wb") as out:
+                out.write(synthesizer.synthesize(text_to_speak))
+            print(f"TTS Service: Audio content written successfully to {output_path}")
+            return output_path
+
+        chunks = split_sentences(text_to_speak)
+        print(f"TTS Service: Synthesizing {len(chunks)} chunks, {settings.TTS_MAX_PARALLEL} at a time...")
+
+        # MP3 frames are self-contained, so the per-chunk outputs can simply be concatenated. Futures
+        # are consumed in submission order, which keeps the audio in script order.
+        with ThreadPoolExecutor(max_workers=settings.TTS_MAX_PARALLEL) as pool, open(output_path, "wb") as out:
+            futures = [pool.submit(synthesizer.synthesize, chunk) for chunk in chunks]
+            for index, future in enumerate(futures):
+                out.write(future.result())
+                out.flush()
+                if index == 0 and on_first_chunk is not None:
+                    on_first_chunk(output_path)
 
-        # Write the binary audio content to the specified output file.
-        with open(output_path, "wb") as out:
-            out.write(response.audio_content)
-            
         print(f"TTS Service: Audio content written successfully to {output_path}")
         return output_path
-    
+
     except Exception as e:
         print(f"TTS Service Error: {e}.")
         raise  # Re-raise the exception so the Celery task knows it failed.
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import type { Video, Digest } from './interfaces';
+import type { Video, VideoPage, Digest } from './interfaces';
 import { VideoModal } from './VideoModal';
 import { ChatWidget } from './ChatWidget';
 
@@ -14,11 +14,18 @@ function App() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const videosResponse = await fetch(`${API_BASE_URL}/api/videos/listVideos`);
-        const allVideos: Video[] = await videosResponse.json();
-
-        // Show only completed videos, newest first.
-        setVideos(allVideos.filter(v => v.status === 'COMPLETED').reverse());
+        // Page through the completed videos (already newest first).
+        const completedVideos: Video[] = [];
+        let cursor: string | null = null;
+        do {
+          const query = new URLSearchParams({ status: 'COMPLETED' });
+          if (cursor) query.set('cursor', cursor);
+          const videosResponse = await fetch(`${API_BASE_URL}/api/videos/listVideos?${query}`);
+          const page: VideoPage = await videosResponse.json();
+          completedVideos.push(...page.items);
+          cursor = page.next_cursor;
+        } while (cursor);
+        setVideos(completedVideos);
 
         const digestsResponse = await fetch(`${API_BASE_URL}/api/digests`);
         const allDigests: Digest[] = await digestsResponse.json();
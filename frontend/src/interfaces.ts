@@ -1,8 +1,11 @@
 // frontend/src/interfaces.ts
+// WhisperX's shape, for compact and legacy transcripts alike. Words it couldn't align have no timing.
 export interface WordSegment {
-  start: number;
-  end: number;
-  text: string;
+  word: string;
+  start: number | null;
+  end: number | null;
+  score?: number | null;
+  speaker?: string | null;
 }
 
 export interface Segment {
@@ -10,6 +13,7 @@ export interface Segment {
   end: number;
   text: string;
   speaker: string;
+  words?: WordSegment[];
 }
 
 export interface TranscriptData {
@@ -33,6 +37,11 @@ export interface Video {
   transcript_data?: TranscriptData;
 }
 
+export interface VideoPage {
+  items: Video[]; // Light projection: no summary_data / transcript_data.
+  next_cursor: string | null;
+}
+
 export interface Digest {
   id: number;
   digest_date: string;